@@ -1,15 +1,17 @@
 import asyncio
 import os
 import numpy as np
-import networkx as nx
 import pandas as pd
 from datetime import datetime
 
 from src.rate_limit import calibrate_rate_limit
 from src.collection import collect_network
-from src.modeling import build_graph
-from src.community import detect_communities_multi_resolution, apply_partition, extract_subcommunity_graph
-from src.report import generate_global_report, generate_subcommunity_report, get_next_available_index
+from src.modeling import build_array_graph
+from src.community import detect_communities_multi_resolution, detect_communities_consensus, apply_partition, resolution_profile
+from src.report import generate_global_report
+from src.export import export_communities
+from src.snapshot import write_graph
+from src.temporal import TemporalGraphStore, format_churn
 from src.visualization import generate_network_visualization
 from src.posts import collect_community_posts_df, interactive_select_gexf, interactive_select_csv
 from src.analysis import analyze_word_intervals_dict
@@ -30,11 +32,12 @@ async def main():
         print("[1] Nova Coleta e Análise de Comunidades (core_user)")
         print("[2] Análise Estatística de Posts (GEXF Existente)")
         print("[3] Aplicação do Modelo de Máxima Entropia (Ising)")
-        print("[4] Sair")
+        print("[4] Inferência de Ising em Lote (várias keywords x comunidades)")
+        print("[5] Sair")
         
         opcao = input("\nEscolha uma opção: ").strip()
         
-        if opcao == '4' or opcao.lower() == 'sair': break
+        if opcao == '5' or opcao.lower() == 'sair': break
 
         if opcao == '2':
             gexf_base = os.path.join(base_dir, "data", "processed", "gexf")
@@ -42,15 +45,40 @@ async def main():
             
             if gexf_path:
                 # 1. Coleta otimizada
-                from src.analysis import analyze_word_intervals_dict, create_ising_matrix_from_sets
+                from src.analysis import analyze_word_intervals_dict, create_ising_matrix_from_sets, add_confidence_bounds
+                
+                # Modo streaming: poda precoce de palavras raras com memória limitada
+                streaming = input("Modo streaming com memória limitada? (s/n) [n]: ").strip().lower() in ('s', 'sim', 'y', 'yes')
+                memory_cap_mb = 256
+                if streaming:
+                    try:
+                        memory_cap_mb = int(input("  Limite do buffer de palavras raras em MB [padrão: 256]: ").strip() or 256)
+                    except ValueError:
+                        memory_cap_mb = 256
+                
+                # Modo amostragem: subconjunto estratificado de usuários com erro conhecido
+                user_margin = None
+                std_rel_error = 0.1
+                amostra_input = input("Margem de erro das proporções de usuários para amostragem (ex: 0.05) [vazio = todos]: ").strip()
+                if amostra_input:
+                    try:
+                        user_margin = float(amostra_input)
+                        std_rel_error = float(input("  Erro relativo alvo do desvio padrão dos intervalos [padrão: 0.1]: ").strip() or 0.1)
+                    except ValueError:
+                        user_margin = None
+                        print("[Aviso] Valor inválido. Coletando todos os usuários.")
                 
                 global_word_times, user_word_sets, all_community_users = await collect_community_posts_df(
-                    gexf_path, semaphore_limit=safe_limit
+                    gexf_path, semaphore_limit=safe_limit,
+                    streaming=streaming, memory_cap_mb=memory_cap_mb,
+                    user_margin=user_margin, std_rel_error=std_rel_error
                 )
                 
                 if global_word_times:
                     # 2. Análise de intervalos para Figure B1
                     stats_df = analyze_word_intervals_dict(global_word_times)
+                    if user_margin is not None:
+                        stats_df = add_confidence_bounds(stats_df, std_rel_error=std_rel_error, user_margin=user_margin)
                     
                     user_count = len(all_community_users)
                     plots_out = os.path.join(base_dir, "data", "plots", f"sessao_{session_id}", str(user_count))
@@ -119,7 +147,8 @@ async def main():
                 if gexf_path:
                     try:
                         from src.analysis import create_ising_matrix_from_sets
-                        from src.ising_coniii import inferir_todos, gerar_figura2
+                        from src.ising_coniii import inferir_todos, gerar_figura2, arestas_da_rede, METODOS_INFERENCIA, checkpoint_pendente
+                        from src.ising_stats import caminho_estatisticas
                         import shutil
                         import json
                         
@@ -137,8 +166,9 @@ async def main():
                         else:
                             # 3. Coleta dados estrangeiros que não possuam memória na mesma base
                             print("\n[Coleta HTTP] Nenhuma memória viva dessa rede. Iniciando nova coleta via API...")
+                            # O mapa global de tempos é descartado aqui: o streaming limita sua memória
                             _, user_word_sets, all_community_users = await collect_community_posts_df(
-                                gexf_path, semaphore_limit=safe_limit
+                                gexf_path, semaphore_limit=safe_limit, streaming=True
                             )
                         
                         # 4. Carrega keywords e gera matriz de Ising
@@ -167,10 +197,26 @@ async def main():
                             
                             # 5. Inferência com ConIII (MCH)
                             print(f"\n[Ising-ConIII] Iniciando inferência para {S.shape[0]} amostras (keywords) e {S.shape[1]} spins (usuários)...")
+                            esparso = input("Restringir acoplamentos às arestas da rede (modo esparso)? (s/N): ").strip().lower() == 's'
+                            arestas = arestas_da_rede(gexf_path, node_names) if esparso else None
+                            print(f"Métodos disponíveis além do MCH: {', '.join(METODOS_INFERENCIA[1:])}")
+                            extras = input("Métodos adicionais para a comparação (separados por espaço, Enter para nenhum): ").split()
+                            extras = [m for m in extras if m in METODOS_INFERENCIA and m != "MCH"]
+                            backend = "numba" if arestas is not None else "coniii"
+                            retomar = False
+                            if checkpoint_pendente(S, 0.01, backend, node_names, arestas):
+                                retomar = input("Existe uma inferência MCH interrompida para esta matriz. Retomar do último checkpoint? (S/n): ").strip().lower() != 'n'
                             resultados = inferir_todos(
                                 spin_matrix=S,
                                 session_id=session_id,
-                                lam=0.01
+                                lam=0.01,
+                                backend=backend,
+                                arestas=arestas,
+                                metodos=("MCH", *extras),
+                                node_names=node_names,
+                                retomar=retomar,
+                                log_eventos=os.path.join(plots_out, f"eventos_ising_{comm_name}_{session_id}.jsonl"),
+                                stats_path=caminho_estatisticas(ising_path)
                             )
                             
                             # 6. Figura 2 (Painel Duplo)
@@ -194,6 +240,9 @@ async def main():
                                 shutil.move(csv_orig, os.path.join(plots_out, f"comparativo_coniii_{comm_name}_{session_id}.csv"))
                             if os.path.exists(npy_orig):
                                 shutil.move(npy_orig, os.path.join(plots_out, f"multipliers_{comm_name}_{session_id}.npy"))
+                            arestas_orig = f"arestas_ising_{session_id}.npy"
+                            if os.path.exists(arestas_orig):
+                                shutil.move(arestas_orig, os.path.join(plots_out, f"arestas_{comm_name}_{session_id}.npy"))
                                 
                             print(f"\n[Sucesso] Todos os artefatos Ising-ConIII movidos para: {plots_out}")
                         else:
@@ -203,6 +252,41 @@ async def main():
                         print(f"[Erro] Falha na aplicação do modelo: {e}")
             continue
 
+        if opcao == '4':
+            from src.ising_batch import executar_lote, carregar_jobs, normalizar_job
+            from src.ising_coniii import METODOS_INFERENCIA
+            plots_base = os.path.join(base_dir, "data", "plots")
+            gexf_base = os.path.join(base_dir, "data", "processed", "gexf")
+
+            jobs_path = input("Arquivo JSON de jobs (Enter para montar a lista interativamente): ").strip()
+            try:
+                if jobs_path:
+                    jobs = carregar_jobs(jobs_path)
+                else:
+                    pares = []
+                    while True:
+                        kw_path = interactive_select_csv(plots_base, keyword_filter="keywords_filtradas")
+                        gexf_path = interactive_select_gexf(gexf_base) if kw_path else None
+                        if kw_path and gexf_path:
+                            pares.append((kw_path, gexf_path))
+                            print(f"  [+] Job {len(pares)}: {os.path.basename(kw_path)} x {os.path.basename(gexf_path)}")
+                        if input("Adicionar outro job? (s/N): ").strip().lower() != 's':
+                            break
+                    print(f"Métodos disponíveis: {', '.join(METODOS_INFERENCIA)}")
+                    metodos = [m for m in input("Métodos de cada job (separados por espaço) [MCH]: ").split() if m in METODOS_INFERENCIA]
+                    esparso = input("Restringir acoplamentos às arestas da rede (modo esparso)? (s/N): ").strip().lower() == 's'
+                    jobs = [normalizar_job({"keywords": kw, "comunidade": gexf, "metodos": metodos or ["MCH"], "esparso": esparso})
+                            for kw, gexf in pares]
+
+                if jobs:
+                    cores_input = input("Núcleos por job [padrão: divisão igual entre os jobs]: ").strip()
+                    executar_lote(jobs, cores_por_job=int(cores_input) if cores_input else None)
+                else:
+                    print("[Aviso] Nenhum job selecionado.")
+            except Exception as e:
+                print(f"[Erro] Falha na inferência em lote: {e}")
+            continue
+
         if opcao == '1':
             core_user = input("Digite o handle ou DID: ").strip()
             if not core_user: continue
@@ -221,23 +305,45 @@ async def main():
             edges = await collect_network(core_user, safe_limit, max_followers=max_followers)
             if not edges: continue
                 
-            raw_G = build_graph(edges)
-            raw_G.remove_edges_from(nx.selfloop_edges(raw_G))
-            G = nx.k_core(raw_G, k=2)
-            if G.number_of_nodes() == 0: continue
+            # Grafo compacto em arrays (self-loops descartados na construção) e k-core vetorizado
+            core = build_array_graph(edges).k_core(2)
+            if core.number_of_nodes() == 0: continue
             
-            results = detect_communities_multi_resolution(G, [1.0, 1.5, 2.0, 2.5, 3.0])
-            print("\nRESUMO LEIDEN (C++) - REFINADO COM K-CORE (k=2):")
-            for res, data in results.items():
-                if data['initial_mod'] > 0:
-                    sizes = data['sizes'].values()
-                    max_s = max(sizes) if sizes else 0
-                    min_s = min(sizes) if sizes else 0
-                    print(f"Res [{res}]: {data['num_communities']} coms | Mod: {data['initial_mod']:.4f} -> {data['modularity']:.4f} | Maior: {max_s} | Menor: {min_s}")
-                else:
-                    print(f"Res [{res}]: Nenhuma comunidade detectada.")
+            # Cache de partições por (hash do grafo, resolução), compartilhado com o perfil de resolução
+            leiden_cache = os.path.join(base_dir, "data", "cache", "leiden")
+            try:
+                n_seeds = int(input("Seeds para consenso Leiden (0 = execução única) [padrão: 0]: ").strip() or 0)
+            except ValueError:
+                n_seeds = 0
+            if n_seeds > 1:
+                results = detect_communities_consensus(core, [1.0, 1.5, 2.0, 2.5, 3.0], n_seeds=n_seeds)
+            else:
+                results = detect_communities_multi_resolution(core, [1.0, 1.5, 2.0, 2.5, 3.0], cache_dir=leiden_cache)
+            
+            while True:
+                print("\nRESUMO LEIDEN (C++) - REFINADO COM K-CORE (k=2):")
+                for res, data in results.items():
+                    if data['initial_mod'] > 0:
+                        sizes = data['sizes'].values()
+                        max_s = max(sizes) if sizes else 0
+                        min_s = min(sizes) if sizes else 0
+                        print(f"Res [{res}]: {data['num_communities']} coms | Mod: {data['initial_mod']:.4f} -> {data['modularity']:.4f} | Maior: {max_s} | Menor: {min_s}")
+                    else:
+                        print(f"Res [{res}]: Nenhuma comunidade detectada.")
+               
+                choice = input("\nResolução (ex: 1.0), 'perfil' para explorar faixas ou 'cancelar': ").strip()
+                if choice.lower() != 'perfil': break
+                
+                # Perfil de resolução: bissecção incremental entre as faixas em que a partição muda
+                try:
+                    res_min = float(input("  Resolução mínima [padrão: 0.5]: ").strip() or 0.5)
+                    res_max = float(input("  Resolução máxima [padrão: 3.0]: ").strip() or 3.0)
+                except ValueError:
+                    res_min, res_max = 0.5, 3.0
+                for faixa in resolution_profile(core, res_min, res_max, cache_dir=leiden_cache):
+                    results[faixa["resolucao"]] = faixa["resultado"]
+                results = dict(sorted(results.items()))
            
-            choice = input("\nResolução (ex: 1.0) ou 'cancelar': ").strip()
             if choice.lower() == 'cancelar' or choice not in [str(r) for r in results.keys()]: continue
             chosen_res = float(choice)
                     
@@ -252,7 +358,9 @@ async def main():
             os.makedirs(png_dir, exist_ok=True)
 
             chosen_data = results[chosen_res]
-            apply_partition(G, chosen_data["partition"])
+            # networkx apenas a partir daqui (atributos, relatórios, GEXF e visualização)
+            G = core.to_networkx()
+            apply_partition(G, chosen_data["partition"], chosen_data.get("stability"))
             
             print("\nCOMUNIDADES:")
             for cid, size in sorted(chosen_data["sizes"].items(), key=lambda x: x[1], reverse=True):
@@ -262,22 +370,27 @@ async def main():
             exported_indices = []
             if selection:
                 try:
-                    for cid in [int(x.strip()) for x in selection.split(",")]:
-                        if cid not in chosen_data["sizes"]: continue
-                        disp_id = get_next_available_index(gexf_dir, reports_dir)
-                        exported_indices.append(disp_id)
-                        sub_G = extract_subcommunity_graph(G, cid)
-                        
-                        # Nome padrão: comunidade_{id}_{core_user}.gexf
-                        nx.write_gexf(sub_G, os.path.join(gexf_dir, f"comunidade_{disp_id}_{core_user}.gexf"))
-                        generate_subcommunity_report(sub_G, disp_id, cid, output_dir=reports_dir)
-                        generate_network_visualization(sub_G, output_dir=png_dir, filename=f"comunidade_{disp_id}.png")
-                except: pass
+                    selected_ids = [int(x.strip()) for x in selection.split(",")]
+                    selected_ids = list(dict.fromkeys(cid for cid in selected_ids if cid in chosen_data["sizes"]))
+                    exported_indices = export_communities(
+                        G, chosen_data["partition"], selected_ids, core_user, gexf_dir, reports_dir, png_dir
+                    )
+                except ValueError:
+                    print("[Erro] IDs inválidos. Nenhuma comunidade exportada.")
                 
             generate_global_report(G, chosen_data["num_communities"], chosen_data["modularity"], output_dir=reports_dir, selected_indices=exported_indices, core_user=core_user)
             
-            # Global GEXF: rede_{session_id}.gexf (Anônimo)
-            nx.write_gexf(G, os.path.join(gexf_dir, f"rede_{session_id}.gexf"))
+            # Global GEXF: rede_{session_id}.gexf (Anônimo) + snapshot binário para uso interno
+            write_graph(G, os.path.join(gexf_dir, f"rede_{session_id}.gexf"))
+
+            # Histórico temporal da rede desta semente (deltas em relação à execução anterior)
+            historico = TemporalGraphStore(os.path.join(processed_dir, "temporal", core_user))
+            mudancas = historico.record(G, session_id, chosen_data["partition"])
+            if mudancas is not None:
+                print(f"[Histórico] Desde a execução {historico.runs()[-2]}: "
+                      f"{format_churn(mudancas, G.number_of_nodes(), G.number_of_edges())}")
+            else:
+                print(f"[Histórico] Primeira execução registrada para {core_user}.")
             generate_network_visualization(G, output_dir=png_dir, filename="rede_global.png")
             print(f"\n[Sucesso] Arquivos anônimos em {processed_dir}")
             print(f"Consulte o relatório em {reports_dir} para identificar o usuário.")
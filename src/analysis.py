@@ -1,10 +1,19 @@
 import pandas as pd
 import numpy as np
 
+# Mínimo de ocorrências para que uma palavra entre na estatística de intervalos
+MIN_OCCURRENCES = 3
+
+# Tempos de ocorrência são armazenados como segundos inteiros (int32) desde
+# BLUESKY_START_DATE; a conversão para dias acontece apenas na análise.
+TIME_TYPECODE = 'i'
+SECONDS_PER_DAY = 86400
+
 def analyze_word_intervals_dict(global_word_times):
     """
     Calcula o desvio padrão do tempo entre ocorrências de cada palavra.
-    Recebe um dicionário {palavra: [lista_de_idades]}.
+    Recebe um dicionário {palavra: array de segundos desde o lançamento do Bluesky}
+    e reporta os intervalos em dias.
     """
     if not global_word_times:
         print("[Análise] Mapa de palavras vazio.")
@@ -14,10 +23,10 @@ def analyze_word_intervals_dict(global_word_times):
     
     stats = []
     for word, times in global_word_times.items():
-        if len(times) < 3:
+        if len(times) < MIN_OCCURRENCES:
             continue
             
-        sorted_times = sorted(times)
+        sorted_times = np.sort(np.asarray(times, dtype=np.float64)) / SECONDS_PER_DAY
         intervals = np.diff(sorted_times)
         
         if len(intervals) > 0:
@@ -32,6 +41,36 @@ def analyze_word_intervals_dict(global_word_times):
     print(f"[Análise] Concluída. {len(result_df)} palavras atingiram o critério estatístico.")
     return result_df
 
+def add_confidence_bounds(stats_df, confidence=0.95, std_rel_error=None, user_margin=None):
+    """
+    Adiciona intervalos de confiança aproximados ao desvio padrão dos intervalos.
+    Com k intervalos, o erro padrão relativo de um desvio padrão é ≈ 1/sqrt(2(k-1)).
+
+    Os limites cobrem apenas o erro de contagem das ocorrências coletadas; o erro da
+    amostragem de usuários (margem 'user_margin', absoluta, sobre proporções de
+    usuários) não é propagado ao desvio padrão e é apenas reportado ao lado.
+    """
+    if stats_df.empty:
+        return stats_df
+
+    from statistics import NormalDist
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    k = stats_df['occurrences'].to_numpy(dtype=float) - 1
+    half_width = np.where(k > 1, z / np.sqrt(2 * np.maximum(k - 1, 1)), np.inf)
+
+    stats_df = stats_df.copy()
+    stats_df['erro_relativo'] = half_width
+    stats_df['dp_inferior'] = np.maximum(0.0, stats_df['desvio_padrao'] * (1 - half_width))
+    stats_df['dp_superior'] = stats_df['desvio_padrao'] * (1 + half_width)
+
+    print(f"[Análise] IC {confidence:.0%} do desvio padrão: erro relativo mediano ±{np.median(half_width):.1%}")
+    if std_rel_error is not None:
+        ok = int((half_width <= std_rel_error).sum())
+        print(f"[Análise] {ok}/{len(stats_df)} palavras dentro do erro relativo alvo do desvio padrão (±{std_rel_error:.1%}).")
+    if user_margin is not None:
+        print(f"[Análise] Amostragem de usuários: margem ±{user_margin:.1%} em proporções, não incluída nos limites acima.")
+    return stats_df
+
 def create_ising_matrix_from_sets(user_word_sets, keywords, all_users):
     """
     Gera uma matriz de spins (+1/-1) para o modelo de Ising.
@@ -1,91 +1,442 @@
 import os
-import sys
-
-# Suprime os prints de "Note: to be able to use all crisp methods..." do cdlib
-_stdout = sys.stdout
-sys.stdout = open(os.devnull, 'w')
-try:
-    from cdlib import algorithms
-finally:
-    sys.stdout.close()
-    sys.stdout = _stdout
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
 
+import numpy as np
 import networkx as nx
+import igraph as ig
+import leidenalg
+
+from .modeling import ArrayGraph
+
+# Grafo igraph somente-leitura de cada processo trabalhador (montado uma única vez no initializer)
+_WORKER_GRAPH = None
+# Pesos das arestas do grafo do trabalhador (None = não ponderado)
+_WORKER_WEIGHTS = None
+
+def graph_to_edge_arrays(G):
+    """
+    Converte o grafo (networkx ou ArrayGraph) em (lista_de_nós, arestas int64 [E, 2])
+    uma única vez, representação nativa compartilhada por todas as resoluções.
+    """
+    if isinstance(G, ArrayGraph):
+        return G.labels.tolist(), G.edges.astype(np.int64)
+    nodes = list(G.nodes())
+    index = {node: i for i, node in enumerate(nodes)}
+    edges = np.fromiter(
+        (index[x] for edge in G.edges() for x in edge), dtype=np.int64, count=2 * G.number_of_edges()
+    ).reshape(-1, 2)
+    return nodes, edges
+
+def _init_leiden_worker(num_nodes, edges, weights=None):
+    global _WORKER_GRAPH, _WORKER_WEIGHTS
+    _WORKER_GRAPH = ig.Graph(n=num_nodes, edges=edges)
+    _WORKER_WEIGHTS = None if weights is None else np.asarray(weights, dtype=np.float64).tolist()
+
+def _run_leiden(res, seed=None, initial_membership=None):
+    """
+    Executa Leiden (RBConfiguration, mesmo modelo do cdlib.rb_pots) no grafo do trabalhador.
+    Retorna (resolução, membership, modularidade inicial).
+    """
+    if initial_membership is not None:
+        initial_membership = np.asarray(initial_membership).tolist()
+    part = leidenalg.find_partition(
+        _WORKER_GRAPH, leidenalg.RBConfigurationVertexPartition,
+        weights=_WORKER_WEIGHTS, resolution_parameter=res, seed=seed, initial_membership=initial_membership
+    )
+    membership = np.asarray(part.membership, dtype=np.int64)
+    return res, membership, _WORKER_GRAPH.modularity(part.membership, weights=_WORKER_WEIGHTS)
+
+def _run_leiden_task(task):
+    res, seed = task
+    return _run_leiden(res, seed)
+
+def run_leiden_tasks(num_nodes, edges, tasks, n_jobs=None, weights=None):
+    """
+    Roda tarefas Leiden (resolução, seed) concorrentemente em um pool de processos que
+    recebe o grafo somente-leitura (e os pesos opcionais das arestas) uma vez por
+    trabalhador. Gera (res, membership, modularidade) na ordem das tarefas; em caso de
+    falha, (res, Exception, None).
+    """
+    n_jobs = n_jobs or min(len(tasks), max(1, mp.cpu_count() - 1))
+    if n_jobs <= 1 or len(tasks) <= 1:
+        _init_leiden_worker(num_nodes, edges, weights)
+        for task in tasks:
+            try:
+                yield _run_leiden_task(task)
+            except Exception as e:
+                yield task[0], e, None
+        return
+
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_leiden_worker,
+                             initargs=(num_nodes, edges, weights)) as pool:
+        futures = {pool.submit(_run_leiden_task, task): task for task in tasks}
+        for future in futures:
+            try:
+                yield future.result()
+            except Exception as e:
+                yield futures[future][0], e, None
+
+def run_leiden_sweep(num_nodes, edges, resolutions, seed=None, n_jobs=None):
+    """Uma execução Leiden por resolução, em paralelo (ver run_leiden_tasks)."""
+    return run_leiden_tasks(num_nodes, edges, [(res, seed) for res in resolutions], n_jobs)
+
+def modularity_from_edges(edges, membership):
+    """Modularidade de Newman-Girvan (não ponderada) calculada diretamente do vetor de arestas."""
+    m = len(edges)
+    if m == 0:
+        raise ValueError("A graph without link has an undefined modularity")
+    lu, lv = membership[edges[:, 0]], membership[edges[:, 1]]
+    n_labels = int(max(lu.max(), lv.max())) + 1
+    community_degree = np.bincount(lu, minlength=n_labels) + np.bincount(lv, minlength=n_labels)
+    internal = np.bincount(lu[lu == lv], minlength=n_labels)
+    return float(np.sum(internal / m - (community_degree / (2.0 * m)) ** 2))
+
+def refine_partition(node_list, edges, membership, initial_mod, k=2):
+    """
+    Refinamento K-Core local (k=2) de uma partição Leiden e recálculo da modularidade,
+    vetorizado sobre o vetor de arestas: mantém apenas arestas intra-comunidade, descasca
+    iterativamente os nós com grau interno < k e calcula a modularidade do grafo
+    refinado com as mesmas arrays. Retorna o dicionário de resultado de uma resolução.
+    """
+    n = len(node_list)
+    membership = np.asarray(membership, dtype=np.int64)
+    u, v = edges[:, 0], edges[:, 1]
+    sizes = np.bincount(membership, minlength=1)
 
+    # 1. Arestas internas (extremidades com o mesmo rótulo); k=2 requer pelo menos 3 nós
+    intra = (membership[u] == membership[v]) & (u != v)
+    eu, ev = u[intra], v[intra]
+    alive = sizes[membership] >= 3
 
-from cdlib.classes.node_clustering import NodeClustering
+    # 2. Refinamento K-Core Local: descasca nós com menos de k conexões DENTRO da comunidade
+    while True:
+        keep = alive[eu] & alive[ev]
+        eu, ev = eu[keep], ev[keep]
+        degree = np.bincount(eu, minlength=n) + np.bincount(ev, minlength=n)
+        drop = alive & (degree < k)
+        if not drop.any():
+            break
+        alive &= ~drop
 
-def detect_communities_multi_resolution(G, resolutions=[1.0, 1.5, 2.0, 2.5, 3.0]):
+    # Regra: remover subcomunidades com 1 ou zero nós após o filtro
+    survivors = np.bincount(membership[alive], minlength=len(sizes))
+    kept_labels = np.flatnonzero(survivors > 1)
+    if len(kept_labels) == 0:
+        return {"partition": {}, "modularity": 0, "initial_mod": initial_mod, "num_communities": 0, "sizes": {}}
+    alive &= survivors[membership] > 1
+
+    # Mesma ordem do Leiden (tamanho original decrescente) para numerar as comunidades refinadas
+    kept_labels = kept_labels[np.lexsort((kept_labels, -sizes[kept_labels]))]
+    new_id = np.full(len(sizes), -1, dtype=np.int64)
+    new_id[kept_labels] = np.arange(len(kept_labels))
+
+    # 3. Modularidade sobre o grafo REFINADO (todas as arestas entre sobreviventes)
+    in_refined = alive[u] & alive[v] & (u != v)
+    final_mod = modularity_from_edges(edges[in_refined], new_id[membership])
+
+    # Formata partição para o dicionário (nó -> id)
+    idx = np.flatnonzero(alive)
+    cids = new_id[membership[idx]]
+    partition = dict(zip([node_list[i] for i in idx], cids.tolist()))
+    counts = np.bincount(cids, minlength=len(kept_labels))
+    
+    return {
+        "partition": partition,
+        "modularity": final_mod,
+        "initial_mod": initial_mod,
+        "num_communities": len(kept_labels),
+        "sizes": dict(enumerate(counts.tolist()))
+    }
+
+def detect_communities_multi_resolution(G, resolutions=[1.0, 1.5, 2.0, 2.5, 3.0], seed=None, n_jobs=None,
+                                        cache_dir=None):
     """
-    Executa o algoritmo Leiden (via cdlib C++ backend) para diferentes resoluções.
+    Executa o algoritmo Leiden (leidenalg C++ backend) para diferentes resoluções.
+    O grafo é convertido para igraph uma única vez e as resoluções rodam em paralelo.
     Aplica também o filtro k-core local em cada subcomunidade conforme solicitado.
+    Com cache_dir, partições já calculadas para o mesmo grafo são reaproveitadas.
     """
     print(f"\n[Comunidades] Executando detecção Leiden (C++) e Refinamento K-Core...")
     
     results = {}
+    node_list, edges = graph_to_edge_arrays(G)
+    cache = PartitionCache(graph_hash(node_list, edges), cache_dir)
+    
+    cached = {res: cache.get(res) for res in resolutions}
+    pending = [res for res in resolutions if cached[res] is None]
+    if len(pending) < len(resolutions):
+        print(f"  -> [Cache] {len(resolutions) - len(pending)} resoluções recuperadas do cache de partições")
+    if pending:
+        print(f"  -> {len(pending)} resoluções em paralelo sobre {len(node_list)} nós / {len(edges)} arestas")
+        for res, membership, initial_mod in run_leiden_sweep(len(node_list), edges, pending, seed=seed, n_jobs=n_jobs):
+            if isinstance(membership, Exception):
+                print(f"  [Erro] Falha na resolução {res}: {membership}")
+                continue
+            cache.put(res, membership, initial_mod)
+            cached[res] = (membership, initial_mod)
     
     for res in resolutions:
+        if cached[res] is None:
+            continue
         print(f"  -> Processando resolução: {res}")
         try:
-            # 1. Detecção Inicial
-            coms = algorithms.rb_pots(G, weights=None, resolution_parameter=res)
-            initial_mod = coms.newman_girvan_modularity().score
-            
-            # 2. Refinamento K-Core Local (k=2)
-            # Removemos nós que não possuem pelo menos 2 conexões DENTRO de sua própria comunidade
-            filtered_communities = []
-            for community_nodes in coms.communities:
-                if len(community_nodes) < 3: continue # k=2 requer pelo menos 3 nós
-                
-                sub_G = G.subgraph(community_nodes)
-                k_core_sub = nx.k_core(sub_G, k=2)
-                
-                # Regra: remover subcomunidades com 1 ou zero nós após o filtro
-                if k_core_sub.number_of_nodes() > 1:
-                    filtered_communities.append(list(k_core_sub.nodes()))
-            
-            # 3. Recálculo da Modularidade sobre o grafo REFINADO
-            if not filtered_communities:
-                results[res] = {"partition": {}, "modularity": 0, "initial_mod": initial_mod, "num_communities": 0, "sizes": {}}
-                continue
-
-            # Para que a modularidade pós-filtro faça sentido, calculamos sobre o subgrafo dos sobreviventes
-            surviving_nodes = [node for comm in filtered_communities for node in comm]
-            G_refined = G.subgraph(surviving_nodes)
-            
-            refined_coms = NodeClustering(communities=filtered_communities, graph=G_refined, method_name="leiden_refined")
-            final_mod = refined_coms.newman_girvan_modularity().score
-            
-            # Formata partição para o dicionário (nó -> id)
-            partition = {}
-            community_sizes = {}
-            for cid, nodes in enumerate(filtered_communities):
-                community_sizes[cid] = len(nodes)
-                for node in nodes:
-                    partition[node] = cid
-            
-            results[res] = {
-                "partition": partition,
-                "modularity": final_mod,
-                "initial_mod": initial_mod,
-                "num_communities": len(filtered_communities),
-                "sizes": community_sizes
-            }
-            
+            membership, initial_mod = cached[res]
+            results[res] = refine_partition(node_list, edges, membership, initial_mod)
         except Exception as e:
             print(f"  [Erro] Falha na resolução {res}: {e}")
             
     return results
 
 
-def apply_partition(G, partition):
+# ─────────────────────────────────────────────────────────────────────────────
+# CONSENSO ENTRE SEEDS (Co-Atribuição Esparsa)
+# ─────────────────────────────────────────────────────────────────────────────
+
+def detect_communities_consensus(G, resolutions=[1.0, 1.5, 2.0, 2.5, 3.0], n_seeds=20, threshold=0.5,
+                                 n_jobs=None, max_iter=10):
+    """
+    Clusterização de consenso (Lancichinetti & Fortunato, 2012) sobre várias seeds Leiden.
+
+    Para cada resolução, 'n_seeds' execuções rodam em paralelo; a matriz de co-atribuição
+    é mantida em forma esparsa, restrita às arestas do grafo (fração de execuções em que
+    as duas extremidades caíram na mesma comunidade). Como no algoritmo original, o
+    consenso é iterado: as arestas com co-atribuição < 'threshold' são descartadas, as
+    demais ponderadas por essa fração, e 'n_seeds' execuções Leiden sobre esse grafo
+    produzem a nova co-atribuição, até que ela seja 0 ou 1 em todas as arestas (matriz
+    bloco-diagonal) ou até 'max_iter' iterações. Segue o mesmo refinamento k-core.
+    As execuções de cada iteração também vão para o pool (run_leiden_tasks com os pesos
+    do grafo de consenso); as iterações em si são sequenciais, e cada uma paga a
+    partida de um pool novo, já que o grafo ponderado muda de uma iteração para outra.
+    A estabilidade de cada nó é a co-atribuição média (das execuções originais) das
+    suas arestas internas à comunidade de consenso.
+    Retorna o mesmo dicionário de detect_communities_multi_resolution, com as chaves
+    extras "stability" ({nó: [0, 1]}), "coassignment" (scipy.sparse.csr_matrix simétrica,
+    execuções originais) e "consensus_iterations".
+    """
+    from scipy.sparse import csr_matrix
+
+    print(f"\n[Consenso] {n_seeds} seeds x {len(resolutions)} resoluções em paralelo (limiar {threshold})...")
+    node_list, edges = graph_to_edge_arrays(G)
+    n = len(node_list)
+    u, v = edges[:, 0], edges[:, 1]
+
+    agreement = {res: np.zeros(len(edges), dtype=np.int32) for res in resolutions}
+    runs = {res: 0 for res in resolutions}
+    tasks = [(res, seed) for res in resolutions for seed in range(n_seeds)]
+    for res, membership, _ in run_leiden_tasks(n, edges, tasks, n_jobs=n_jobs):
+        if isinstance(membership, Exception):
+            print(f"  [Erro] Falha em uma execução da resolução {res}: {membership}")
+            continue
+        agreement[res] += membership[u] == membership[v]
+        runs[res] += 1
+
+    results = {}
+    for res in resolutions:
+        if runs[res] == 0:
+            continue
+        print(f"  -> Consenso da resolução: {res} ({runs[res]} execuções)")
+        try:
+            frac = agreement[res] / runs[res]
+            coassignment = csr_matrix((np.concatenate((frac, frac)), (np.concatenate((u, v)), np.concatenate((v, u)))),
+                                      shape=(n, n))
+
+            # Leiden iterado sobre o grafo de consenso (arestas fortes ponderadas pela co-atribuição)
+            current = frac
+            for iteration in range(1, max_iter + 1):
+                strong = current >= threshold
+                hits = np.zeros(len(edges), dtype=np.int32)
+                done = 0
+                consensus_tasks = [(res, seed) for seed in range(n_seeds)]
+                for _, part, _ in run_leiden_tasks(n, edges[strong], consensus_tasks, n_jobs=n_jobs,
+                                                   weights=current[strong]):
+                    if isinstance(part, Exception):
+                        print(f"  [Erro] Falha em uma execução de consenso da resolução {res}: {part}")
+                        continue
+                    membership = part
+                    hits += membership[u] == membership[v]
+                    done += 1
+                if done == 0:
+                    raise RuntimeError("nenhuma execução Leiden concluída sobre o grafo de consenso")
+                current = hits / done
+                if np.all((current == 0) | (current == 1)):
+                    break
+            if not np.all((current == 0) | (current == 1)):
+                print(f"     [Aviso] Consenso não convergiu em {max_iter} iterações; usando a última partição.")
+
+            data = refine_partition(node_list, edges, membership, modularity_from_edges(edges, membership))
+
+            # Estabilidade: co-atribuição média das arestas internas à comunidade de consenso
+            inside = membership[u] == membership[v]
+            weight_sum = np.bincount(u[inside], frac[inside], minlength=n) + np.bincount(v[inside], frac[inside], minlength=n)
+            count = np.bincount(u[inside], minlength=n) + np.bincount(v[inside], minlength=n)
+            stability = np.divide(weight_sum, count, out=np.zeros(n), where=count > 0)
+
+            data["stability"] = {node_list[i]: float(stability[i]) for i in range(n)}
+            data["coassignment"] = coassignment
+            data["consensus_iterations"] = iteration
+            data["n_seeds"] = runs[res]
+            results[res] = data
+            print(f"     Estabilidade média: {stability.mean():.3f} | Nós com estabilidade < 0.5: {(stability < 0.5).sum()} "
+                  f"| {iteration} iteração(ões) de consenso")
+        except Exception as e:
+            print(f"  [Erro] Falha no consenso da resolução {res}: {e}")
+
+    return results
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# PERFIL DE RESOLUÇÃO (Bissecção com Cache de Partições)
+# ─────────────────────────────────────────────────────────────────────────────
+
+def graph_hash(node_list, edges):
+    """Impressão digital do grafo (rótulos + arestas canônicas) para chavear o cache."""
+    import hashlib
+    canonical = np.sort(np.sort(edges, axis=1).view([('u', np.int64), ('v', np.int64)]), axis=0)
+    h = hashlib.sha1()
+    h.update("\x00".join(map(str, node_list)).encode("utf-8"))
+    h.update(np.ascontiguousarray(canonical).tobytes())
+    return h.hexdigest()[:16]
+
+def _canonical_membership(membership):
+    """Renumera os rótulos por ordem de primeira ocorrência, para comparar partições."""
+    _, first, inverse = np.unique(membership, return_index=True, return_inverse=True)
+    rank = np.empty(len(first), dtype=np.int64)
+    rank[np.argsort(first)] = np.arange(len(first))
+    return rank[inverse]
+
+def partition_similarity(a, b):
+    """Informação mútua normalizada (NMI) entre duas partições dos mesmos nós."""
+    a = _canonical_membership(a)
+    b = _canonical_membership(b)
+    n = len(a)
+    if n == 0:
+        return 1.0
+    joint = np.unique(a * (int(b.max()) + 1) + b, return_counts=True)[1] / n
+    pa = np.bincount(a) / n
+    pb = np.bincount(b) / n
+    h_a = -np.sum(pa * np.log(pa))
+    h_b = -np.sum(pb * np.log(pb))
+    if h_a == 0 and h_b == 0:
+        return 1.0
+    mutual = h_a + h_b + np.sum(joint * np.log(joint))
+    return float(2 * mutual / (h_a + h_b))
+
+class PartitionCache:
+    """
+    Cache de partições Leiden em memória e em disco (.npz), chaveado pelo hash do
+    grafo e pela resolução. Também fornece a partição da resolução vizinha mais
+    próxima para servir de membership inicial (warm start).
+    """
+    def __init__(self, graph_key, cache_dir=None):
+        self.graph_key = graph_key
+        self.cache_dir = os.path.join(cache_dir, graph_key) if cache_dir else None
+        self._mem = {}
+        if self.cache_dir and os.path.isdir(self.cache_dir):
+            for f in os.listdir(self.cache_dir):
+                if f.startswith("res_") and f.endswith(".npz"):
+                    self._mem[round(float(f[4:-4]), 6)] = None  # carregado sob demanda
+
+    def _path(self, res):
+        return os.path.join(self.cache_dir, f"res_{res:.6f}.npz")
+
+    def get(self, res):
+        res = round(float(res), 6)
+        if res not in self._mem:
+            return None
+        if self._mem[res] is None:
+            with np.load(self._path(res)) as data:
+                self._mem[res] = (data["membership"], float(data["initial_mod"]))
+        return self._mem[res]
+
+    def put(self, res, membership, initial_mod):
+        res = round(float(res), 6)
+        self._mem[res] = (membership, initial_mod)
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            np.savez(self._path(res), membership=membership, initial_mod=initial_mod)
+
+    def nearest(self, res):
+        if not self._mem:
+            return None
+        closest = min(self._mem, key=lambda r: abs(r - res))
+        return self.get(closest)[0]
+
+def resolution_profile(G, res_min=0.5, res_max=3.0, min_step=0.1, min_similarity=0.9,
+                       seed=42, cache_dir=None):
+    """
+    Perfil de resolução (RB/CPM): bissecta [res_min, res_max] até localizar, com
+    precisão 'min_step', as resoluções em que a partição muda (NMI entre as
+    extremidades abaixo de 'min_similarity'). Cada Leiden novo parte
+    da partição da resolução vizinha já calculada (initial_membership), de modo que
+    faixas estáveis custam apenas uma execução incremental.
+    Retorna lista de faixas: {"inicio", "fim", "resolucao", "membership", "initial_mod",
+    "num_communities", "resultado"}, onde "resolucao" é o ponto médio da faixa,
+    "membership"/"initial_mod" são os da partição calculada nesse ponto e "resultado"
+    é essa partição refinada por k-core no mesmo formato de detect_communities_multi_resolution.
+    """
+    node_list, edges = graph_to_edge_arrays(G)
+    cache = PartitionCache(graph_hash(node_list, edges), cache_dir)
+    _init_leiden_worker(len(node_list), edges)
+    runs = {"leiden": 0, "cache": 0}
+
+    def partition_at(res):
+        res = round(res, 6)
+        hit = cache.get(res)
+        if hit is not None:
+            runs["cache"] += 1
+            return hit
+        _, membership, initial_mod = _run_leiden(res, seed, initial_membership=cache.nearest(res))
+        cache.put(res, membership, initial_mod)
+        runs["leiden"] += 1
+        return membership, initial_mod
+
+    print(f"\n[Perfil] Bissecção da resolução em [{res_min}, {res_max}] (passo mínimo {min_step})...")
+    points = {res_min: partition_at(res_min), res_max: partition_at(res_max)}
+    stack = [(res_min, res_max)]
+    while stack:
+        a, b = stack.pop()
+        same = partition_similarity(points[a][0], points[b][0]) >= min_similarity
+        if same or (b - a) <= min_step:
+            continue
+        mid = round((a + b) / 2, 6)
+        points[mid] = partition_at(mid)
+        stack.extend([(mid, b), (a, mid)])
+
+    # Agrupa pontos consecutivos com a mesma partição em faixas estáveis
+    ranges = []
+    for res in sorted(points):
+        membership, initial_mod = points[res]
+        if ranges and partition_similarity(ranges[-1]["membership"], membership) >= min_similarity:
+            ranges[-1]["fim"] = res
+            continue
+        ranges.append({"inicio": res, "fim": res, "membership": membership, "initial_mod": initial_mod,
+                       "num_communities": len(np.unique(membership))})
+
+    for r in ranges:
+        # Partição do ponto médio da faixa (warm start pela vizinha da faixa), para que a
+        # partição e a modularidade correspondam à resolução sob a qual a faixa é rotulada
+        r["resolucao"] = round((r["inicio"] + r["fim"]) / 2, 6)
+        r["membership"], r["initial_mod"] = partition_at(r["resolucao"])
+        r["num_communities"] = len(np.unique(r["membership"]))
+        r["resultado"] = refine_partition(node_list, edges, r["membership"], r["initial_mod"])
+        print(f"  [{r['inicio']:.4f} – {r['fim']:.4f}] resolução {r['resolucao']:g}: {r['num_communities']} comunidades "
+              f"| Mod inicial: {r['initial_mod']:.4f}")
+    print(f"[Perfil] {len(ranges)} faixas estáveis | {runs['leiden']} execuções Leiden incrementais, {runs['cache']} do cache.")
+    return ranges
+
+
+def apply_partition(G, partition, stability=None):
     """
     Adiciona o atributo 'Community ID' no grafo baseado na partição escolhida pelo usuário.
     Nós removidos pelo filtro k-core ficarão sem o atributo ou com ID -1.
+    Com 'stability' (modo consenso), grava também o atributo 'Stability' de cada nó.
     """
     # Primeiro, limpa IDs antigos
     nx.set_node_attributes(G, {node: -1 for node in G.nodes()}, name="Community ID")
     nx.set_node_attributes(G, partition, name="Community ID")
+    if stability is not None:
+        nx.set_node_attributes(G, stability, name="Stability")
 
 def extract_subcommunity_graph(G, community_id):
     """
@@ -97,3 +448,33 @@ def extract_subcommunity_graph(G, community_id):
         if data.get("Community ID") == community_id and data.get("Community ID") != -1
     ]
     return G.subgraph(nodes_in_comm).copy()
+
+def index_communities(partition):
+    """
+    Índice comunidade → nós, construído uma única vez a partir da partição {nó: id}.
+    """
+    index = {}
+    for node, cid in partition.items():
+        index.setdefault(cid, []).append(node)
+    return index
+
+def extract_subcommunity_graphs(G, partition, community_ids):
+    """
+    Extrai os subgrafos de várias comunidades em uma única passada pelas arestas de 'G',
+    usando o índice comunidade → nós em vez de varrer todos os nós por comunidade.
+    Retorna {community_id: subgrafo}.
+    """
+    index = index_communities(partition)
+    selected = set(community_ids)
+    subgraphs = {}
+    for cid in community_ids:
+        sub_G = nx.Graph()
+        sub_G.graph.update(G.graph)
+        sub_G.add_nodes_from((node, G.nodes[node]) for node in index.get(cid, []))
+        subgraphs[cid] = sub_G
+
+    for a, b, data in G.edges(data=True):
+        cid = partition.get(a)
+        if cid in selected and partition.get(b) == cid:
+            subgraphs[cid].add_edge(a, b, **data)
+    return subgraphs
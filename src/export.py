@@ -0,0 +1,53 @@
+import os
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+from .snapshot import write_graph
+from .community import extract_subcommunity_graphs
+from .report import generate_subcommunity_report, get_next_available_index
+from .visualization import generate_network_visualization
+
+def _export_community_artifacts(sub_G, display_id, original_cid, gexf_path, reports_dir, png_dir):
+    """Grava GEXF (+ snapshot binário), relatório e PNG de uma comunidade (executado em um processo trabalhador)."""
+    write_graph(sub_G, gexf_path)
+    generate_subcommunity_report(sub_G, display_id, original_cid, output_dir=reports_dir)
+    generate_network_visualization(sub_G, output_dir=png_dir, filename=f"comunidade_{display_id}.png")
+    return display_id
+
+def export_communities(G, partition, community_ids, core_user, gexf_dir, reports_dir, png_dir, n_jobs=None):
+    """
+    Exportação em lote das comunidades selecionadas:
+    1. Reserva os índices de exibição sequenciais (sem sobrescrever relatórios existentes);
+    2. Extrai todos os subgrafos em uma passada (índice comunidade → nós);
+    3. Grava GEXF/relatório/PNG de cada comunidade concorrentemente em um pool de processos.
+    Retorna a lista de índices exportados com sucesso.
+    """
+    if not community_ids:
+        return []
+
+    display_ids = {}
+    idx = 0
+    for cid in community_ids:
+        idx = get_next_available_index(gexf_dir, reports_dir, start=idx + 1)
+        display_ids[cid] = idx
+
+    subgraphs = extract_subcommunity_graphs(G, partition, community_ids)
+    print(f"\n[Exportação] {len(subgraphs)} comunidades extraídas. Gravando artefatos em paralelo...")
+
+    jobs = [
+        (subgraphs[cid], display_ids[cid], cid,
+         # Nome padrão: comunidade_{id}_{core_user}.gexf
+         os.path.join(gexf_dir, f"comunidade_{display_ids[cid]}_{core_user}.gexf"), reports_dir, png_dir)
+        for cid in community_ids
+    ]
+
+    exported = []
+    n_jobs = n_jobs or min(len(jobs), max(1, mp.cpu_count() - 1))
+    with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+        futures = {pool.submit(_export_community_artifacts, *job): job[2] for job in jobs}
+        for future in futures:
+            try:
+                exported.append(future.result())
+            except Exception as e:
+                print(f"[Erro] Falha ao exportar a comunidade {futures[future]}: {e}")
+    return exported
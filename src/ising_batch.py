@@ -0,0 +1,311 @@
+"""
+Inferência de Ising em lote: vários pares (conjunto de keywords, comunidade) numa
+única execução, para estudos de parâmetros sem passar pelo menu a cada combinação.
+
+Cada job é um dicionário:
+    {"keywords": "…/keywords_filtradas_X.csv" | "matriz": "…/matriz_ising_X.csv",
+     "comunidade": "…/X.gexf", "metodos": ["MCH", "TAP"], "esparso": false, "lam": 0.01}
+
+- Cada matriz de spins é montada uma única vez no processo principal (os caches de
+  usuários/palavras da Opção 2 e as redes GEXF são lidos uma vez por comunidade) e
+  compartilhada entre os jobs que a usam (métodos, lam ou modo esparso diferentes).
+- Os jobs rodam num pool de processos com um orçamento fixo de núcleos por job
+  (repassado ao MCH, à Pseudo-Verossimilhança, às threads Numba e às do BLAS), do
+  maior N para o menor, para manter a máquina ocupada até o fim.
+- Cada job tem o seu próprio diretório de checkpoints do MCH: jobs simultâneos sobre a
+  mesma matriz (p. ex. só os métodos extras diferem) não apagam os checkpoints um do outro.
+- Todos os multiplicadores (um .npz por job, uma entrada por método) e as tabelas
+  comparativas vão para um diretório de saída com um índice único, indice_lote.csv
+  (uma linha por job x método), regravado a cada job concluído.
+"""
+
+import os
+import sys
+import json
+import shutil
+import argparse
+import itertools
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .analysis import create_ising_matrix_from_sets
+    from .ising_stats import caminho_estatisticas
+    from .ising_coniii import (inferir_todos, arestas_da_rede, METODOS_INFERENCIA, CACHE_RESULTADOS_DIR,
+                               CHECKPOINT_DIR)
+except ImportError:
+    # Execução direta como script (python src/ising_batch.py)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from src.analysis import create_ising_matrix_from_sets
+    from src.ising_stats import caminho_estatisticas
+    from src.ising_coniii import (inferir_todos, arestas_da_rede, METODOS_INFERENCIA, CACHE_RESULTADOS_DIR,
+                                  CHECKPOINT_DIR)
+
+SAIDA_LOTE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "plots", "ising_lote")
+
+def _nome_base(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+def normalizar_job(job):
+    """Completa um job com os valores padrão e valida fonte e métodos."""
+    if not job.get("comunidade"):
+        raise ValueError(f"Job sem 'comunidade' (GEXF): {job}")
+    if not job.get("keywords") and not job.get("matriz"):
+        raise ValueError(f"Job sem 'keywords' nem 'matriz': {job}")
+    metodos = tuple(job.get("metodos") or ("MCH",))
+    desconhecidos = [m for m in metodos if m not in METODOS_INFERENCIA]
+    if desconhecidos:
+        raise ValueError(f"Métodos desconhecidos: {desconhecidos} (disponíveis: {', '.join(METODOS_INFERENCIA)})")
+    return {
+        "keywords": job.get("keywords"),
+        "matriz": job.get("matriz"),
+        "comunidade": job["comunidade"],
+        "metodos": metodos,
+        "esparso": bool(job.get("esparso", False)),
+        "lam": float(job.get("lam", 0.01)),
+        "backend": job.get("backend"),
+    }
+
+def carregar_jobs(path):
+    """Lista de jobs de um arquivo JSON (lista de dicionários, ver docstring do módulo)."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [normalizar_job(job) for job in json.load(f)]
+
+def jobs_do_produto(keywords, comunidades, **opcoes):
+    """Um job para cada combinação (conjunto de keywords, comunidade)."""
+    return [normalizar_job({"keywords": kw, "comunidade": gexf, **opcoes})
+            for kw, gexf in itertools.product(keywords, comunidades)]
+
+def _fonte(job):
+    return ("matriz", job["matriz"]) if job["matriz"] else ("keywords", job["keywords"])
+
+def construir_matrizes(jobs):
+    """
+    {(fonte, comunidade): (S, node_names, stats_path)} com cada matriz de spins montada
+    uma única vez. Fontes "keywords" usam o cache de usuários/palavras gravado pela
+    Opção 2 ao lado do CSV de keywords; o lote não faz coleta pela API. 'stats_path' é o
+    .npz de estatísticas suficientes ao lado da matriz (ou do CSV de keywords).
+    """
+    usersets = {}
+    matrizes = {}
+    for job in jobs:
+        chave = (_fonte(job), job["comunidade"])
+        if chave in matrizes:
+            continue
+        tipo, path = chave[0]
+        comm_name = _nome_base(job["comunidade"])
+        if tipo == "matriz":
+            df = pd.read_csv(path, index_col=0)
+            stats_path = caminho_estatisticas(path)
+        else:
+            stats_path = caminho_estatisticas(os.path.join(os.path.dirname(path), f"matriz_ising_{comm_name}_{_nome_base(path)}.csv"))
+            cache_path = os.path.join(os.path.dirname(path), f".cache_usersets_{comm_name}.json")
+            if cache_path not in usersets:
+                if not os.path.exists(cache_path):
+                    print(f"  [Lote] Cache de usuários ausente ({cache_path}). Rode a Opção 2 para {comm_name} antes.")
+                    matrizes[chave] = None
+                    continue
+                with open(cache_path, "r", encoding="utf-8") as f:
+                    user_word_sets, all_community_users = json.load(f)
+                usersets[cache_path] = ({k: set(v) for k, v in user_word_sets.items()}, all_community_users)
+            user_word_sets, all_community_users = usersets[cache_path]
+            keywords_list = pd.read_csv(path)["word"].tolist()
+            df = create_ising_matrix_from_sets(user_word_sets, keywords_list, all_community_users)
+        if df.empty:
+            print(f"  [Lote] Matriz vazia para {path} x {comm_name}.")
+            matrizes[chave] = None
+            continue
+        # Usuários como spins (colunas) e keywords como amostras (linhas)
+        S = np.where(df.values.T > 0, 1, -1).astype(np.int64)
+        matrizes[chave] = (S, df.index.tolist(), stats_path)
+        print(f"  [Lote] Matriz {_nome_base(path)} x {comm_name}: R={S.shape[0]}, N={S.shape[1]}")
+    return matrizes
+
+@contextmanager
+def _saida_para_arquivo(path):
+    """Redireciona stdout/stderr (descritores 1 e 2, herdados pelos subprocessos do MCH) para 'path'."""
+    sys.stdout.flush()
+    sys.stderr.flush()
+    originais = (os.dup(1), os.dup(2))
+    with open(path, "a", encoding="utf-8") as log:
+        os.dup2(log.fileno(), 1)
+        os.dup2(log.fileno(), 2)
+        try:
+            yield
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.dup2(originais[0], 1)
+            os.dup2(originais[1], 2)
+            os.close(originais[0])
+            os.close(originais[1])
+
+_limites_blas = None
+
+def _init_worker(n_cpus):
+    """
+    Limita as threads Numba e BLAS/OpenMP do processo do job ao seu orçamento de
+    núcleos (X^T X das estatísticas, Cholesky do campo médio, produtos do Exato).
+    """
+    global _limites_blas
+    # Herdado pelos subprocessos do job e pelas bibliotecas ainda não carregadas
+    for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[var] = str(n_cpus)
+    try:
+        from threadpoolctl import threadpool_limits
+        # O numpy já carregado (fork) tem o BLAS inicializado: o limite precisa ser aplicado em tempo de execução
+        _limites_blas = threadpool_limits(limits=n_cpus)
+    except ImportError:
+        print("  [Aviso] threadpoolctl ausente: threads do BLAS não limitadas neste job.")
+    try:
+        import numba
+        numba.set_num_threads(max(1, min(n_cpus, numba.config.NUMBA_NUM_THREADS)))
+    except ImportError:
+        pass
+
+def _executar_job(job_id, job, S, node_names, arestas, saida_dir, cache_dir, checkpoint_raiz, n_cpus, stats_path=None):
+    """Roda inferir_todos para um job e devolve as linhas do índice (uma por método)."""
+    session_id = f"lote_{job_id}"
+    backend = job["backend"] or ("numba" if arestas is not None else "coniii")
+    ckpt_raiz = os.path.join(checkpoint_raiz, job_id) if checkpoint_raiz else None
+    with _saida_para_arquivo(os.path.join(saida_dir, f"{job_id}.log")):
+        resultados = inferir_todos(S, session_id, lam=job["lam"], backend=backend, arestas=arestas,
+                                   metodos=job["metodos"], node_names=node_names, cache_dir=cache_dir,
+                                   checkpoint_raiz=ckpt_raiz, sinks=[],
+                                   log_eventos=os.path.join(saida_dir, f"{job_id}_eventos.jsonl"), n_cpus=n_cpus,
+                                   stats_path=stats_path)
+
+    if ckpt_raiz and os.path.isdir(ckpt_raiz) and not os.listdir(ckpt_raiz):
+        os.rmdir(ckpt_raiz)  # o MCH remove os seus checkpoints ao concluir
+
+    # Artefatos gravados por inferir_todos no diretório corrente (nomes únicos por session_id)
+    comparativo = os.path.join(saida_dir, f"{job_id}_comparativo.csv")
+    shutil.move(f"comparacao_metodos_{session_id}.csv", comparativo)
+    for path in (f"multiplicadores_ising_{session_id}.npy", f"arestas_ising_{session_id}.npy"):
+        if os.path.exists(path):
+            os.remove(path)  # redundantes com o .npz do job, que guarda todos os métodos
+
+    arrays = {nome: dados["multipliers"] for nome, dados in resultados.items() if "multipliers" in dados}
+    arrays["nomes"] = np.asarray(node_names, dtype=str)
+    if arestas is not None:
+        arrays["arestas"] = arestas
+    npz_path = os.path.join(saida_dir, f"{job_id}_multiplicadores.npz")
+    np.savez(npz_path, **arrays)
+
+    linhas = pd.read_csv(comparativo).to_dict("records")
+    for linha in linhas:
+        linha["erro"] = resultados[linha["metodo"]].get("ERROR")
+        linha["multiplicadores"] = os.path.basename(npz_path) if linha["metodo"] in arrays else None
+    return linhas
+
+def _gravar_indice(linhas, saida_dir):
+    colunas = ["job", "keywords", "matriz", "comunidade", "esparso", "lam", "metodo", "rmse_medias", "tempo_s",
+               "N", "R", "limiar_schneidman", "viavel", "multiplicadores", "erro"]
+    indice = pd.DataFrame(linhas).reindex(columns=colunas).sort_values(["job", "metodo"])
+    indice.to_csv(os.path.join(saida_dir, "indice_lote.csv"), index=False)
+    return indice
+
+def executar_lote(jobs, saida_dir=None, cores_por_job=None, n_paralelos=None,
+                  cache_dir=CACHE_RESULTADOS_DIR, checkpoint_raiz=CHECKPOINT_DIR):
+    """
+    Executa os jobs em paralelo e devolve o índice (DataFrame, uma linha por job x método).
+
+    'cores_por_job' é o orçamento de núcleos de cada job (padrão: os núcleos divididos
+    igualmente entre os jobs); 'n_paralelos' (padrão: núcleos // cores_por_job) limita
+    quantos jobs rodam ao mesmo tempo. Jobs que falham entram no índice com 'erro'.
+    """
+    jobs = [normalizar_job(job) for job in jobs]
+    if not jobs:
+        raise ValueError("Nenhum job informado.")
+    saida_dir = saida_dir or os.path.join(SAIDA_LOTE_DIR, datetime.now().strftime("%Y%m%d_%H%M%S"))
+    os.makedirs(saida_dir, exist_ok=True)
+
+    total_cpus = max(1, mp.cpu_count() - 1)
+    cores_por_job = cores_por_job or max(1, total_cpus // min(len(jobs), total_cpus))
+    n_paralelos = n_paralelos or max(1, min(len(jobs), total_cpus // cores_por_job))
+    print(f"\n[Lote] {len(jobs)} job(s) | {n_paralelos} simultâneo(s) x {cores_por_job} núcleo(s) | saída: {saida_dir}")
+
+    matrizes = construir_matrizes(jobs)
+    arestas_cache = {}
+    linhas = []
+    pendentes = []
+    for idx, job in enumerate(jobs):
+        fonte_tipo, fonte = _fonte(job)
+        job_id = f"{idx:03d}_{_nome_base(job['comunidade'])}_{_nome_base(fonte)}"
+        descricao = {"job": job_id, "keywords": job["keywords"], "matriz": job["matriz"],
+                     "comunidade": job["comunidade"], "esparso": job["esparso"], "lam": job["lam"]}
+        matriz = matrizes[((fonte_tipo, fonte), job["comunidade"])]
+        if matriz is None:
+            linhas.append({**descricao, "erro": "matriz de spins indisponível"})
+            continue
+        S, node_names, stats_path = matriz
+        arestas = None
+        if job["esparso"]:
+            chave = (job["comunidade"], tuple(node_names))
+            if chave not in arestas_cache:
+                arestas_cache[chave] = arestas_da_rede(job["comunidade"], node_names)
+            arestas = arestas_cache[chave]
+        pendentes.append((job_id, job, S, node_names, arestas, stats_path, descricao))
+
+    # Maiores primeiro: os jobs longos não ficam para o fim com núcleos ociosos
+    pendentes.sort(key=lambda p: p[2].shape[1] * p[2].shape[0], reverse=True)
+    with open(os.path.join(saida_dir, "jobs.json"), "w", encoding="utf-8") as f:
+        json.dump([{**p[1], "job": p[0], "metodos": list(p[1]["metodos"])} for p in pendentes], f,
+                  ensure_ascii=False, indent=2)
+
+    with ProcessPoolExecutor(max_workers=n_paralelos, initializer=_init_worker, initargs=(cores_por_job,)) as pool:
+        futures = {
+            pool.submit(_executar_job, job_id, job, S, node_names, arestas, saida_dir, cache_dir,
+                        checkpoint_raiz, cores_por_job, stats_path): descricao
+            for job_id, job, S, node_names, arestas, stats_path, descricao in pendentes
+        }
+        for concluidos, future in enumerate(as_completed(futures), start=1):
+            descricao = futures[future]
+            try:
+                novas = [{**descricao, **linha} for linha in future.result()]
+                melhores = [l for l in novas if not l.get("erro")]
+                resumo = min(melhores, key=lambda l: l["rmse_medias"]) if melhores else None
+                status = f"menor RMSE {resumo['rmse_medias']:.5f} ({resumo['metodo']})" if resumo else "sem resultados"
+            except Exception as e:
+                novas = [{**descricao, "erro": str(e)}]
+                status = f"falhou: {e}"
+            linhas.extend(novas)
+            _gravar_indice(linhas, saida_dir)
+            print(f"  [Lote {concluidos}/{len(futures)}] {descricao['job']}: {status}")
+
+    indice = _gravar_indice(linhas, saida_dir)
+    print(f"\n[Lote] Índice de resultados salvo em: {os.path.join(saida_dir, 'indice_lote.csv')}")
+    return indice
+
+# ─────────────────────────────────────────────────────────────────────────────
+# CLI ENTRY POINT
+# ─────────────────────────────────────────────────────────────────────────────
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inferência de Ising em lote (vários conjuntos de keywords x comunidades)")
+    parser.add_argument("--jobs", type=str, default=None, help="Arquivo JSON com a lista de jobs")
+    parser.add_argument("--keywords", nargs="+", default=[], help="CSVs keywords_filtradas_* (produto com --comunidades)")
+    parser.add_argument("--comunidades", nargs="+", default=[], help="Arquivos GEXF das comunidades")
+    parser.add_argument("--metodos", nargs="+", choices=list(METODOS_INFERENCIA), default=["MCH"],
+                        help="Métodos de inferência de cada job (padrão MCH)")
+    parser.add_argument("--lam", type=float, default=0.01, help="Parâmetro de regularização (padrão 0.01)")
+    parser.add_argument("--esparso", action="store_true", help="Ajusta acoplamentos apenas nas arestas da rede")
+    parser.add_argument("--cores-por-job", type=int, default=None, help="Núcleos por job (padrão: divisão igual)")
+    parser.add_argument("--paralelos", type=int, default=None, help="Máximo de jobs simultâneos")
+    parser.add_argument("--saida", type=str, default=None, help="Diretório de saída (padrão data/plots/ising_lote/<sessão>)")
+    parser.add_argument("--sem-cache", action="store_true", help="Ignora o cache de resultados de inferência")
+    args = parser.parse_args()
+
+    if args.jobs:
+        lista_jobs = carregar_jobs(args.jobs)
+    else:
+        lista_jobs = jobs_do_produto(args.keywords, args.comunidades, metodos=args.metodos, lam=args.lam,
+                                     esparso=args.esparso)
+    if not lista_jobs:
+        parser.error("Informe --jobs ou --keywords e --comunidades.")
+    executar_lote(lista_jobs, saida_dir=args.saida, cores_por_job=args.cores_por_job, n_paralelos=args.paralelos,
+                  cache_dir=None if args.sem_cache else CACHE_RESULTADOS_DIR)
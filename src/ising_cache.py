@@ -0,0 +1,148 @@
+"""
+Cache endereçado por conteúdo dos resultados de inferência de Ising.
+
+A chave é o sha256 de: versão do código de inferência, solver, hiperparâmetros,
+matriz de spins (forma + sinais), nomes dos spins e arestas do modo esparso. Uma
+execução repetida devolve os multiplicadores gravados sem recalcular nada.
+
+Para execuções quase repetidas (mesma comunidade, conjunto de keywords um pouco
+diferente) o cache fornece a solução gravada mais próxima — mesmo solver, maior
+sobreposição de spins e médias empíricas mais parecidas — projetada nos spins
+atuais, para servir de chute inicial (warm start).
+"""
+
+import os
+import json
+import hashlib
+
+import numpy as np
+import scipy.sparse as sp
+
+from .ising_stats import indices_triu
+
+# Incrementar quando uma mudança nos solvers invalidar os resultados gravados
+VERSAO_INFERENCIA = 1
+
+# Fração mínima dos spins atuais presente na solução gravada para servir de warm start
+SOBREPOSICAO_MINIMA = 0.5
+
+def _matriz_J(multiplicadores, N, arestas=None):
+    """J da solução gravada: denso (layout i < j do ConIII) ou CSR (modo esparso)."""
+    j = multiplicadores[N:]
+    if arestas is None:
+        J = np.zeros((N, N))
+        iu, ju = indices_triu(N)
+        J[iu, ju] = j
+        J[ju, iu] = j
+        return J
+    i, k = arestas[:, 0], arestas[:, 1]
+    return sp.csr_matrix((np.concatenate((j, j)), (np.concatenate((i, k)), np.concatenate((k, i)))), shape=(N, N))
+
+def projetar_multiplicadores(multiplicadores, nomes_origem, nomes, arestas_origem=None, arestas=None):
+    """
+    Reescreve uma solução ajustada para 'nomes_origem' no layout dos spins 'nomes'
+    (denso ou, com 'arestas', [h, J_e]). Spins e pares ausentes na origem ficam em zero.
+    """
+    N_origem, N = len(nomes_origem), len(nomes)
+    indice = {nome: i for i, nome in enumerate(nomes_origem)}
+    pos = np.fromiter((indice.get(nome, -1) for nome in nomes), dtype=np.int64, count=N)
+    ok = pos >= 0
+
+    h = np.zeros(N)
+    h[ok] = multiplicadores[:N_origem][pos[ok]]
+    J_origem = _matriz_J(multiplicadores, N_origem, arestas_origem)
+
+    if arestas is None:
+        idx = np.flatnonzero(ok)
+        sub = J_origem[pos[idx]][:, pos[idx]]
+        J = np.zeros((N, N))
+        J[np.ix_(idx, idx)] = sub.toarray() if sp.issparse(sub) else sub
+        return np.concatenate((h, J[indices_triu(N)]))
+
+    u, v = arestas[:, 0], arestas[:, 1]
+    sel = ok[u] & ok[v]
+    J_e = np.zeros(len(arestas))
+    J_e[sel] = np.asarray(J_origem[pos[u[sel]], pos[v[sel]]]).ravel()
+    return np.concatenate((h, J_e))
+
+class CacheInferencia:
+    """
+    Resultados de inferência em disco: um .npz por chave com multiplicadores, médias
+    empíricas, nomes dos spins, arestas e os metadados (solver, método, N, versão).
+    Não há índice compartilhado: as entradas são descobertas pelos arquivos *.npz,
+    gravados atomicamente, então vários processos (jobs em lote) podem usar o mesmo
+    diretório sem perder entradas uns dos outros.
+    """
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def chave(spin_matrix, solver, hiperparametros, nomes=None, arestas=None):
+        sinais = np.ascontiguousarray(spin_matrix > 0)
+        h = hashlib.sha256()
+        h.update(f"v{VERSAO_INFERENCIA}|{solver}|".encode())
+        h.update(json.dumps(hiperparametros, sort_keys=True, default=str).encode())
+        h.update(str(sinais.shape).encode())
+        h.update(np.packbits(sinais).tobytes())
+        if nomes is not None:
+            h.update("\x00".join(map(str, nomes)).encode("utf-8"))
+        if arestas is not None:
+            h.update(np.ascontiguousarray(arestas, dtype=np.int64).tobytes())
+        return h.hexdigest()
+
+    def _path(self, chave):
+        return os.path.join(self.cache_dir, f"{chave}.npz")
+
+    def get(self, chave):
+        """(multiplicadores, metodo) gravados para a chave, ou None."""
+        if not os.path.exists(self._path(chave)):
+            return None
+        with np.load(self._path(chave)) as dados:
+            if "versao" not in dados.files or int(dados["versao"]) != VERSAO_INFERENCIA:
+                return None
+            return dados["multiplicadores"], str(dados["metodo"])
+
+    def put(self, chave, solver, multiplicadores, metodo, medias, nomes, arestas=None):
+        arrays = {"multiplicadores": multiplicadores, "medias": medias, "nomes": np.asarray(nomes, dtype=str),
+                  "solver": solver, "metodo": metodo, "N": len(nomes), "versao": VERSAO_INFERENCIA}
+        if arestas is not None:
+            arrays["arestas"] = arestas
+        # Escrita atômica: leitores concorrentes nunca veem um .npz pela metade
+        tmp = f"{self._path(chave)}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, self._path(chave))
+
+    def nearest(self, solver, medias, nomes, arestas=None):
+        """
+        Solução gravada mais próxima para o mesmo solver, projetada nos spins atuais.
+        Retorna (multiplicadores, sobreposição) ou None se nenhuma tiver spins suficientes em comum.
+        """
+        nomes = [str(n) for n in nomes]
+        if not nomes:
+            return None
+        melhor, melhor_score = None, None
+        for arquivo in sorted(os.listdir(self.cache_dir)):
+            if not arquivo.endswith(".npz"):
+                continue
+            with np.load(os.path.join(self.cache_dir, arquivo)) as dados:
+                if "versao" not in dados.files or int(dados["versao"]) != VERSAO_INFERENCIA or str(dados["solver"]) != solver:
+                    continue
+                nomes_c = dados["nomes"].tolist()
+                pos = {n: i for i, n in enumerate(nomes_c)}
+                comuns = [i for i, n in enumerate(nomes) if n in pos]
+                sobreposicao = len(comuns) / len(nomes)
+                if sobreposicao < SOBREPOSICAO_MINIMA:
+                    continue
+                medias_c = dados["medias"][[pos[nomes[i]] for i in comuns]]
+                distancia = float(np.sqrt(np.mean((medias[comuns] - medias_c) ** 2)))
+                score = (-sobreposicao, distancia)
+                if melhor_score is None or score < melhor_score:
+                    melhor_score = score
+                    melhor = (dados["multiplicadores"], nomes_c,
+                              dados["arestas"] if "arestas" in dados.files else None)
+        if melhor is None:
+            return None
+        multiplicadores, nomes_c, arestas_c = melhor
+        return projetar_multiplicadores(multiplicadores, nomes_c, nomes, arestas_c, arestas), -melhor_score[0]
@@ -6,22 +6,48 @@ usando exclusivamente o método Monte Carlo Histogram (MCH) via pacote coniii.
 
 Inclui também a avaliação qualitativa do ajuste segundo Schneidman et al. (2006)
 (RMSE das médias < 3/sqrt(R)), visualizações em heatmaps com máscaras topológicas
-via networkx e geração de amostras via Metropolis para validação.
+via snapshot binário da rede e geração de amostras via Metropolis para validação.
 """
 
 import os
 import sys
 import time
+import queue
+import shutil
 import argparse
 import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
 from datetime import datetime
 
 import numpy as np
 import pandas as pd
-import networkx as nx
+import scipy.sparse as sp
 import matplotlib
 import matplotlib.pyplot as plt
 
+try:
+    from .snapshot import load_graph, adjacency_mask, edges_between
+    from .ising_sampler import MCHNumba
+    from .ising_stats import obter_estatisticas, rmse_medias, observaveis_arestas, indices_triu, caminho_estatisticas
+    from .ising_pseudo import pseudo_verossimilhanca, empacotar_multiplicadores
+    from .ising_meanfield import inferir_aproximacao, APROXIMACOES
+    from .ising_exato import ajustar_exato, N_MAX_EXATO, LAM_EXATO
+    from .ising_cache import CacheInferencia
+    from .ising_eventos import Emissor, SinkConsole, SinkJSONL, SinkHistorico
+    from .ising_validacao import validar_multiplicadores, formatar_relatorio
+except ImportError:
+    # Execução direta como script (python src/ising_coniii.py)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from src.snapshot import load_graph, adjacency_mask, edges_between
+    from src.ising_sampler import MCHNumba
+    from src.ising_stats import obter_estatisticas, rmse_medias, observaveis_arestas, indices_triu, caminho_estatisticas
+    from src.ising_pseudo import pseudo_verossimilhanca, empacotar_multiplicadores
+    from src.ising_meanfield import inferir_aproximacao, APROXIMACOES
+    from src.ising_exato import ajustar_exato, N_MAX_EXATO, LAM_EXATO
+    from src.ising_cache import CacheInferencia
+    from src.ising_eventos import Emissor, SinkConsole, SinkJSONL, SinkHistorico
+    from src.ising_validacao import validar_multiplicadores, formatar_relatorio
+
 try:
     import coniii
     from coniii.utils import define_ising_helper_functions
@@ -45,14 +71,18 @@ try:
                 calc_e, calc_observables, mch_approx = old_define()
                 
                 # Envolve as 3 funções perigosas com upcast de 64 bits imediatamente antes do return
+                # (sem cópia quando o array já é int64)
+                def as_int64(states):
+                    return states if states.dtype == np.int64 else states.astype(np.int64)
+
                 def wrapped_calc_e(states, params):
-                    return calc_e(states.astype(np.int64), params)
+                    return calc_e(as_int64(states), params)
                     
                 def wrapped_calc_observables(states):
-                    return calc_observables(states.astype(np.int64))
+                    return calc_observables(as_int64(states))
                     
                 def wrapped_mch_approx(samples, dlamda):
-                    return mch_approx(samples.astype(np.int64), dlamda)
+                    return mch_approx(as_int64(samples), dlamda)
                     
                 return wrapped_calc_e, wrapped_calc_observables, wrapped_mch_approx
             
@@ -92,26 +122,76 @@ def unpack_J(j_flat: np.ndarray, N: int) -> np.ndarray:
     """
     Reconstrói a matriz J simétrica (N x N) com diagonal zero a partir
     do vetor unidimensional j_flat gerado pelos solvers do ConIII.
-    A iteração respeita a ordem lexicográfica (i < j).
+    A ordem lexicográfica (i < j) vem dos índices do triângulo superior, em cache por N.
     """
+    iu, ju = indices_triu(N)
     J_mat = np.zeros((N, N))
-    idx = 0
-    for i in range(N):
-        for j in range(i + 1, N):
-            J_mat[i, j] = j_flat[idx]
-            J_mat[j, i] = j_flat[idx]
-            idx += 1
+    J_mat[iu, ju] = j_flat
+    J_mat[ju, iu] = j_flat
     return J_mat
 
+class JEmpacotado:
+    """
+    J simétrico guardado apenas pelo triângulo superior (i < j), no mesmo layout
+    dos multiplicadores — normalmente uma visão de multipliers[N:], sem cópia.
+    A matriz densa N x N só é montada sob demanda (toarray / densificar_J).
+    """
+    __slots__ = ("valores", "N")
+
+    def __init__(self, valores: np.ndarray, N: int):
+        self.valores = valores
+        self.N = N
+
+    @property
+    def shape(self):
+        return (self.N, self.N)
+
+    def toarray(self) -> np.ndarray:
+        return unpack_J(self.valores, self.N)
+
+def densificar_J(J) -> np.ndarray:
+    """Visão densa (N x N) de J guardado como JEmpacotado, matriz esparsa ou ndarray."""
+    if isinstance(J, JEmpacotado) or sp.issparse(J):
+        return J.toarray()
+    return np.asarray(J)
+
+def J_do_resultado(multipliers: np.ndarray, N: int, arestas: np.ndarray = None):
+    """J de um resultado: empacotado (denso) ou CSR (modo esparso), a partir dos multiplicadores."""
+    if arestas is None:
+        return JEmpacotado(multipliers[N:], N)
+    return unpack_J_esparso(multipliers[N:], arestas, N)
+
+def unpack_J_esparso(j_arestas: np.ndarray, arestas: np.ndarray, N: int):
+    """
+    Matriz J simétrica esparsa (CSR, N x N) do modo restrito às arestas, a partir
+    dos acoplamentos J_e na ordem de 'arestas'.
+    """
+    i, j = arestas[:, 0], arestas[:, 1]
+    return sp.csr_matrix(
+        (np.concatenate((j_arestas, j_arestas)), (np.concatenate((i, j)), np.concatenate((j, i)))), shape=(N, N)
+    )
+
+def arestas_da_rede(gexf_path: str, node_names: list):
+    """
+    Arestas da rede (snapshot/GEXF) entre os spins 'node_names', indexadas pela
+    posição de cada nó na matriz de spins. Retorna None se a rede não for encontrada.
+    """
+    G = load_graph(gexf_path)
+    if G is None:
+        print(f"  [Aviso] Rede {gexf_path} não encontrada. Modo esparso desabilitado.")
+        return None
+    arestas, n_encontrados = edges_between(G, node_names)
+    print(f"  [Esparso] {n_encontrados}/{len(node_names)} spins localizados na rede | {len(arestas)} arestas.")
+    return arestas
+
 def calcular_rmse_medias(spin_matrix: np.ndarray, h_inferido: np.ndarray) -> float:
     """
     Avalia a qualidade do ajuste comparando as médias empíricas
     com as médias previstas isoladamente pelos campos locais: tanh(h).
     Retorna o RMSE segundo critério de Schneidman et al. (2006).
+    As médias empíricas vêm do cache de estatísticas suficientes (src/ising_stats.py).
     """
-    m_empirico = spin_matrix.mean(axis=0)
-    m_previsto = np.tanh(h_inferido)
-    return float(np.sqrt(np.mean((m_empirico - m_previsto)**2)))
+    return rmse_medias(obter_estatisticas(spin_matrix)["medias"], h_inferido)
 
 def exibir_avaliacao_schneidman(rmse: float, R: int, metodo: str):
     """
@@ -131,133 +211,363 @@ def exibir_avaliacao_schneidman(rmse: float, R: int, metodo: str):
 # 2. SEÇÃO 10 — INFERÊNCIA DE PARÂMETROS COM TRÊS MÉTODOS
 # ─────────────────────────────────────────────────────────────────────────────
 
-def inferir_mch(spin_matrix: np.ndarray, session_id: str, lam: float = 0.01) -> dict:
+# Grade de busca (Teste dos conservadores aos longos)
+GRADE_META_TUNING = [
+    {"maxiter": 800,  "eta_init": 0.05, "decay_div": 200.0, "burn_in": 1000},
+    {"maxiter": 1500, "eta_init": 0.1,  "decay_div": 350.0, "burn_in": 1500},
+    {"maxiter": 2500, "eta_init": 0.02, "decay_div": 800.0, "burn_in": 2000},
+    {"maxiter": 4000, "eta_init": 0.05, "decay_div": 1500.0,"burn_in": 2000}
+]
+
+# Iterações entre relatórios de progresso de cada configuração
+INTERVALO_PROGRESSO = 10
+# Poda: configuração com RMSE acima de FATOR_PODA x (melhor RMSE observado) após ITER_MIN_PODA iterações
+FATOR_PODA = 5.0
+ITER_MIN_PODA = 100
+
+# Iterações entre checkpoints em disco de cada configuração
+INTERVALO_CHECKPOINT = 50
+
+# Checkpoints de MCH em andamento (data/cache/ising_checkpoints/<chave da execução>)
+CHECKPOINT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "cache", "ising_checkpoints")
+
+class ConfiguracaoCancelada(Exception):
+    """Levantada dentro do solver para interromper uma configuração da grade."""
+
+def _checkpoint_path(checkpoint_dir, idx):
+    return os.path.join(checkpoint_dir, f"config_{idx:02d}.npz")
+
+def _salvar_checkpoint(path, multipliers, iteracao, historico, status="em_andamento"):
+    """
+    Grava o estado de uma configuração: multiplicadores, posição no cronograma de
+    aprendizado (iteração acumulada) e trajetória do RMSE. Escrita atômica (arquivo
+    temporário + os.replace) para que uma interrupção nunca deixe um checkpoint truncado.
+    """
+    tmp = path + ".tmp.npz"
+    np.savez(tmp, multipliers=np.asarray(multipliers, dtype=np.float64), iteracao=iteracao,
+             historico=np.asarray(historico, dtype=np.float64).reshape(-1, 2), status=status)
+    os.replace(tmp, path)
+
+def carregar_checkpoints(checkpoint_dir):
+    """{idx: {multipliers, iteracao, historico, status}} dos checkpoints de uma execução MCH."""
+    checkpoints = {}
+    if not checkpoint_dir or not os.path.isdir(checkpoint_dir):
+        return checkpoints
+    for f in sorted(os.listdir(checkpoint_dir)):
+        if f.startswith("config_") and f.endswith(".npz") and ".tmp" not in f:
+            with np.load(os.path.join(checkpoint_dir, f)) as dados:
+                checkpoints[int(f[7:-4])] = {
+                    "multipliers": dados["multipliers"], "iteracao": int(dados["iteracao"]),
+                    "historico": dados["historico"].tolist(), "status": str(dados["status"]),
+                }
+    return checkpoints
+
+def _executar_config_mch(idx, cfg, observaveis, N, chute_informado, n_cpus, fila, parar, podados,
+                         backend="coniii", arestas=None, checkpoint_dir=None, retomada=None):
+    """
+    Executa uma configuração da grade em um processo trabalhador, com o solver MCH do
+    ConIII (backend="coniii") ou com o amostrador Numba multi-cadeia (backend="numba").
+
+    O trabalhador recebe apenas os observáveis empíricos já calculados (médias e
+    correlações): o solver é criado só com o tamanho do sistema e ajusta esses alvos.
+
+    O custom_convergence_f do ConIII é chamado a cada iteração MCH e serve de gancho:
+    publica um evento "iteracao" (ver src/ising_eventos.py) na fila do orquestrador e
+    levanta ConfiguracaoCancelada quando o orquestrador sinaliza parada ou poda. O
+    tempo de amostragem vem de um invólucro cronometrado em volta do gerador de
+    amostras do solver (model.generate_sample no ConIII, _generate no Numba).
+
+    Com 'checkpoint_dir', o mesmo gancho grava um checkpoint a cada INTERVALO_CHECKPOINT
+    iterações. 'retomada' (checkpoint anterior) reinicia o solver a partir dos
+    multiplicadores gravados, com o cronograma deslocado pela iteração já alcançada.
+    """
+    medias = observaveis[:N]
+    path = _checkpoint_path(checkpoint_dir, idx) if checkpoint_dir else None
+    deslocamento, historico = 0, []
+    if retomada is not None:
+        chute_informado = retomada["multipliers"]
+        deslocamento, historico = retomada["iteracao"], list(retomada["historico"])
+    try:
+        if backend == "numba":
+            solver = MCHNumba(N, sample_size=1000, n_cpus=n_cpus, arestas=arestas)
+            dono_gerador, nome_gerador = solver, "_generate"
+        else:
+            calc_e, calc_observables, mch_approximation = define_ising_helper_functions()
+            solver = coniii.solvers.MCH(
+                N,
+                calc_observables=calc_observables,
+                mch_approximation=mch_approximation,
+                sample_size=1000,
+                n_cpus=n_cpus,
+                iprint=False
+            )
+            dono_gerador, nome_gerador = solver.model, "generate_sample"
+
+        # Cronometra a amostragem MC sem alterar o solver (atributo da instância sobrepõe o método)
+        gerador = getattr(dono_gerador, nome_gerador)
+        medicao = {"amostragem_s": 0.0, "estimativa": None}
+        def gerar_cronometrado(*args, **kwargs):
+            t = time.perf_counter()
+            retorno = gerador(*args, **kwargs)
+            medicao["amostragem_s"] += time.perf_counter() - t
+            medicao["estimativa"] = retorno
+            return retorno
+        setattr(dono_gerador, nome_gerador, gerar_cronometrado)
+
+        def observaveis_modelo():
+            if backend == "numba":
+                return medicao["estimativa"]
+            return calc_observables(solver.model.sample).mean(0)
+
+        def passo(it):
+            return np.exp(-it/cfg['decay_div']) * cfg['eta_init']
+
+        inicio = time.perf_counter()
+        amostragem_anterior = [0.0]
+
+        def learn_settings(i):
+            if parar.is_set() or podados.get(idx):
+                raise ConfiguracaoCancelada()
+            it = i + deslocamento
+            if i == 0:
+                # Amostra inicial fica fora do tempo da primeira iteração
+                amostragem_anterior[0] = medicao["amostragem_s"]
+            else:
+                rmse = rmse_medias(medias, solver._multipliers[:N])
+                rmse_corr = None
+                if i % INTERVALO_PROGRESSO == 0:
+                    historico.append((it, rmse))
+                    estimativa = observaveis_modelo()
+                    rmse_corr = float(np.sqrt(np.mean((estimativa[N:] - observaveis[N:]) ** 2)))
+                fila.put({
+                    "tipo": "iteracao", "metodo": "MCH", "config": idx, "iteracao": it, "maxiter": cfg['maxiter'],
+                    "tempo_s": time.perf_counter() - inicio,
+                    "tempo_amostragem_s": medicao["amostragem_s"] - amostragem_anterior[0],
+                    "passo": float(passo(it - 1)), "rmse_medias": rmse, "rmse_correlacoes": rmse_corr,
+                })
+                amostragem_anterior[0] = medicao["amostragem_s"]
+            if path and i > 0 and i % INTERVALO_CHECKPOINT == 0:
+                _salvar_checkpoint(path, solver._multipliers, it, historico)
+            return {
+                'maxdlamda': passo(it),
+                'eta': passo(it)
+            }
+
+        restantes = cfg['maxiter'] - deslocamento
+        if restantes <= 0:
+            multipliers = np.asarray(chute_informado, dtype=np.float64)
+            return {"idx": idx, "status": "ok", "multipliers": multipliers,
+                    "rmse": rmse_medias(medias, multipliers[:N])}
+        kwargs_solver = {
+            "constraints": observaveis,
+            "maxiter": restantes,
+            "custom_convergence_f": learn_settings,
+            "burn_in": cfg['burn_in'],
+            "tol": 1e-5,
+            "iprint": False
+        }
+        if chute_informado is not None:
+            kwargs_solver["initial_guess"] = chute_informado
+
+        multipliers = solver.solve(**kwargs_solver)
+    except ConfiguracaoCancelada:
+        if path and podados.get(idx):
+            # Podada: registrada para que uma retomada não a execute de novo
+            ultima = int(historico[-1][0]) if historico else deslocamento
+            _salvar_checkpoint(path, solver._multipliers, ultima, historico, status="podada")
+        return {"idx": idx, "status": "cancelada"}
+    except Exception as e:
+        return {"idx": idx, "status": "erro", "erro": str(e)}
+
+    if path:
+        _salvar_checkpoint(path, multipliers, cfg['maxiter'], historico, status="concluida")
+    return {"idx": idx, "status": "ok", "multipliers": multipliers,
+            "rmse": rmse_medias(medias, multipliers[:N]), "tempo_amostragem_s": medicao["amostragem_s"]}
+
+def inferir_mch(spin_matrix: np.ndarray, session_id: str, lam: float = 0.01, grade: list = None,
+                n_workers: int = None, backend: str = "coniii", arestas: np.ndarray = None,
+                chute_inicial: np.ndarray = None, checkpoint_dir: str = None, retomar: bool = False,
+                sinks: list = None, n_cpus: int = None) -> dict:
     """
     Método: Meta-Learning MCH (Auto-Tuning de Hiperparâmetros)
+
+    As configurações da grade rodam concorrentemente em um pool de processos, cada
+    uma com uma fatia dos núcleos disponíveis. O orquestrador acompanha o RMSE de
+    cada configuração, cancela as restantes assim que uma atinge o limiar de
+    Schneidman e poda as que divergem claramente (RMSE não finito ou muito acima
+    do melhor observado).
+
+    backend="numba" troca o amostrador do ConIII pelo de src/ising_sampler.py
+    (cadeias paralelas sobre spins int8).
+
+    Com 'arestas' (int [E, 2], i < j, índices das colunas de spin_matrix), apenas os
+    acoplamentos dessas arestas são ajustados (modo esparso, sempre no backend numba):
+    multiplicadores [h, J_e] e J devolvido como matriz esparsa simétrica.
+
+    'chute_inicial' (p. ex. a solução vizinha do cache de resultados) substitui o
+    warm start por Pseudo-Verossimilhança.
+
+    Com 'checkpoint_dir', cada configuração grava periodicamente multiplicadores,
+    posição no cronograma e trajetória do RMSE. Com retomar=True, configurações
+    concluídas ou podadas são reaproveitadas e as interrompidas continuam do último
+    checkpoint; sem retomar, checkpoints antigos do diretório são descartados.
+    O diretório é removido ao final de uma execução bem-sucedida.
+
+    Os eventos por iteração vão para 'sinks' (padrão: SinkConsole) e para um
+    SinkHistorico cujo conteúdo é devolvido em resultado["eventos"].
+
+    'n_cpus' limita o total de núcleos usados (padrão: todos menos um).
     """
+    if backend not in ("coniii", "numba"):
+        raise ValueError(f"Backend MCH desconhecido: {backend}")
+    if arestas is not None and backend != "numba":
+        print("  [Esparso] Modo restrito às arestas disponível apenas no backend numba. Alternando backend...")
+        backend = "numba"
     R, N = spin_matrix.shape
     spin_matrix = spin_matrix.astype(np.int64)
-    calc_e, calc_observables, mch_approximation = define_ising_helper_functions()
+    grade = grade or GRADE_META_TUNING
+    # Médias e correlações empíricas calculadas uma única vez e compartilhadas com os trabalhadores
+    if arestas is None:
+        observaveis = obter_estatisticas(spin_matrix)["observaveis"]
+    else:
+        arestas = np.asarray(arestas, dtype=np.int64).reshape(-1, 2)
+        observaveis = observaveis_arestas(spin_matrix, arestas)
+        print(f"  [Esparso] {len(arestas)} acoplamentos nas arestas (denso seria {N * (N - 1) // 2}).")
     
     limiar_schneidman = 3.0 / np.sqrt(R)
     
-    # Grade de busca (Teste dos conservadores aos longos)
-    grade = [
-        {"maxiter": 800,  "eta_init": 0.05, "decay_div": 200.0, "burn_in": 1000},
-        {"maxiter": 1500, "eta_init": 0.1,  "decay_div": 350.0, "burn_in": 1500},
-        {"maxiter": 2500, "eta_init": 0.02, "decay_div": 800.0, "burn_in": 2000},
-        {"maxiter": 4000, "eta_init": 0.05, "decay_div": 1500.0,"burn_in": 2000}
-    ]
-    
     melhor_rmse = float('inf')
     melhor_dict = None
-    
-    import sys
-    class MCHProgressFilter:
-        def __init__(self, maxiter, prefix):
-            self.maxiter = maxiter
-            self.iter_count = 0
-            self.original_stdout = sys.stdout
-            self.prefix = prefix
-            
-        def write(self, text):
-            if "Iterating parameters with MCH" in text:
-                self.iter_count += 1
-                porcentagem = (self.iter_count / self.maxiter) * 100
-                self.original_stdout.write(f"\r{self.prefix} Progresso: {porcentagem:.1f}% ({self.iter_count}/{self.maxiter}) | Amostrando...")
-                self.original_stdout.flush()
-            elif "Sampling" in text or text.strip() == "": pass
-            else:
-                if text != "\n": self.original_stdout.write(text)
-                
-        def flush(self): 
-            self.original_stdout.flush()
             
     print(f"\n  [Meta-Tuning] Iniciando busca automatizada da melhor topografia (Alvo RMSE <= {limiar_schneidman:.5f}) para N={N}...")
+
+    checkpoints = {}
+    if checkpoint_dir:
+        if retomar:
+            checkpoints = carregar_checkpoints(checkpoint_dir)
+            if checkpoints:
+                print(f"  [Checkpoint] Retomando execução interrompida: {len(checkpoints)} configuração(ões) com checkpoint.")
+        elif os.path.isdir(checkpoint_dir):
+            shutil.rmtree(checkpoint_dir)
+        os.makedirs(checkpoint_dir, exist_ok=True)
     
     # --- Transfer Learning / "Warm Start" ---
-    print("  [Warm-Start] Pré-mapeando o Vale de Erro com algoritmo Pseudo-Verossimilhança...")
-    import io
-    old_stdout_ps = sys.stdout
-    sys.stdout = io.StringIO() # Silencia os logs sujos do Pseudo
-    try:
-        solver_pseudo = coniii.solvers.Pseudo(spin_matrix)
-        chute_informado = solver_pseudo.solve()
-    except Exception as e:
-        chute_informado = None
-    finally:
-        sys.stdout = old_stdout_ps
-        if chute_informado is not None:
-            print("  [Warm-Start] Sucesso! Esqueleto matrizal mapeado (Quase-Mínimo). Injetando matriz térmica no MCH...")
-        else:
-            print("  [Warm-Start] Falha no Pseudo. Retornando ao processo iterativo cego (Zeros).")
-    
-    for idx, cfg in enumerate(grade):
-        prefixo = f"  [Tentativa {idx+1}/{len(grade)}]"
-        print(f"\n{prefixo} Avaliando -> maxiter:{cfg['maxiter']}, eta_init:{cfg['eta_init']}, decaimento:i/{cfg['decay_div']}")
-        
-        # Vital instanciar solver zerado para limpar thermal noise do anterior
-        solver = coniii.solvers.MCH(
-            spin_matrix,
-            calc_observables=calc_observables,
-            mch_approximation=mch_approximation,
-            sample_size=1000,
-            n_cpus=max(1, mp.cpu_count() - 1),
-            iprint=True
-        )
-        
-        def learn_settings(i, c=cfg):
-            return {
-                'maxdlamda': np.exp(-i/c['decay_div']) * c['eta_init'], 
-                'eta': np.exp(-i/c['decay_div']) * c['eta_init']
-            }
-            
-        old_stdout = sys.stdout
-        filtro_tela = MCHProgressFilter(maxiter=cfg['maxiter'], prefix=prefixo)
-        sys.stdout = filtro_tela
-        
+    if chute_inicial is not None:
+        print("  [Warm-Start] Usando a solução vizinha do cache de resultados como ponto de partida do MCH.")
+        chute_informado = np.asarray(chute_inicial, dtype=np.float64)
+    else:
+        print("  [Warm-Start] Pré-mapeando o Vale de Erro com algoritmo Pseudo-Verossimilhança...")
         try:
-            kwargs_solver = {
-                "maxiter": cfg['maxiter'],
-                "custom_convergence_f": learn_settings,
-                "burn_in": cfg['burn_in'],
-                "tol": 1e-5,
-                "iprint": True
-            }
-            if chute_informado is not None:
-                kwargs_solver["initial_guess"] = chute_informado
-
-            multipliers = solver.solve(**kwargs_solver)
+            solver_pseudo = coniii.solvers.Pseudo(spin_matrix, iprint=False)
+            chute_informado = solver_pseudo.solve()
         except Exception as e:
-            sys.stdout = old_stdout
-            print(f"\n{prefixo} ⚠ Divergência ({e}). Ignorando esta estratégia arriscada...")
-            continue
+            chute_informado = None
         finally:
-            sys.stdout = old_stdout
-            
-        h = multipliers[:N]
-        rmse_atual = calcular_rmse_medias(spin_matrix, h)
-        
-        print(f"\n{prefixo} Iterações finalizadas. Obteve RMSE = {rmse_atual:.5f}")
-        
-        if rmse_atual < melhor_rmse:
-            melhor_rmse = rmse_atual
-            j_flat = multipliers[N:]
-            
-            melhor_dict = {
-                "h": h, "J": unpack_J(j_flat, N), "multipliers": multipliers, 
-                "metodo": f"MCH_Meta (eta={cfg['eta_init']}, iter={cfg['maxiter']})", 
-                "rmse_medias": rmse_atual
-            }
+            if chute_informado is not None and arestas is not None:
+                # Projeta o J denso do Pseudo sobre as arestas do modelo esparso
+                i, j = arestas[:, 0], arestas[:, 1]
+                chute_informado = np.concatenate((chute_informado[:N], chute_informado[N + i * N - i * (i + 1) // 2 + (j - i - 1)]))
+            if chute_informado is not None:
+                print("  [Warm-Start] Sucesso! Esqueleto matrizal mapeado (Quase-Mínimo). Injetando matriz térmica no MCH...")
+            else:
+                print("  [Warm-Start] Falha no Pseudo. Retornando ao processo iterativo cego (Zeros).")
+    
+    # Orçamento de CPU: configurações em paralelo, núcleos restantes divididos entre elas
+    total_cpus = n_cpus or max(1, mp.cpu_count() - 1)
+    n_workers = n_workers or min(len(grade), total_cpus)
+    cpus_por_config = max(1, total_cpus // n_workers)
+    for idx, cfg in enumerate(grade):
+        print(f"  [Tentativa {idx+1}/{len(grade)}] Agendada -> maxiter:{cfg['maxiter']}, eta_init:{cfg['eta_init']}, decaimento:i/{cfg['decay_div']}")
+    print(f"  [Meta-Tuning] {n_workers} configurações simultâneas x {cpus_por_config} CPU(s) cada (backend {backend}).")
+    
+    historico_eventos = SinkHistorico()
+    emissor = Emissor((sinks if sinks is not None else [SinkConsole()]) + [historico_eventos])
+    menor_rmse_visto = float('inf')
+    with mp.Manager() as manager, ProcessPoolExecutor(max_workers=n_workers) as pool:
+        fila = manager.Queue()
+        parar = manager.Event()
+        podados = manager.dict()
+        futures = {}
+        for idx, cfg in enumerate(grade):
+            ckpt = checkpoints.get(idx)
+            if ckpt is not None and ckpt["status"] == "podada":
+                print(f"  [Tentativa {idx+1}/{len(grade)}] Podada na execução anterior. Ignorando...")
+                continue
+            if ckpt is not None and ckpt["status"] == "concluida":
+                # Resultado já calculado: entra no laço como um future resolvido
+                futuro = Future()
+                futuro.set_result({"idx": idx, "status": "ok", "multipliers": ckpt["multipliers"],
+                                   "rmse": rmse_medias(observaveis[:N], ckpt["multipliers"][:N])})
+                futures[futuro] = idx
+                continue
+            if ckpt is not None:
+                print(f"  [Tentativa {idx+1}/{len(grade)}] Continuando da iteração {ckpt['iteracao']}/{cfg['maxiter']}.")
+            futures[pool.submit(_executar_config_mch, idx, cfg, observaveis, N, chute_informado,
+                                cpus_por_config, fila, parar, podados, backend, arestas,
+                                checkpoint_dir, ckpt)] = idx
+        pendentes = set(futures)
+        while pendentes:
+            concluidos, pendentes = wait(pendentes, timeout=0.5, return_when=FIRST_COMPLETED)
             
-        if rmse_atual <= limiar_schneidman:
-            print(f"  [Meta-Tuning] ✔ VALOR IDEAL ALCANÇADO E ESTATISTICAMENTE VIÁVEL! Interrompendo buscas...")
-            break
-        else:
-            print(f"  [Meta-Tuning] Ajuste ainda em refinamento. Pulando para a próxima configuração profunda...")
+            # Eventos publicados pelos ganchos das configurações em execução
+            while True:
+                try:
+                    evento = fila.get_nowait()
+                except queue.Empty:
+                    break
+                emissor.emitir(evento)
+                idx, it, rmse = evento["config"], evento["iteracao"], evento["rmse_medias"]
+                if np.isfinite(rmse):
+                    menor_rmse_visto = min(menor_rmse_visto, rmse)
+                divergente = not np.isfinite(rmse) or (it >= ITER_MIN_PODA and rmse > FATOR_PODA * menor_rmse_visto)
+                if divergente and not podados.get(idx):
+                    podados[idx] = True
+                    print(f"\n  [Tentativa {idx+1}/{len(grade)}] ✂ Podada na iteração {it} (RMSE {rmse:.5f} divergindo).")
+
+            for future in concluidos:
+                if future.cancelled():
+                    continue
+                res = future.result()
+                idx = res["idx"]
+                cfg = grade[idx]
+                emissor.emitir({"tipo": "config_fim", "metodo": "MCH", "config": idx, "status": res["status"],
+                                "rmse_medias": res.get("rmse"), "tempo_amostragem_s": res.get("tempo_amostragem_s")})
+                prefixo = f"  [Tentativa {idx+1}/{len(grade)}]"
+                if res["status"] == "cancelada":
+                    continue
+                if res["status"] == "erro":
+                    print(f"\n{prefixo} ⚠ Divergência ({res['erro']}). Ignorando esta estratégia arriscada...")
+                    continue
+                
+                rmse_atual = res["rmse"]
+                multipliers = res["multipliers"]
+                print(f"\n{prefixo} Iterações finalizadas. Obteve RMSE = {rmse_atual:.5f}")
+                
+                if rmse_atual < melhor_rmse:
+                    melhor_rmse = rmse_atual
+                    h = multipliers[:N]
+                    
+                    melhor_dict = {
+                        "h": h, "J": J_do_resultado(multipliers, N, arestas),
+                        "multipliers": multipliers, 
+                        "metodo": f"MCH_Meta (eta={cfg['eta_init']}, iter={cfg['maxiter']})", 
+                        "rmse_medias": rmse_atual
+                    }
+                    if arestas is not None:
+                        melhor_dict["arestas"] = arestas
+                        melhor_dict["metodo"] = melhor_dict["metodo"].replace("MCH_Meta", "MCH_Esparso")
+                    
+                if rmse_atual <= limiar_schneidman and not parar.is_set():
+                    print(f"  [Meta-Tuning] ✔ VALOR IDEAL ALCANÇADO E ESTATISTICAMENTE VIÁVEL! Cancelando as demais configurações...")
+                    parar.set()
+                    for f in pendentes:
+                        f.cancel()
             
     if melhor_dict is None:
         raise RuntimeError("Todas as configurações da Grade de Meta-Tuning causaram explosão numérica (crash).")
+    if checkpoint_dir:
+        shutil.rmtree(checkpoint_dir, ignore_errors=True)
+    melhor_dict["eventos"] = historico_eventos.eventos
         
     print(f"\n  [MCH] 🏆 CAMPEÃO METODOLÓGICO SELECIONADO: {melhor_dict['metodo']} (RMSE {melhor_dict['rmse_medias']:.5f})")
     exibir_avaliacao_schneidman(melhor_dict['rmse_medias'], R, melhor_dict['metodo'])
@@ -266,23 +576,274 @@ def inferir_mch(spin_matrix: np.ndarray, session_id: str, lam: float = 0.01) ->
 
 
 
-def inferir_todos(spin_matrix: np.ndarray, session_id: str, lam: float = 0.01) -> dict:
+def inferir_pseudo(spin_matrix: np.ndarray, session_id: str, lam: float = 0.01, penalidade: str = "l2",
+                   arestas: np.ndarray = None, n_jobs: int = None, emissor: Emissor = None) -> dict:
     """
-    Orquestrador simplificado: Executa o método Monte Carlo Histogram (MCH).
+    Método: Pseudo-Verossimilhança regularizada (src/ising_pseudo.py)
+
+    Uma regressão logística por spin, em paralelo, com 'lam' como força da
+    penalidade L1 ou L2 sobre J; J é simetrizado ao final. Muito mais rápido que o
+    MCH para N grande, útil como estimativa direta dos acoplamentos.
+    Com 'arestas', cada spin regride apenas sobre os seus vizinhos na rede.
+    Com 'emissor', publica um evento "progresso" a cada lote de spins ajustado.
     """
-    print(f"\n[Ising-ConIII] Iniciando inferência MCH para R={spin_matrix.shape[0]}, N={spin_matrix.shape[1]}")
+    R, N = spin_matrix.shape
+    nome = f"Pseudo-{penalidade.upper()}"
+    print(f"\n  [{nome}] Ajustando {N} regressões logísticas (λ={lam})...")
     t0 = time.time()
-    
-    try:
-        resultado = inferir_mch(spin_matrix, session_id, lam)
-        tempo_s = time.time() - t0
-        resultado["tempo_s"] = tempo_s
-        print(f"  [Sucesso] MCH concluído em {tempo_s:.1f}s")
-        resultados = {"MCH": resultado}
-    except Exception as e:
-        tempo_s = time.time() - t0
-        print(f"  [Erro] Falha em MCH: {e}")
-        resultados = {"MCH": {"metodo": "MCH", "ERROR": str(e), "tempo_s": tempo_s}}
+    progresso = None
+    if emissor is not None:
+        def progresso(concluidos, total):
+            emissor.emitir({"tipo": "progresso", "metodo": nome, "concluidos": concluidos, "total": total,
+                            "tempo_s": time.time() - t0})
+    h, J = pseudo_verossimilhanca(spin_matrix, lam=lam, penalidade=penalidade, arestas=arestas, n_jobs=n_jobs,
+                                  progresso=progresso)
+
+    if arestas is None:
+        multipliers = empacotar_multiplicadores(h, J)
+    else:
+        arestas = np.asarray(arestas, dtype=np.int64).reshape(-1, 2)
+        multipliers = np.concatenate((h, J))
+
+    rmse = calcular_rmse_medias(spin_matrix, h)
+    exibir_avaliacao_schneidman(rmse, R, nome)
+    resultado = {"h": h, "J": J_do_resultado(multipliers, N, arestas), "multipliers": multipliers, "metodo": f"{nome} (λ={lam})", "rmse_medias": rmse}
+    if arestas is not None:
+        resultado["arestas"] = arestas
+    return resultado
+
+def inferir_campo_medio(spin_matrix: np.ndarray, session_id: str, aproximacao: str = "nMF",
+                        shrinkage: float = None, arestas: np.ndarray = None) -> dict:
+    """
+    Método: Campo Médio / TAP / Sessak–Monasson (src/ising_meanfield.py)
+
+    Forma fechada a partir da inversa da covariância: uma fatoração O(N³) por matriz,
+    sem amostragem — viável para comunidades com milhares de spins. Com R < N a
+    covariância recebe shrinkage em direção à diagonal. Com 'arestas', J é projetado
+    nas arestas da rede (multiplicadores [h, J_e]).
+    """
+    R, N = spin_matrix.shape
+    print(f"\n  [{aproximacao}] Invertendo a covariância ({N} x {N})...")
+    h, J, intensidade = inferir_aproximacao(spin_matrix, aproximacao, shrinkage)
+    if intensidade > 0:
+        print(f"  [{aproximacao}] Shrinkage da covariância para a diagonal: {intensidade:.3f}")
+
+    if arestas is None:
+        multipliers = empacotar_multiplicadores(h, J)
+    else:
+        arestas = np.asarray(arestas, dtype=np.int64).reshape(-1, 2)
+        multipliers = np.concatenate((h, J[arestas[:, 0], arestas[:, 1]]))
+
+    rmse = calcular_rmse_medias(spin_matrix, h)
+    exibir_avaliacao_schneidman(rmse, R, aproximacao)
+    resultado = {"h": h, "J": J_do_resultado(multipliers, N, arestas), "multipliers": multipliers, "metodo": aproximacao, "rmse_medias": rmse,
+                 "shrinkage": intensidade}
+    if arestas is not None:
+        resultado["arestas"] = arestas
+    return resultado
+
+def inferir_exato(spin_matrix: np.ndarray, session_id: str, arestas: np.ndarray = None,
+                  chute_inicial: np.ndarray = None, lam: float = LAM_EXATO, emissor: Emissor = None) -> dict:
+    """
+    Método: Enumeração Exata (src/ising_exato.py)
+
+    Para N ≤ N_MAX_EXATO a função de partição é calculada sobre os 2^N estados
+    (código de Gray em Numba) e (h, J) são ajustados por máxima verossimilhança
+    exata, sem ruído de amostragem — referência para validar os solvers amostrados.
+    'lam' é a penalidade L2 própria do ajuste exato (padrão LAM_EXATO, ver src/ising_exato.py),
+    que só mantém finitos os multiplicadores de spins constantes ou pares sem coocorrência.
+    Com 'emissor', publica um evento "iteracao" por iteração do L-BFGS.
+    """
+    R, N = spin_matrix.shape
+    if arestas is None:
+        observaveis = obter_estatisticas(spin_matrix)["observaveis"]
+    else:
+        arestas = np.asarray(arestas, dtype=np.int64).reshape(-1, 2)
+        observaveis = observaveis_arestas(spin_matrix, arestas)
+    print(f"\n  [Exato] Enumerando 2^{N} = {1 << N} estados por iteração...")
+    t0 = time.time()
+    medias = obter_estatisticas(spin_matrix)["medias"]
+    callback = None
+    if emissor is not None:
+        def callback(iteracao, theta):
+            emissor.emitir({"tipo": "iteracao", "metodo": "Exato", "config": 0, "iteracao": iteracao, "maxiter": 1000,
+                            "tempo_s": time.time() - t0, "tempo_amostragem_s": 0.0, "passo": None,
+                            "rmse_medias": rmse_medias(medias, theta[:N])})
+    multipliers, log_z, res = ajustar_exato(observaveis, N, arestas=arestas, chute_inicial=chute_inicial, lam=lam,
+                                            callback=callback)
+    print(f"  [Exato] {res.nit} iterações L-BFGS | máx |∇| = {np.abs(res.jac).max():.2e}")
+
+    h = multipliers[:N]
+    rmse = calcular_rmse_medias(spin_matrix, h)
+    exibir_avaliacao_schneidman(rmse, R, "Exato")
+    resultado = {"h": h, "J": J_do_resultado(multipliers, N, arestas), "multipliers": multipliers, "metodo": f"Exato (λ={lam})", "rmse_medias": rmse, "log_z": log_z}
+    if arestas is not None:
+        resultado["arestas"] = arestas
+    return resultado
+
+# Métodos disponíveis em inferir_todos
+METODOS_INFERENCIA = ("MCH", "Pseudo-L2", "Pseudo-L1") + APROXIMACOES + ("Exato",)
+
+# Títulos do painel de J na Figura 2
+TITULOS_J = {
+    "MCH": "J — Monte Carlo Hist. (MCH)",
+    "Pseudo-L2": "J — Pseudo-Verossimilhança (L2)",
+    "Pseudo-L1": "J — Pseudo-Verossimilhança (L1)",
+    "nMF": "J — Campo Médio Ingênuo (nMF)",
+    "TAP": "J — Thouless-Anderson-Palmer (TAP)",
+    "SM": "J — Sessak-Monasson (SM)",
+    "Exato": "J — Enumeração Exata",
+}
+
+# Cache de resultados padrão (data/cache/ising, ao lado do cache de partições Leiden)
+CACHE_RESULTADOS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "cache", "ising")
+
+# Métodos cujo ajuste iterativo aproveita a solução vizinha do cache como chute inicial
+METODOS_WARM_START = ("MCH", "Exato")
+
+def _hiperparametros(nome: str, lam: float, backend: str) -> dict:
+    """Hiperparâmetros que entram na chave do cache de resultados de cada método."""
+    if nome == "MCH":
+        return {"lam": lam, "backend": backend, "grade": GRADE_META_TUNING}
+    if nome.startswith("Pseudo") or nome == "Exato":
+        return {"lam": lam}
+    return {}
+
+def _resultado_de_multiplicadores(spin_matrix: np.ndarray, multipliers: np.ndarray, metodo: str,
+                                  arestas: np.ndarray = None) -> dict:
+    """Reconstrói o dicionário de resultado de um método a partir dos multiplicadores gravados."""
+    R, N = spin_matrix.shape
+    h = multipliers[:N]
+    resultado = {"h": h, "J": J_do_resultado(multipliers, N, arestas), "multipliers": multipliers, "metodo": metodo,
+                 "rmse_medias": calcular_rmse_medias(spin_matrix, h)}
+    if arestas is not None:
+        resultado["arestas"] = arestas
+    return resultado
+
+def dir_checkpoint_mch(spin_matrix: np.ndarray, lam: float = 0.01, backend: str = "coniii",
+                       node_names: list = None, arestas: np.ndarray = None, raiz: str = CHECKPOINT_DIR) -> str:
+    """Diretório de checkpoints do MCH para esta matriz/configuração (mesma chave do cache de resultados)."""
+    nomes = list(node_names) if node_names is not None else [str(i) for i in range(spin_matrix.shape[1])]
+    if arestas is not None:
+        arestas = np.asarray(arestas, dtype=np.int64).reshape(-1, 2)
+    chave = CacheInferencia.chave(spin_matrix, "MCH", _hiperparametros("MCH", lam, backend), nomes, arestas)
+    return os.path.join(raiz, chave[:16])
+
+def checkpoint_pendente(spin_matrix: np.ndarray, lam: float = 0.01, backend: str = "coniii",
+                        node_names: list = None, arestas: np.ndarray = None) -> bool:
+    """True se existe uma execução MCH interrompida (com checkpoints) para esta matriz/configuração."""
+    return bool(carregar_checkpoints(dir_checkpoint_mch(spin_matrix, lam, backend, node_names, arestas)))
+
+def inferir_todos(spin_matrix: np.ndarray, session_id: str, lam: float = 0.01, backend: str = "coniii",
+                  arestas: np.ndarray = None, metodos: tuple = ("MCH",), node_names: list = None,
+                  cache_dir: str = CACHE_RESULTADOS_DIR, checkpoint_raiz: str = CHECKPOINT_DIR,
+                  retomar: bool = False, sinks: list = None, log_eventos: str = None,
+                  n_cpus: int = None, stats_path: str = None, lam_exato: float = LAM_EXATO) -> dict:
+    """
+    Orquestrador: executa cada método de 'metodos' (ver METODOS_INFERENCIA) e grava
+    uma linha por método na tabela comparativa.
+    'backend' seleciona o amostrador do MCH ("coniii" ou "numba"); 'arestas' ativa o
+    modo esparso (acoplamentos apenas nas arestas da rede); 'lam' é a regularização
+    do MCH e da pseudo-verossimilhança e 'lam_exato' a do ajuste exato. nMF/TAP/SM
+    dispensam amostragem e servem para explorar comunidades grandes demais para o MCH.
+
+    Com 'cache_dir' (None desativa), resultados já calculados para a mesma matriz,
+    método e hiperparâmetros são devolvidos do cache; MCH e Exato partem da solução
+    gravada mais próxima (mesmos spins, keywords diferentes) quando houver.
+
+    O MCH grava checkpoints em 'checkpoint_raiz' (None desativa); retomar=True
+    continua uma execução interrompida da mesma matriz/configuração.
+
+    Eventos de progresso vão para 'sinks' (padrão: console) e, com 'log_eventos',
+    também para um arquivo JSONL; cada método emite um evento "metodo_fim" ao terminar
+    (ver src/ising_eventos.py para os eventos de cada método).
+
+    'n_cpus' é o orçamento de núcleos dos métodos paralelos (MCH e Pseudo); o
+    padrão usa a máquina toda. Ver src/ising_batch.py para vários jobs simultâneos.
+
+    Com 'stats_path' (ver ising_stats.caminho_estatisticas), as estatísticas
+    suficientes da matriz são lidas de/gravadas em um .npz ao lado da matriz.
+    """
+    desconhecidos = [m for m in metodos if m not in METODOS_INFERENCIA]
+    if desconhecidos:
+        raise ValueError(f"Métodos desconhecidos: {desconhecidos} (disponíveis: {', '.join(METODOS_INFERENCIA)})")
+    if spin_matrix.shape[1] <= N_MAX_EXATO and "Exato" not in metodos:
+        # N pequeno: a solução exata é barata e serve de referência para os demais métodos
+        print(f"  [Exato] N={spin_matrix.shape[1]} ≤ {N_MAX_EXATO}: incluindo enumeração exata na comparação "
+              f"(será o método de referência da figura e dos multiplicadores salvos).")
+        metodos = ("Exato", *metodos)
+    print(f"\n[Ising-ConIII] Iniciando inferência ({', '.join(metodos)}) para R={spin_matrix.shape[0]}, N={spin_matrix.shape[1]}")
+    # Carrega (ou calcula e grava) as estatísticas; as chamadas seguintes usam o cache em memória
+    obter_estatisticas(spin_matrix, cache_path=stats_path)
+
+    nomes = list(node_names) if node_names is not None else [str(i) for i in range(spin_matrix.shape[1])]
+    if arestas is not None:
+        arestas = np.asarray(arestas, dtype=np.int64).reshape(-1, 2)
+    cache = CacheInferencia(cache_dir) if cache_dir else None
+    sinks = list(sinks) if sinks is not None else [SinkConsole()]
+    sink_jsonl = SinkJSONL(log_eventos) if log_eventos else None
+    if sink_jsonl is not None:
+        sinks.append(sink_jsonl)
+    emissor = Emissor(sinks)
+
+    resultados = {}
+
+    def emitir_fim(nome):
+        # Emitido assim que o método termina: o timestamp marca o fim de cada método
+        dados = resultados[nome]
+        emissor.emitir({"tipo": "metodo_fim", "metodo": nome, "tempo_s": dados["tempo_s"],
+                        "rmse_medias": dados.get("rmse_medias"), "erro": dados.get("ERROR")})
+
+    for nome in metodos:
+        t0 = time.time()
+        chave = chute = None
+        if cache is not None:
+            chave = cache.chave(spin_matrix, nome, _hiperparametros(nome, lam_exato if nome == "Exato" else lam, backend),
+                                nomes, arestas)
+            gravado = cache.get(chave)
+            if gravado is not None:
+                resultado = _resultado_de_multiplicadores(spin_matrix, gravado[0], gravado[1], arestas)
+                resultado["tempo_s"] = time.time() - t0
+                print(f"  [Cache] {nome} recuperado do cache de resultados (RMSE {resultado['rmse_medias']:.5f}).")
+                resultados[nome] = resultado
+                emitir_fim(nome)
+                continue
+            if nome in METODOS_WARM_START:
+                vizinho = cache.nearest(nome, obter_estatisticas(spin_matrix)["medias"], nomes, arestas)
+                if vizinho is not None:
+                    chute, sobreposicao = vizinho
+                    print(f"  [Cache] Solução vizinha de {nome} encontrada ({sobreposicao:.0%} dos spins em comum).")
+        try:
+            if nome == "MCH":
+                ckpt_dir = (dir_checkpoint_mch(spin_matrix, lam, backend, nomes, arestas, checkpoint_raiz)
+                            if checkpoint_raiz else None)
+                resultado = inferir_mch(spin_matrix, session_id, lam, backend=backend, arestas=arestas,
+                                        chute_inicial=chute, checkpoint_dir=ckpt_dir, retomar=retomar,
+                                        sinks=sinks, n_cpus=n_cpus)
+            elif nome == "Exato":
+                resultado = inferir_exato(spin_matrix, session_id, arestas=arestas, chute_inicial=chute,
+                                          lam=lam_exato, emissor=emissor)
+            elif nome in APROXIMACOES:
+                resultado = inferir_campo_medio(spin_matrix, session_id, nome, arestas=arestas)
+            else:
+                penalidade = nome.split("-")[1].lower()
+                resultado = inferir_pseudo(spin_matrix, session_id, lam, penalidade=penalidade, arestas=arestas,
+                                           n_jobs=n_cpus, emissor=emissor)
+            tempo_s = time.time() - t0
+            resultado["tempo_s"] = tempo_s
+            print(f"  [Sucesso] {nome} concluído em {tempo_s:.1f}s")
+            resultados[nome] = resultado
+            if cache is not None:
+                cache.put(chave, nome, resultado["multipliers"], resultado["metodo"],
+                          obter_estatisticas(spin_matrix)["medias"], nomes, arestas)
+        except Exception as e:
+            tempo_s = time.time() - t0
+            print(f"  [Erro] Falha em {nome}: {e}")
+            resultados[nome] = {"metodo": nome, "ERROR": str(e), "tempo_s": tempo_s}
+        emitir_fim(nome)
+
+    if sink_jsonl is not None:
+        sink_jsonl.fechar()
         
     # Salvar resultados e tabela comparativa
     R, N = spin_matrix.shape
@@ -312,16 +873,36 @@ def inferir_todos(spin_matrix: np.ndarray, session_id: str, lam: float = 0.01) -
     csv_path = f"comparacao_metodos_{session_id}.csv"
     df_comp.to_csv(csv_path, index=False)
     
-    # Salvar multiplicadores
-    if "MCH" in resultados and "multipliers" in resultados["MCH"]:
-        multipliers = resultados["MCH"]["multipliers"]
+    # Salvar multiplicadores do método de referência (ver metodo_principal)
+    nome_salvo = metodo_principal(resultados)
+    if nome_salvo == "Exato" and "MCH" in resultados:
+        print("\n[Referência] Exato substituiu o MCH como método de referência (multiplicadores salvos e Figura 2).")
+    if nome_salvo is not None:
+        multipliers = resultados[nome_salvo]["multipliers"]
         npy_path = f"multiplicadores_ising_{session_id}.npy"
         np.save(npy_path, multipliers)
-        print(f"[Salvo] Multiplicadores MCH salvos em: {npy_path}")
+        print(f"[Salvo] Multiplicadores {nome_salvo} salvos em: {npy_path}")
+        if "arestas" in resultados[nome_salvo]:
+            # Modo esparso: os multiplicadores [h, J_e] só são interpretáveis com a lista de arestas
+            np.save(f"arestas_ising_{session_id}.npy", resultados[nome_salvo]["arestas"])
         
     return resultados
 
 
+def metodo_principal(resultados: dict):
+    """
+    Método de referência dos resultados: Exato se disponível, depois MCH, senão o de
+    menor RMSE (None se nenhum).
+    """
+    validos = {nome: d for nome, d in resultados.items() if "multipliers" in d}
+    if not validos:
+        return None
+    for nome in ("Exato", "MCH"):
+        if nome in validos:
+            return nome
+    return min(validos, key=lambda nome: validos[nome]["rmse_medias"])
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # 3. SEÇÃO 11 — FIGURA 2 (Covariância Empírica + Acoplamentos Infêridos)
 # ─────────────────────────────────────────────────────────────────────────────
@@ -329,31 +910,31 @@ def inferir_todos(spin_matrix: np.ndarray, session_id: str, lam: float = 0.01) -
 def gerar_figura2(spin_matrix: np.ndarray, resultados_inferencia: dict, 
                   gexf_path: str, node_names: list, session_id: str):
     """
-    Painel Duplo: Covariância empírica e Acoplamentos J via MCH.
+    Painel Duplo: Covariância empírica e Acoplamentos J do método de referência (ver metodo_principal).
     Aplica filtro topológico substituindo as pontes desconectadas por NaN
     usando a rede GEXF original da comunidade correspondente aos nós (usuários).
     """
     print("\n[Figura 2] Inicializando geração dos heatmaps lado a lado...")
     N = spin_matrix.shape[1]
     
-    # Covariância
-    C_emp = np.cov(spin_matrix, rowvar=False)
+    # Covariância (cache de estatísticas suficientes)
+    C_emp = obter_estatisticas(spin_matrix)["covariancia"]
     
     # Filtro topológico
     aplicar_filtro = False
     A_mask = np.ones((N, N), dtype=bool)
     
-    if os.path.exists(gexf_path):
-        G = nx.read_gexf(gexf_path)
-        encontrados = [k for k in node_names if k in G]
-        if len(encontrados) < len(node_names) / 2:
+    # Snapshot binário da rede (GEXF apenas como fallback na primeira leitura)
+    G = load_graph(gexf_path)
+    if G is not None:
+        A_adj, n_encontrados = adjacency_mask(G, node_names)
+        if n_encontrados < len(node_names) / 2:
             print("  [Aviso] Nomes dos nós da matriz não batem com os nós do GEXF.")
             print("  -> Filtro topológico DESABILITADO.")
         else:
             print(f"  [Filtro] GEXF válido. Aplicando máscara...")
             aplicar_filtro = True
-            A = nx.to_numpy_array(G, nodelist=node_names)
-            A_mask = (A == 1)
+            A_mask = A_adj
             np.fill_diagonal(A_mask, True)
     else:
         print(f"  [Aviso] GEXF {gexf_path} não encontrado. Filtro desabilitado.")
@@ -366,7 +947,12 @@ def gerar_figura2(spin_matrix: np.ndarray, resultados_inferencia: dict,
         return m_copy
 
     C_masked = aplicar_mascara(C_emp)
-    J_mch = aplicar_mascara(resultados_inferencia.get("MCH", {}).get("J", np.zeros((N,N))))
+    nome_j = metodo_principal(resultados_inferencia) or "MCH"
+    J_mch = resultados_inferencia.get(nome_j, {}).get("J")
+    # Visão densa montada só aqui, para o heatmap (os resultados guardam J empacotado)
+    J_mch = densificar_J(J_mch) if J_mch is not None else np.zeros((N, N))
+    J_mch = aplicar_mascara(J_mch)
+    titulo_j = TITULOS_J[nome_j]
 
     # Configuração da figura matplotlib
     plt.rcParams.update({'text.color': '#cccccc', 'axes.labelcolor': '#cccccc',
@@ -378,7 +964,7 @@ def gerar_figura2(spin_matrix: np.ndarray, resultados_inferencia: dict,
     
     paineis = [
         (C_masked, "Covariância Empírica"),
-        (J_mch, "J — Monte Carlo Hist. (MCH)")
+        (J_mch, titulo_j)
     ]
     
     for i, (mat, titulo) in enumerate(paineis):
@@ -413,35 +999,40 @@ def gerar_figura2(spin_matrix: np.ndarray, resultados_inferencia: dict,
 # 4. VALIDAÇÃO OPCIONAL VIA METROPOLIS
 # ─────────────────────────────────────────────────────────────────────────────
 
-def validar_modelo(resultados_inferencia: dict, N: int, n_amostras: int = 1000):
+def validar_modelo(resultados_inferencia: dict, N: int, n_amostras: int = 1000, spin_matrix: np.ndarray = None,
+                   session_id: str = None, n_cadeias: int = 4):
     """
-    Validação gerativa por amostragem Monte Carlo (Metropolis).
-    Gera novas amostras a partir do modelo treinado e compara a covariância
-    produzida sinteticamente com a matriz empírica esperada.
+    Validação gerativa por Monte Carlo (Metropolis) com várias cadeias em paralelo.
+    Para cada modelo: R-hat e ESS (energia e magnetizações) e, com 'spin_matrix',
+    médias, correlações C_ij e correlações de três pontos sintéticas vs empíricas.
+    'n_amostras' é o número de amostras por cadeia. Com 'session_id' o relatório
+    é gravado em validacao_ising_{session_id}.txt.
     """
-    print("\n[Metropolis] Iniciando amostragem Monte Carlo para validação dos modelos...")
-    calc_e, _, _ = define_ising_helper_functions()
-    
+    print(f"\n[Metropolis] Validando os modelos com {n_cadeias} cadeias x {n_amostras} amostras...")
+    secoes = []
+    relatorios = {}
     for nome, dados in resultados_inferencia.items():
         if "TIMEOUT" in dados or "ERROR" in dados:
             continue
-            
+
         print(f"  > Avaliando método {nome}...")
-        multipliers = dados["multipliers"]
-        
-        sampler = coniii.samplers.Metropolis(
-            N,
-            multipliers,
-            calc_e
-        )
-        
+        inicio = time.time()
         # Burn-in de 500 iter e subamostragem temporal (decorrelation) = 10
-        amostras_sinteticas = sampler.sample(n_amostras, n_iters=10, burn_in=500)
-        
-        # (Idealmente compararíamos com a empírica real se tivéssemos salvo fora,
-        # mas aqui demonstramos a amostragem)
-        C_sintetica = np.cov(amostras_sinteticas, rowvar=False)
-        print(f"    - [{nome}] Amostras geradas: {amostras_sinteticas.shape}. Covariância média abs: {np.abs(C_sintetica).mean():.5f}")
+        relatorio = validar_multiplicadores(dados["multipliers"], N, spin_matrix=spin_matrix,
+                                            arestas=dados.get("arestas"), n_cadeias=n_cadeias,
+                                            amostras_por_cadeia=n_amostras, burn_in=500, n_iters=10)
+        relatorio["tempo_s"] = time.time() - inicio
+        relatorios[nome] = relatorio
+        secoes.append(formatar_relatorio(nome, relatorio))
+        print("    " + secoes[-1].replace("\n", "\n    "))
+
+    if session_id is not None and secoes:
+        report_path = f"validacao_ising_{session_id}.txt"
+        with open(report_path, "w", encoding="utf-8") as f:
+            f.write(f"Validação gerativa dos modelos de Ising (sessão {session_id})\n\n")
+            f.write("\n\n".join(secoes) + "\n")
+        print(f"\n[Metropolis] Relatório de validação salvo em: {report_path}")
+    return relatorios
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -452,7 +1043,16 @@ if __name__ == "__main__":
     parser.add_argument("csv_path", type=str, help="Caminho para a matriz_estados_.csv (valores +1/-1)")
     parser.add_argument("gexf_path", type=str, help="Caminho para o arquivo GEXF da rede correspondente")
     parser.add_argument("--lam", type=float, default=0.01, help="Parâmetro de regularização (padrão 0.01)")
-    parser.add_argument("--validar", action="store_true", help="Executa o Monte Carlo Metropolis para o modelo campeão")
+    parser.add_argument("--lam-exato", type=float, default=LAM_EXATO,
+                        help=f"Penalidade L2 do ajuste exato (padrão {LAM_EXATO})")
+    parser.add_argument("--validar", action="store_true", help="Valida os modelos por Monte Carlo com várias cadeias (R-hat, ESS, estatísticas sintéticas vs empíricas)")
+    parser.add_argument("--backend", choices=["coniii", "numba"], default="coniii", help="Amostrador usado pelo MCH (padrão coniii)")
+    parser.add_argument("--metodos", nargs="+", choices=list(METODOS_INFERENCIA), default=["MCH"],
+                        help="Métodos de inferência a executar (padrão MCH)")
+    parser.add_argument("--retomar", action="store_true", help="Retoma uma execução MCH interrompida a partir dos checkpoints")
+    parser.add_argument("--log-eventos", type=str, default=None, help="Arquivo JSONL para os eventos de progresso/métricas da inferência")
+    parser.add_argument("--sem-cache", action="store_true", help="Ignora o cache de resultados de inferência")
+    parser.add_argument("--esparso", action="store_true", help="Ajusta acoplamentos apenas nas arestas da rede (GEXF/snapshot)")
     args = parser.parse_args()
 
     session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -465,13 +1065,18 @@ if __name__ == "__main__":
     node_names = list(df.index)
     
     # Executa Inferência
-    resultados = inferir_todos(S, session_id, lam=args.lam)
+    arestas = arestas_da_rede(args.gexf_path, node_names) if args.esparso else None
+    resultados = inferir_todos(S, session_id, lam=args.lam, backend=args.backend, arestas=arestas,
+                              metodos=tuple(args.metodos), node_names=node_names,
+                              cache_dir=None if args.sem_cache else CACHE_RESULTADOS_DIR, retomar=args.retomar,
+                              log_eventos=args.log_eventos, stats_path=caminho_estatisticas(args.csv_path),
+                              lam_exato=args.lam_exato)
     
     # Gera a figura
     gerar_figura2(S, resultados, args.gexf_path, node_names, session_id)
     
     # Caso flag `--validar` providenciado
     if args.validar:
-        validar_modelo(resultados, len(node_names))
+        validar_modelo(resultados, len(node_names), spin_matrix=S, session_id=session_id)
         
     print(f"\n[CLI] Execução finalizada (Sessão {session_id}).")
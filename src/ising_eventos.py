@@ -0,0 +1,86 @@
+"""
+Eventos estruturados de progresso e métricas da inferência de Ising.
+
+Os solvers publicam dicionários de evento (sem tocar em sys.stdout) e um Emissor
+os repassa a sinks plugáveis:
+
+- SinkConsole: linha de progresso do Meta-Tuning e resumos por configuração;
+- SinkJSONL: um evento por linha em arquivo, para análise/perfilamento posterior;
+- SinkHistorico: lista em memória (vai para o resultado, p. ex. curvas de convergência).
+
+Campos de um evento "iteracao": metodo, config, iteracao, maxiter, tempo_s (desde o
+início da configuração), tempo_amostragem_s (amostragem MC desta iteração), passo
+(eta do cronograma), rmse_medias e rmse_correlacoes (este a cada INTERVALO_PROGRESSO).
+O MCH emite um por iteração de cada configuração e o Exato um por iteração do L-BFGS
+(sem amostragem nem passo); a Pseudo-Verossimilhança emite eventos "progresso"
+(spins concluídos) por lote, e nMF/TAP/SM, em forma fechada, apenas "metodo_fim".
+"""
+
+import sys
+import json
+import time
+
+class SinkConsole:
+    """
+    Progresso no console: uma linha reescrita com o avanço de cada configuração
+    do MCH, no máximo a cada 'intervalo_s'.
+    """
+    def __init__(self, intervalo_s=0.5):
+        self.intervalo_s = intervalo_s
+        self._progresso = {}  # {config: (iteracao, maxiter, rmse)}
+        self._ultimo = 0.0
+
+    def __call__(self, evento):
+        if evento["tipo"] == "iteracao" and evento["metodo"] == "MCH":
+            self._progresso[evento["config"]] = (evento["iteracao"], evento["maxiter"], evento["rmse_medias"])
+            agora = time.monotonic()
+            if agora - self._ultimo >= self.intervalo_s:
+                self._ultimo = agora
+                linha = " | ".join(
+                    f"T{idx+1}: {100 * it / maxiter:.0f}% RMSE {rmse:.4f}"
+                    for idx, (it, maxiter, rmse) in sorted(self._progresso.items())
+                )
+                sys.stdout.write(f"\r  [Meta-Tuning] {linha}")
+                sys.stdout.flush()
+
+    def fechar(self):
+        pass
+
+class SinkJSONL:
+    """Acrescenta cada evento como uma linha JSON em 'path'."""
+    def __init__(self, path):
+        self.path = path
+        self._arquivo = open(path, "a", encoding="utf-8")
+
+    def __call__(self, evento):
+        self._arquivo.write(json.dumps(evento, ensure_ascii=False, default=float) + "\n")
+
+    def fechar(self):
+        self._arquivo.close()
+
+class SinkHistorico:
+    """Guarda os eventos em memória (opcionalmente só os tipos dados)."""
+    def __init__(self, tipos=None):
+        self.tipos = set(tipos) if tipos else None
+        self.eventos = []
+
+    def __call__(self, evento):
+        if self.tipos is None or evento["tipo"] in self.tipos:
+            self.eventos.append(evento)
+
+    def fechar(self):
+        pass
+
+class Emissor:
+    """Repassa eventos a todos os sinks; carimba 'timestamp' quando ausente."""
+    def __init__(self, sinks=None):
+        self.sinks = list(sinks or [])
+
+    def emitir(self, evento):
+        evento.setdefault("timestamp", time.time())
+        for sink in self.sinks:
+            sink(evento)
+
+    def fechar(self):
+        for sink in self.sinks:
+            sink.fechar()
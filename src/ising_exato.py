@@ -0,0 +1,124 @@
+"""
+Solver exato do modelo de Ising para N pequeno (N ≤ N_MAX_EXATO).
+
+Os 2^N estados são percorridos em código de Gray: estados consecutivos diferem em
+um único spin, então a energia é atualizada em O(N) por estado (Numba) em vez de
+recalculada em O(N²). Médias e correlações exatas saem de produtos matriciais
+(BLAS) entre os pesos de Boltzmann e a tabela de estados, em blocos de linhas.
+O ajuste maximiza a verossimilhança (côncava) com L-BFGS: gradiente = observáveis
+do modelo - observáveis empíricos, mais uma penalidade L2 (lam/2)·||θ||² sobre h e J.
+Sem ela, um spin constante nos dados (usuário que nunca usa nenhuma keyword) ou um
+par que nunca coocorre leva os multiplicadores correspondentes a divergir; o padrão
+LAM_EXATO é muito menor que o 'lam' da pseudo-verossimilhança, para não enviesar a
+referência contra a qual os solvers amostrados são validados.
+
+Convenção de energia do ConIII: E(s) = -(Σ h_i s_i + Σ_{i<j} J_ij s_i s_j).
+"""
+
+import numpy as np
+from numba import njit
+from scipy.optimize import minimize
+from scipy.special import logsumexp
+
+from .ising_stats import indices_triu
+
+# Acima disso a tabela de estados (2^N x N int8) e o custo por iteração deixam de compensar
+N_MAX_EXATO = 20
+
+# Linhas da tabela de estados por bloco nos produtos matriciais
+BLOCO_ESTADOS = 1 << 16
+
+# Penalidade L2 padrão do ajuste exato, própria deste solver (independente do 'lam' da
+# pseudo-verossimilhança): pequena o bastante para que o viés nos parâmetros bem
+# determinados fique desprezível, e só segura as direções que divergiriam
+LAM_EXATO = 1e-4
+
+@njit(cache=True)
+def energias_gray(h, J):
+    """Energias dos 2^N estados na ordem do código de Gray (bit i = 1 ⇔ s_i = +1)."""
+    N = h.shape[0]
+    n_estados = 1 << N
+    E = np.empty(n_estados)
+    s = -np.ones(N)
+    f = np.zeros(N)  # campo de acoplamento f_j = Σ_k J_jk s_k
+    for j in range(N):
+        for k in range(N):
+            f[j] += J[j, k] * s[k]
+    e = 0.0
+    for i in range(N):
+        e -= h[i] * s[i] + 0.5 * s[i] * f[i]
+    E[0] = e
+    for k in range(1, n_estados):
+        # O spin invertido no passo k é o bit menos significativo ligado de k
+        i = 0
+        while (k >> i) & 1 == 0:
+            i += 1
+        e += 2.0 * s[i] * (h[i] + f[i])
+        s[i] = -s[i]
+        for j in range(N):
+            f[j] += 2.0 * s[i] * J[j, i]
+        E[k] = e
+    return E
+
+def estados_gray(N):
+    """Tabela int8 [2^N, N] dos estados na mesma ordem de energias_gray."""
+    k = np.arange(1 << N, dtype=np.int64)
+    g = k ^ (k >> 1)
+    return (((g[:, None] >> np.arange(N)) & 1) * 2 - 1).astype(np.int8)
+
+def momentos_exatos(h, J, estados, bloco=BLOCO_ESTADOS):
+    """(log Z, ⟨s_i⟩, ⟨s_i s_j⟩) exatos para os parâmetros (h, J denso simétrico)."""
+    E = energias_gray(np.ascontiguousarray(h, dtype=np.float64), np.ascontiguousarray(J, dtype=np.float64))
+    log_z = logsumexp(-E)
+    p = np.exp(-E - log_z)
+    N = len(h)
+    medias = np.zeros(N)
+    pares = np.zeros((N, N))
+    for inicio in range(0, len(p), bloco):
+        S = estados[inicio:inicio + bloco].astype(np.float64)
+        pb = p[inicio:inicio + bloco]
+        medias += pb @ S
+        pares += (S * pb[:, None]).T @ S
+    return log_z, medias, pares
+
+def ajustar_exato(observaveis, N, arestas=None, chute_inicial=None, lam=LAM_EXATO, maxiter=1000, tol=1e-10,
+                  callback=None):
+    """
+    Ajusta os multiplicadores por máxima verossimilhança exata.
+
+    'observaveis' no layout do ConIII: [⟨s_i⟩, ⟨s_i s_j⟩ (i<j)] ou, com 'arestas',
+    [⟨s_i⟩, ⟨s_u s_v⟩ por aresta]. 'lam' é a força da penalidade L2 sobre todos os
+    multiplicadores. 'callback(iteracao, theta)' é chamado a cada iteração do L-BFGS.
+    Retorna (multiplicadores, log Z, resultado do L-BFGS).
+    """
+    if N > N_MAX_EXATO:
+        raise ValueError(f"Enumeração exata limitada a N ≤ {N_MAX_EXATO} (N={N}).")
+    if arestas is None:
+        iu, ju = indices_triu(N)
+    else:
+        arestas = np.asarray(arestas, dtype=np.int64).reshape(-1, 2)
+        iu, ju = arestas[:, 0], arestas[:, 1]
+    observaveis = np.asarray(observaveis, dtype=np.float64)
+    estados = estados_gray(N)
+
+    def objetivo(theta):
+        h = theta[:N]
+        J = np.zeros((N, N))
+        J[iu, ju] = theta[N:]
+        J[ju, iu] = theta[N:]
+        log_z, medias, pares = momentos_exatos(h, J, estados)
+        modelo = np.concatenate((medias, pares[iu, ju]))
+        # -log-verossimilhança média penalizada: log Z - θ·⟨obs⟩_emp + (lam/2)·||θ||²
+        return (log_z - theta @ observaveis + 0.5 * lam * (theta @ theta),
+                modelo - observaveis + lam * theta)
+
+    x0 = np.zeros(N + len(iu)) if chute_inicial is None else np.asarray(chute_inicial, dtype=np.float64)
+    iteracao = [0]
+
+    def a_cada_iteracao(theta):
+        iteracao[0] += 1
+        callback(iteracao[0], theta)
+
+    res = minimize(objetivo, x0, jac=True, method="L-BFGS-B", options={"maxiter": maxiter, "ftol": tol, "gtol": 1e-9},
+                   callback=a_cada_iteracao if callback is not None else None)
+    return res.x, float(res.fun + res.x @ observaveis - 0.5 * lam * (res.x @ res.x)), res
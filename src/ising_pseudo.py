@@ -0,0 +1,134 @@
+"""
+Pseudo-verossimilhança regularizada (L1/L2) para o modelo de Ising.
+
+Cada spin r é ajustado de forma independente por uma regressão logística de s_r
+sobre os demais spins: P(s_r | s_resto) = σ(2 s_r (h_r + Σ_j J_rj s_j)). As
+regressões rodam em paralelo em um pool de processos (a matriz de spins vai uma
+única vez para cada trabalhador) e J é simetrizado no final: J = (J_r· + J_·r) / 2.
+
+'lam' é a força da regularização aplicada apenas aos acoplamentos:
+L2 → (lam/2)·||J_r||², L1 → lam·||J_r||₁ (via J = p - q, p, q ≥ 0 no L-BFGS-B).
+Com 'arestas', cada regressão usa apenas os vizinhos do spin no grafo (modo esparso).
+"""
+
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.optimize import minimize
+from scipy.special import expit, log_expit
+
+from .ising_sampler import estrutura_esparsa
+from .ising_stats import indices_triu
+
+# Matriz de spins (float64, ±1) e vizinhança, carregadas uma vez por processo trabalhador
+_X = None
+_VIZINHOS = None
+
+def _init_pseudo_worker(X, vizinhos):
+    global _X, _VIZINHOS
+    _X = X
+    _VIZINHOS = vizinhos
+
+def _colunas(r, N):
+    if _VIZINHOS is None:
+        return np.concatenate((np.arange(r), np.arange(r + 1, N)))
+    indptr, nbr = _VIZINHOS
+    return nbr[indptr[r]:indptr[r + 1]]
+
+def _ajustar_spin(r, lam, penalidade, maxiter):
+    """Regressão logística regularizada do spin r. Retorna (r, h_r, colunas, J_r)."""
+    R, N = _X.shape
+    cols = _colunas(r, N)
+    F = _X[:, cols]
+    y = _X[:, r]
+    k = len(cols)
+
+    def nll_grad(h, J):
+        margem = 2.0 * y * (h + F @ J)
+        nll = -log_expit(margem).mean()
+        g = -2.0 * y * expit(-margem) / R
+        return nll, g.sum(), F.T @ g
+
+    if penalidade == "l1":
+        def objetivo(w):
+            h, p, q = w[0], w[1:k + 1], w[k + 1:]
+            nll, gh, gJ = nll_grad(h, p - q)
+            return nll + lam * (p.sum() + q.sum()), np.concatenate(([gh], gJ + lam, -gJ + lam))
+        limites = [(None, None)] + [(0.0, None)] * (2 * k)
+        res = minimize(objetivo, np.zeros(2 * k + 1), jac=True, method="L-BFGS-B", bounds=limites,
+                       options={"maxiter": maxiter})
+        J = res.x[1:k + 1] - res.x[k + 1:]
+    else:
+        def objetivo(w):
+            h, J = w[0], w[1:]
+            nll, gh, gJ = nll_grad(h, J)
+            return nll + 0.5 * lam * (J @ J), np.concatenate(([gh], gJ + lam * J))
+        res = minimize(objetivo, np.zeros(k + 1), jac=True, method="L-BFGS-B", options={"maxiter": maxiter})
+        J = res.x[1:]
+    return r, float(res.x[0]), cols, J
+
+def _ajustar_lote(indices, lam, penalidade, maxiter):
+    return [_ajustar_spin(r, lam, penalidade, maxiter) for r in indices]
+
+def pseudo_verossimilhanca(spin_matrix, lam=0.01, penalidade="l2", arestas=None, n_jobs=None, maxiter=500,
+                           progresso=None):
+    """
+    Ajusta (h, J) por pseudo-verossimilhança regularizada em paralelo.
+    'progresso(concluidos, N)' é chamado a cada lote de spins ajustado (as iterações
+    do L-BFGS de cada spin rodam nos subprocessos e não são reportadas).
+
+    Retorna (h [N], J) com J denso simétrico (N x N) ou, com 'arestas', o vetor J_e
+    (um acoplamento por aresta, na ordem dada).
+    """
+    if penalidade not in ("l1", "l2"):
+        raise ValueError(f"Penalidade desconhecida: {penalidade}")
+    X = np.where(np.asarray(spin_matrix) > 0, 1.0, -1.0)
+    R, N = X.shape
+    vizinhos = None
+    if arestas is not None:
+        arestas = np.asarray(arestas, dtype=np.int64).reshape(-1, 2)
+        indptr, nbr, _ = estrutura_esparsa(N, arestas)
+        vizinhos = (indptr, nbr)
+
+    n_jobs = n_jobs or max(1, mp.cpu_count() - 1)
+    # Lotes de spins por tarefa para amortizar o custo de despacho
+    lotes = [list(range(i, N, n_jobs * 4)) for i in range(min(N, n_jobs * 4))]
+
+    h = np.zeros(N)
+    J_dir = np.zeros((N, N)) if arestas is None else {}
+    def coletar(lotes_ajustados):
+        concluidos = 0
+        for lote in lotes_ajustados:
+            concluidos += len(lote)
+            if progresso is not None:
+                progresso(concluidos, N)
+            yield lote
+
+    if n_jobs == 1:
+        _init_pseudo_worker(X, vizinhos)
+        resultados = list(coletar(_ajustar_lote(lote, lam, penalidade, maxiter) for lote in lotes))
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_pseudo_worker,
+                                 initargs=(X, vizinhos)) as pool:
+            resultados = list(coletar(pool.map(_ajustar_lote, lotes, [lam] * len(lotes),
+                                               [penalidade] * len(lotes), [maxiter] * len(lotes))))
+
+    for lote in resultados:
+        for r, h_r, cols, J_r in lote:
+            h[r] = h_r
+            if arestas is None:
+                J_dir[r, cols] = J_r
+            else:
+                J_dir[r] = dict(zip(cols.tolist(), J_r.tolist()))
+
+    if arestas is None:
+        J = 0.5 * (J_dir + J_dir.T)
+        np.fill_diagonal(J, 0.0)
+        return h, J
+    J_e = np.array([0.5 * (J_dir[u][v] + J_dir[v][u]) for u, v in arestas.tolist()])
+    return h, J_e
+
+def empacotar_multiplicadores(h, J):
+    """Vetor [h, J_flat] (ordem i < j) no layout dos solvers do ConIII."""
+    return np.concatenate((h, J[indices_triu(len(h))]))
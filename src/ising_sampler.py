@@ -0,0 +1,361 @@
+"""
+Amostrador nativo (Numba) para o modelo de Ising e laço MCH próprio.
+
+Energia na convenção do ConIII: E(s) = -(Σ h_i s_i + Σ_{i<j} J_ij s_j s_i),
+multiplicadores empacotados como [h, J_flat] com J_flat na ordem (i < j).
+
+- Várias cadeias Metropolis/Gibbs independentes rodam em paralelo (prange),
+  operando in-place sobre spins int8, sem cópias de dtype a cada chamada;
+- calc_observables_int8 / mch_approx_int8 consomem as amostras int8 diretamente;
+- MCHNumba reproduz o laço de MCH.solve do ConIII (mesmos critérios de parada e o
+  mesmo gancho custom_convergence_f), servindo de backend "numba" em inferir_mch;
+- O modo esparso restringe J às arestas do grafo da comunidade: multiplicadores
+  [h, J_e] com E acoplamentos, e kernels que percorrem apenas essas arestas.
+"""
+
+import numpy as np
+import numba
+from numba import njit, prange
+
+from .ising_stats import obter_estatisticas, observaveis_arestas
+
+@njit(cache=True)
+def _unpack_multipliers(multipliers, N):
+    h = multipliers[:N].copy()
+    J = np.zeros((N, N))
+    k = N
+    for i in range(N):
+        for j in range(i + 1, N):
+            J[i, j] = multipliers[k]
+            J[j, i] = multipliers[k]
+            k += 1
+    return h, J
+
+@njit(cache=True)
+def _local_field(s, h, J, i):
+    f = h[i]
+    for j in range(s.shape[0]):
+        f += J[i, j] * s[j]
+    return f
+
+@njit(cache=True)
+def _chain_steps(s, h, J, n_steps, gibbs):
+    """Executa n_steps tentativas de flip de sítio único em uma cadeia (in-place)."""
+    N = s.shape[0]
+    for _ in range(n_steps):
+        i = np.random.randint(N)
+        f = _local_field(s, h, J, i)
+        if gibbs:
+            # Banho térmico: s_i = +1 com probabilidade 1 / (1 + exp(-2 f))
+            s[i] = 1 if np.random.random() < 1.0 / (1.0 + np.exp(-2.0 * f)) else -1
+        else:
+            dE = 2.0 * s[i] * f
+            if dE <= 0.0 or np.random.random() < np.exp(-dE):
+                s[i] = -s[i]
+
+@njit(parallel=True, cache=True)
+def _sample_chains(states, h, J, samples_per_chain, burn_in, n_iters, seeds, gibbs):
+    """
+    states: [C, N] int8 (um estado por cadeia, atualizado in-place).
+    Retorna amostras int8 [C * samples_per_chain, N], agrupadas por cadeia.
+    """
+    C, N = states.shape
+    out = np.empty((C * samples_per_chain, N), dtype=np.int8)
+    for c in prange(C):
+        np.random.seed(seeds[c])
+        s = states[c]
+        _chain_steps(s, h, J, burn_in, gibbs)
+        for k in range(samples_per_chain):
+            _chain_steps(s, h, J, n_iters, gibbs)
+            out[c * samples_per_chain + k, :] = s
+    return out
+
+@njit(parallel=True, cache=True)
+def calc_observables_int8(samples):
+    """Observáveis por amostra [s_i, s_i s_j (i<j)] a partir de spins int8."""
+    R, N = samples.shape
+    n_obs = N + N * (N - 1) // 2
+    obs = np.empty((R, n_obs))
+    for r in prange(R):
+        for i in range(N):
+            obs[r, i] = samples[r, i]
+        k = N
+        for i in range(N):
+            si = samples[r, i]
+            for j in range(i + 1, N):
+                obs[r, k] = si * samples[r, j]
+                k += 1
+    return obs
+
+@njit(parallel=True, cache=True)
+def mean_observables_int8(samples):
+    """Médias dos observáveis sem materializar a matriz [R, n_obs]."""
+    R, N = samples.shape
+    n_obs = N + N * (N - 1) // 2
+    out = np.zeros(n_obs)
+    for i in prange(N):
+        acc = 0.0
+        for r in range(R):
+            acc += samples[r, i]
+        out[i] = acc / R
+        base = N + i * N - i * (i + 1) // 2
+        for j in range(i + 1, N):
+            acc = 0.0
+            for r in range(R):
+                acc += samples[r, i] * samples[r, j]
+            out[base + j - i - 1] = acc / R
+    return out
+
+@njit(parallel=True, cache=True)
+def mch_approx_int8(samples, dlamda):
+    """
+    Aproximação MCH: médias dos observáveis sob multiplicadores λ + dλ, reponderando
+    as amostras de λ por exp(obs · dλ) (mesma fórmula de mch_approx do ConIII).
+    """
+    R, N = samples.shape
+    n_obs = dlamda.shape[0]
+    logw = np.empty(R)
+    for r in prange(R):
+        acc = 0.0
+        for i in range(N):
+            acc += dlamda[i] * samples[r, i]
+        k = N
+        for i in range(N):
+            si = samples[r, i]
+            for j in range(i + 1, N):
+                acc += dlamda[k] * si * samples[r, j]
+                k += 1
+        logw[r] = acc
+    w = np.exp(logw - logw.max())
+    w /= w.sum()
+
+    out = np.zeros(n_obs)
+    for i in prange(N):
+        acc = 0.0
+        for r in range(R):
+            acc += w[r] * samples[r, i]
+        out[i] = acc
+        base = N + i * N - i * (i + 1) // 2
+        for j in range(i + 1, N):
+            acc = 0.0
+            for r in range(R):
+                acc += w[r] * samples[r, i] * samples[r, j]
+            out[base + j - i - 1] = acc
+    return out
+
+# ─── Kernels esparsos: acoplamentos apenas nas arestas (u < v) do grafo ───────
+
+def estrutura_esparsa(N, arestas):
+    """
+    Adjacência CSR das arestas de acoplamento: (indptr, vizinho, id_da_aresta),
+    usada para calcular o campo local de cada spin em O(grau).
+    """
+    arestas = np.asarray(arestas, dtype=np.int64).reshape(-1, 2)
+    E = len(arestas)
+    src = np.concatenate((arestas[:, 0], arestas[:, 1]))
+    dst = np.concatenate((arestas[:, 1], arestas[:, 0]))
+    eid = np.concatenate((np.arange(E), np.arange(E)))
+    order = np.argsort(src, kind="stable")
+    indptr = np.zeros(N + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=N), out=indptr[1:])
+    return indptr, dst[order], eid[order]
+
+@njit(cache=True)
+def _chain_steps_sparse(s, h, Je, indptr, nbr, eid, n_steps, gibbs):
+    N = s.shape[0]
+    for _ in range(n_steps):
+        i = np.random.randint(N)
+        f = h[i]
+        for k in range(indptr[i], indptr[i + 1]):
+            f += Je[eid[k]] * s[nbr[k]]
+        if gibbs:
+            s[i] = 1 if np.random.random() < 1.0 / (1.0 + np.exp(-2.0 * f)) else -1
+        else:
+            dE = 2.0 * s[i] * f
+            if dE <= 0.0 or np.random.random() < np.exp(-dE):
+                s[i] = -s[i]
+
+@njit(parallel=True, cache=True)
+def _sample_chains_sparse(states, h, Je, indptr, nbr, eid, samples_per_chain, burn_in, n_iters, seeds, gibbs):
+    C, N = states.shape
+    out = np.empty((C * samples_per_chain, N), dtype=np.int8)
+    for c in prange(C):
+        np.random.seed(seeds[c])
+        s = states[c]
+        _chain_steps_sparse(s, h, Je, indptr, nbr, eid, burn_in, gibbs)
+        for k in range(samples_per_chain):
+            _chain_steps_sparse(s, h, Je, indptr, nbr, eid, n_iters, gibbs)
+            out[c * samples_per_chain + k, :] = s
+    return out
+
+@njit(parallel=True, cache=True)
+def mean_observables_sparse(samples, arestas):
+    """Médias de [s_i, s_u s_v por aresta] a partir de spins int8."""
+    R, N = samples.shape
+    E = arestas.shape[0]
+    out = np.zeros(N + E)
+    for i in prange(N):
+        acc = 0.0
+        for r in range(R):
+            acc += samples[r, i]
+        out[i] = acc / R
+    for e in prange(E):
+        u, v = arestas[e, 0], arestas[e, 1]
+        acc = 0.0
+        for r in range(R):
+            acc += samples[r, u] * samples[r, v]
+        out[N + e] = acc / R
+    return out
+
+@njit(parallel=True, cache=True)
+def mch_approx_sparse(samples, arestas, dlamda):
+    """Aproximação MCH do modelo esparso (pesos exp(obs · dλ) sobre campos e arestas)."""
+    R, N = samples.shape
+    E = arestas.shape[0]
+    logw = np.empty(R)
+    for r in prange(R):
+        acc = 0.0
+        for i in range(N):
+            acc += dlamda[i] * samples[r, i]
+        for e in range(E):
+            acc += dlamda[N + e] * samples[r, arestas[e, 0]] * samples[r, arestas[e, 1]]
+        logw[r] = acc
+    w = np.exp(logw - logw.max())
+    w /= w.sum()
+
+    out = np.zeros(N + E)
+    for i in prange(N):
+        acc = 0.0
+        for r in range(R):
+            acc += w[r] * samples[r, i]
+        out[i] = acc
+    for e in prange(E):
+        u, v = arestas[e, 0], arestas[e, 1]
+        acc = 0.0
+        for r in range(R):
+            acc += w[r] * samples[r, u] * samples[r, v]
+        out[N + e] = acc
+    return out
+
+class IsingSampler:
+    """
+    Amostrador multi-cadeia com estado persistente: cada chamada continua as cadeias
+    de onde pararam (o burn-in inicial é aplicado apenas uma vez por padrão).
+
+    Com 'arestas' (int [E, 2], i < j) o modelo é esparso: multiplicadores [h, J_e]
+    com um acoplamento por aresta, e o campo local custa O(grau) em vez de O(N).
+    """
+    def __init__(self, N, n_chains=None, method="metropolis", seed=None, arestas=None):
+        if method not in ("metropolis", "gibbs"):
+            raise ValueError(f"Método de amostragem desconhecido: {method}")
+        self.N = N
+        self.arestas = None if arestas is None else np.ascontiguousarray(arestas, dtype=np.int64)
+        self._csr = None if arestas is None else estrutura_esparsa(N, self.arestas)
+        self.n_chains = n_chains or max(1, numba.get_num_threads())
+        self.gibbs = method == "gibbs"
+        self.rng = np.random.default_rng(seed)
+        self.states = self.rng.choice(np.array([-1, 1], dtype=np.int8), size=(self.n_chains, N))
+        self._aquecido = False
+
+    def sample(self, multipliers, n_samples, burn_in=1000, n_iters=30, reburn=False):
+        """Gera n_samples estados int8 [n_samples, N] para os multiplicadores [h, J_flat] (ou [h, J_e])."""
+        multipliers = np.asarray(multipliers, dtype=np.float64)
+        per_chain = -(-n_samples // self.n_chains)
+        burn = burn_in if (reburn or not self._aquecido) else 0
+        seeds = self.rng.integers(0, 2**31 - 1, size=self.n_chains)
+        if self._csr is not None:
+            h, Je = multipliers[:self.N], multipliers[self.N:]
+            out = _sample_chains_sparse(self.states, h, Je, *self._csr, per_chain, burn, n_iters, seeds, self.gibbs)
+        else:
+            h, J = _unpack_multipliers(multipliers, self.N)
+            out = _sample_chains(self.states, h, J, per_chain, burn, n_iters, seeds, self.gibbs)
+        self._aquecido = True
+        return out[:n_samples]
+
+class MCHNumba:
+    """
+    Laço MCH (Broderick et al. 2007) sobre o amostrador Numba, com a mesma interface
+    usada por inferir_mch: solve(initial_guess, maxiter, custom_convergence_f, burn_in,
+    n_iters, tol, tolNorm) e o vetor corrente em self._multipliers.
+
+    Com 'arestas', ajusta apenas os acoplamentos das arestas do grafo (modo esparso).
+    """
+    def __init__(self, sample, sample_size=1000, n_cpus=None, method="metropolis", seed=None, arestas=None):
+        """
+        sample: matriz de spins (R x N) ou, como no ConIII, apenas o tamanho N do
+        sistema — nesse caso os observáveis-alvo são passados em solve(constraints=...).
+        """
+        self.arestas = None if arestas is None else np.ascontiguousarray(arestas, dtype=np.int64)
+        if n_cpus:
+            numba.set_num_threads(max(1, min(n_cpus, numba.config.NUMBA_NUM_THREADS)))
+        if np.isscalar(sample):
+            self.n = int(sample)
+            self.constraints = None
+        else:
+            self.n = np.shape(sample)[1]
+            if self.arestas is None:
+                self.constraints = obter_estatisticas(np.asarray(sample))["observaveis"]
+            else:
+                self.constraints = observaveis_arestas(np.asarray(sample), self.arestas)
+        self.sampleSize = sample_size
+        self.sampler = IsingSampler(self.n, method=method, seed=seed, arestas=self.arestas)
+        self.sample = None
+        self._multipliers = None
+
+    def _generate(self, n_iters, burn_in):
+        self.sample = self.sampler.sample(self._multipliers, self.sampleSize, burn_in, n_iters)
+        if self.arestas is not None:
+            return mean_observables_sparse(self.sample, self.arestas)
+        return mean_observables_int8(self.sample)
+
+    def _mch_approx(self, dlamda):
+        if self.arestas is not None:
+            return mch_approx_sparse(self.sample, self.arestas, dlamda)
+        return mch_approx_int8(self.sample, dlamda)
+
+    def learn_parameters_mch(self, est, constraints, maxdlamda=1, maxdlamdaNorm=1, maxLearningSteps=50, eta=1):
+        dlamda = np.zeros(constraints.size)
+        distance = 1.0
+        for _ in range(maxLearningSteps + 1):
+            dlamda += -(est - constraints) * min(distance, 1.0) * eta
+            est = self._mch_approx(dlamda)
+            distance = np.linalg.norm(est - constraints)
+            if np.linalg.norm(dlamda) > maxdlamdaNorm or np.any(np.abs(dlamda) > maxdlamda):
+                break
+        self._multipliers += dlamda
+        return est
+
+    def solve(self, initial_guess=None, constraints=None, tol=None, tolNorm=None, n_iters=30, burn_in=30,
+              maxiter=10, custom_convergence_f=None, iprint=False, full_output=False,
+              learn_params_kwargs={'maxdlamda': 1, 'eta': 1}):
+        constraints = self.constraints if constraints is None else np.asarray(constraints, dtype=np.float64)
+        self._multipliers = np.array(initial_guess, dtype=np.float64) if initial_guess is not None \
+            else np.zeros(len(constraints))
+        tol = tol or 1 / np.sqrt(self.sampleSize)
+        tolNorm = tolNorm or np.sqrt(1 / self.sampleSize) * len(self._multipliers)
+        if custom_convergence_f is None:
+            custom_convergence_f = lambda i: learn_params_kwargs
+
+        errors = []
+        est = self._generate(n_iters, burn_in)
+        errors.append(est - constraints)
+
+        counter = 0
+        errflag = 1
+        settings = custom_convergence_f(counter)
+        while True:
+            self.learn_parameters_mch(est, constraints, **(settings[0] if isinstance(settings, tuple) else settings))
+            est = self._generate(n_iters, burn_in)
+            counter += 1
+            errors.append(est - constraints)
+            if np.linalg.norm(errors[-1]) < tolNorm and np.all(np.abs(errors[-1]) < tol):
+                errflag = 0
+                break
+            if counter > maxiter:
+                break
+            settings = custom_convergence_f(counter)
+
+        self.multipliers = self._multipliers.copy()
+        if full_output:
+            return self.multipliers, errflag, np.vstack(errors)
+        return self.multipliers
@@ -0,0 +1,126 @@
+"""
+Estatísticas suficientes do modelo de Ising a partir da matriz de spins (R x N).
+
+Médias ⟨s_i⟩, correlações ⟨s_i s_j⟩ e covariâncias são obtidas de uma única
+passada: X^T X em float32 (exato para ±1), acumulado em float64 por blocos de
+linhas para limitar a memória temporária. O resultado fica em cache (memória e,
+opcionalmente, disco) e é reutilizado pelos solvers, pelo RMSE e pela Figura 2.
+"""
+
+import os
+import hashlib
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+# Linhas por bloco do produto X^T X (float32 é exato enquanto o bloco tiver < 2^24 linhas)
+BLOCO_LINHAS = 65536
+
+# Matrizes mantidas em memória (LRU): cada entrada guarda dois arrays N x N float64
+MAX_CACHE_ESTATISTICAS = 2
+
+_cache = OrderedDict()
+
+@lru_cache(maxsize=8)
+def indices_triu(N):
+    """
+    Índices (i, j), i < j, do triângulo superior na ordem dos multiplicadores do
+    ConIII — o layout empacotado de J. Calculados uma vez por N e somente leitura.
+    """
+    iu, ju = np.triu_indices(N, k=1)
+    iu.flags.writeable = False
+    ju.flags.writeable = False
+    return iu, ju
+
+def chave_matriz(spin_matrix):
+    """Hash do conteúdo da matriz de spins (forma + sinais), independente do dtype."""
+    sinais = np.ascontiguousarray(spin_matrix > 0)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(sinais.shape).encode())
+    h.update(np.packbits(sinais).tobytes())
+    return h.hexdigest()
+
+def calcular_estatisticas(spin_matrix, bloco_linhas=BLOCO_LINHAS):
+    """
+    Calcula (sem cache) médias, correlações de pares e covariância (ddof=1, como np.cov).
+    'observaveis' segue o layout do ConIII: [⟨s_i⟩, ⟨s_i s_j⟩ (i<j)].
+    """
+    R, N = spin_matrix.shape
+    soma = np.zeros(N, dtype=np.float64)
+    pares = np.zeros((N, N), dtype=np.float64)
+    for inicio in range(0, R, bloco_linhas):
+        X = np.where(spin_matrix[inicio:inicio + bloco_linhas] > 0, 1, -1).astype(np.float32)
+        soma += X.sum(axis=0, dtype=np.float64)
+        pares += (X.T @ X).astype(np.float64)
+
+    medias = soma / R
+    pares /= R
+    covariancia = (pares - np.outer(medias, medias)) * (R / (R - 1)) if R > 1 else np.zeros((N, N))
+    iu = indices_triu(N)
+    return {
+        "R": R,
+        "N": N,
+        "medias": medias,
+        "correlacoes": pares,
+        "covariancia": covariancia,
+        "observaveis": np.concatenate((medias, pares[iu])),
+    }
+
+def caminho_estatisticas(matriz_path):
+    """Caminho do .npz de estatísticas ao lado de um CSV de matriz de estados."""
+    return os.path.splitext(matriz_path)[0] + "_estatisticas.npz"
+
+def _guardar(chave, stats):
+    _cache[chave] = stats
+    _cache.move_to_end(chave)
+    while len(_cache) > MAX_CACHE_ESTATISTICAS:
+        _cache.popitem(last=False)
+
+def obter_estatisticas(spin_matrix, cache_path=None):
+    """
+    Estatísticas da matriz com cache: memória (LRU por hash do conteúdo, até
+    MAX_CACHE_ESTATISTICAS matrizes) e, se 'cache_path' for dado, um .npz ao lado
+    da matriz de estados (ver caminho_estatisticas).
+    """
+    chave = chave_matriz(spin_matrix)
+    if chave in _cache:
+        _cache.move_to_end(chave)
+        return _cache[chave]
+
+    if cache_path and os.path.exists(cache_path):
+        with np.load(cache_path) as dados:
+            if str(dados["chave"]) == chave:
+                stats = {k: dados[k] for k in ("medias", "correlacoes", "covariancia", "observaveis")}
+                stats["R"], stats["N"] = spin_matrix.shape
+                _guardar(chave, stats)
+                return stats
+
+    stats = calcular_estatisticas(spin_matrix)
+    _guardar(chave, stats)
+    if cache_path:
+        # Escrita atômica: jobs em lote sobre a mesma matriz podem gravar ao mesmo tempo
+        tmp = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, chave=chave, **{k: stats[k] for k in ("medias", "correlacoes", "covariancia", "observaveis")})
+        os.replace(tmp, cache_path)
+    return stats
+
+def rmse_medias(m_empirico, h_inferido):
+    """RMSE entre as médias empíricas e tanh(h) (critério de Schneidman et al. 2006)."""
+    return float(np.sqrt(np.mean((m_empirico - np.tanh(h_inferido)) ** 2)))
+
+def observaveis_arestas(spin_matrix, arestas, bloco_linhas=BLOCO_LINHAS):
+    """
+    Observáveis do modelo esparso: [⟨s_i⟩, ⟨s_u s_v⟩ para cada aresta (u, v)], em
+    O(R·E) sem formar a matriz N x N de correlações.
+    """
+    R, N = spin_matrix.shape
+    u, v = arestas[:, 0], arestas[:, 1]
+    soma = np.zeros(N, dtype=np.float64)
+    soma_pares = np.zeros(len(arestas), dtype=np.float64)
+    for inicio in range(0, R, bloco_linhas):
+        X = np.where(spin_matrix[inicio:inicio + bloco_linhas] > 0, 1, -1).astype(np.int8)
+        soma += X.sum(axis=0, dtype=np.float64)
+        soma_pares += (X[:, u] * X[:, v]).sum(axis=0, dtype=np.float64)
+    return np.concatenate((soma, soma_pares)) / R
@@ -0,0 +1,175 @@
+"""
+Validação gerativa dos modelos de Ising inferidos, com várias cadeias em paralelo.
+
+As cadeias (amostrador Numba de src/ising_sampler.py, uma por thread) partem de
+estados aleatórios independentes, o que permite diagnosticar a convergência:
+
+- R-hat (split, Gelman-Rubin) e tamanho efetivo de amostra (ESS, autocorrelação via
+  FFT com a soma de pares positivos de Geyer) para a energia e cada magnetização;
+- comparação sintético vs empírico de médias ⟨s_i⟩, correlações conectadas C_ij e
+  correlações conectadas de três pontos T_ijk (todas as triplas para N pequeno,
+  uma amostra fixa de triplas caso contrário), com estimadores vetorizados.
+"""
+
+from math import comb
+from itertools import combinations
+
+import numpy as np
+
+from .ising_sampler import IsingSampler
+from .ising_stats import calcular_estatisticas, indices_triu, BLOCO_LINHAS
+
+# Limiar usual de R-hat acima do qual as cadeias não se misturaram
+LIMIAR_RHAT = 1.1
+# Número máximo de triplas (i, j, k) nas correlações de três pontos
+MAX_TRIPLAS = 5000
+
+def amostrar_cadeias(multipliers, N, n_cadeias, amostras_por_cadeia, burn_in=500, n_iters=10,
+                     arestas=None, seed=None):
+    """Amostras int8 [C, T, N]: C cadeias independentes com T amostras cada."""
+    sampler = IsingSampler(N, n_chains=n_cadeias, seed=seed, arestas=arestas)
+    amostras = sampler.sample(multipliers, n_cadeias * amostras_por_cadeia, burn_in=burn_in, n_iters=n_iters)
+    return amostras.reshape(n_cadeias, amostras_por_cadeia, N)
+
+def energias(amostras, multipliers, N, arestas=None):
+    """E(s) = -(h·s + Σ_{i<j} J_ij s_i s_j) para amostras [..., N]."""
+    S = amostras.reshape(-1, N).astype(np.float64)
+    h, j = multipliers[:N], multipliers[N:]
+    if arestas is None:
+        iu, ju = indices_triu(N)
+        J = np.zeros((N, N))
+        J[iu, ju] = j
+        pares = ((S @ J) * S).sum(axis=1)
+    else:
+        pares = (S[:, arestas[:, 0]] * S[:, arestas[:, 1]]) @ j
+    return (-(S @ h) - pares).reshape(amostras.shape[:-1])
+
+def _dividir_cadeias(tracos):
+    """[C, T, K] → [2C, T/2, K] (split R-hat: detecta também tendência dentro da cadeia)."""
+    meio = tracos.shape[1] // 2
+    return np.concatenate((tracos[:, :meio], tracos[:, meio:2 * meio]), axis=0)
+
+def rhat(tracos):
+    """Split R-hat por coluna de 'tracos' [C, T, K]. Colunas constantes recebem 1."""
+    x = _dividir_cadeias(np.asarray(tracos, dtype=np.float64))
+    n = x.shape[1]
+    medias = x.mean(axis=1)
+    W = x.var(axis=1, ddof=1).mean(axis=0)
+    B = n * medias.var(axis=0, ddof=1)
+    var_mais = (n - 1) / n * W + B / n
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r = np.sqrt(var_mais / W)
+    r[var_mais == 0] = 1.0
+    return r
+
+def ess(tracos):
+    """
+    Tamanho efetivo de amostra por coluna de 'tracos' [C, T, K] (estimador multi-cadeia
+    do Stan): autocovariâncias via FFT e soma dos pares ρ_{2k} + ρ_{2k+1} enquanto positivos.
+    """
+    x = np.asarray(tracos, dtype=np.float64)
+    C, T, K = x.shape
+    xc = x - x.mean(axis=1, keepdims=True)
+    f = np.fft.rfft(xc, n=2 * T, axis=1)
+    acov = np.fft.irfft(f * np.conj(f), n=2 * T, axis=1)[:, :T] / T
+    W = (acov[:, 0] * T / (T - 1)).mean(axis=0)
+    B = T * x.mean(axis=1).var(axis=0, ddof=1) if C > 1 else np.zeros(K)
+    var_mais = (T - 1) / T * W + B / T
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rho = 1.0 - (W - acov.mean(axis=0)) / var_mais  # [T, K]
+    n_pares = T // 2
+    pares = rho[:2 * n_pares:2] + rho[1:2 * n_pares:2]  # [T/2, K]
+    positivos = np.cumprod(pares > 0, axis=0).astype(bool)
+    tau = -1.0 + 2.0 * np.where(positivos, pares, 0.0).sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        resultado = C * T / np.maximum(tau, 1.0 / np.log10(max(C * T, 10)))
+    resultado[~np.isfinite(resultado) | (var_mais == 0)] = C * T
+    return resultado
+
+def escolher_triplas(N, max_triplas=MAX_TRIPLAS, seed=0):
+    """Triplas i < j < k: todas se couberem em 'max_triplas', senão uma amostra aleatória fixa."""
+    if N < 3:
+        return np.empty((0, 3), dtype=np.int64)
+    if comb(N, 3) <= max_triplas:
+        return np.array(list(combinations(range(N), 3)), dtype=np.int64)
+    rng = np.random.default_rng(seed)
+    # Sorteio com reposição e descarte das linhas com índices repetidos (raras para N grande)
+    triplas = np.sort(rng.integers(0, N, size=(2 * max_triplas, 3)), axis=1)
+    distintas = (triplas[:, 0] < triplas[:, 1]) & (triplas[:, 1] < triplas[:, 2])
+    triplas = np.unique(triplas[distintas], axis=0)
+    triplas = triplas[rng.permutation(len(triplas))[:max_triplas]]
+    return triplas[np.lexsort(triplas.T[::-1])]
+
+def correlacoes_tres_pontos(amostras, medias, triplas, bloco_linhas=BLOCO_LINHAS):
+    """T_ijk = ⟨(s_i - m_i)(s_j - m_j)(s_k - m_k)⟩ para cada tripla, em blocos de linhas."""
+    X = amostras.reshape(-1, amostras.shape[-1])
+    R = X.shape[0]
+    soma = np.zeros(len(triplas))
+    for inicio in range(0, R, bloco_linhas):
+        Xc = np.where(X[inicio:inicio + bloco_linhas] > 0, 1.0, -1.0) - medias
+        soma += (Xc[:, triplas[:, 0]] * Xc[:, triplas[:, 1]] * Xc[:, triplas[:, 2]]).sum(axis=0)
+    return soma / R
+
+def _comparar(sintetico, empirico):
+    """RMSE, correlação de Pearson e erro máximo entre as estatísticas sintéticas e empíricas."""
+    if len(empirico) == 0:
+        return {"rmse": np.nan, "pearson": np.nan, "max_erro": np.nan}
+    erro = sintetico - empirico
+    pearson = np.corrcoef(sintetico, empirico)[0, 1] if np.std(sintetico) > 0 and np.std(empirico) > 0 else np.nan
+    return {"rmse": float(np.sqrt(np.mean(erro ** 2))), "pearson": float(pearson), "max_erro": float(np.abs(erro).max())}
+
+def validar_multiplicadores(multipliers, N, spin_matrix=None, arestas=None, n_cadeias=4,
+                            amostras_por_cadeia=1000, burn_in=500, n_iters=10, seed=None):
+    """
+    Amostra o modelo em 'n_cadeias' cadeias paralelas e calcula os diagnósticos de
+    convergência e, com 'spin_matrix', a comparação com as estatísticas empíricas.
+    """
+    multipliers = np.asarray(multipliers, dtype=np.float64)
+    amostras = amostrar_cadeias(multipliers, N, n_cadeias, amostras_por_cadeia, burn_in, n_iters, arestas, seed)
+    E = energias(amostras, multipliers, N, arestas)[..., None]
+    magnetizacoes = amostras.astype(np.float64)
+
+    rhat_m, ess_m = rhat(magnetizacoes), ess(magnetizacoes)
+    relatorio = {
+        "n_cadeias": n_cadeias,
+        "amostras_por_cadeia": amostras_por_cadeia,
+        "rhat_energia": float(rhat(E)[0]),
+        "ess_energia": float(ess(E)[0]),
+        "rhat_max": float(np.nanmax(rhat_m)),
+        "frac_rhat_alto": float(np.mean(rhat_m > LIMIAR_RHAT)),
+        "ess_min": float(np.nanmin(ess_m)),
+        "ess_mediano": float(np.nanmedian(ess_m)),
+    }
+    if spin_matrix is None:
+        return relatorio
+
+    sint = calcular_estatisticas(amostras.reshape(-1, N))
+    emp = calcular_estatisticas(spin_matrix)
+    iu = indices_triu(N)
+    triplas = escolher_triplas(N, seed=0 if seed is None else seed)
+    relatorio["medias"] = _comparar(sint["medias"], emp["medias"])
+    relatorio["correlacoes"] = _comparar(sint["covariancia"][iu], emp["covariancia"][iu])
+    relatorio["tres_pontos"] = _comparar(
+        correlacoes_tres_pontos(amostras, sint["medias"], triplas),
+        correlacoes_tres_pontos(spin_matrix, emp["medias"], triplas),
+    )
+    relatorio["n_triplas"] = len(triplas)
+    return relatorio
+
+def formatar_relatorio(nome, relatorio):
+    """Seção de texto compacta do relatório de validação de um modelo."""
+    linhas = [
+        f"[{nome}] {relatorio['n_cadeias']} cadeias x {relatorio['amostras_por_cadeia']} amostras",
+        f"  Convergência: R-hat energia {relatorio['rhat_energia']:.3f} | R-hat máx (spins) {relatorio['rhat_max']:.3f} "
+        f"({100 * relatorio['frac_rhat_alto']:.1f}% > {LIMIAR_RHAT})",
+        f"  ESS: energia {relatorio['ess_energia']:.0f} | spins mín {relatorio['ess_min']:.0f} / mediano {relatorio['ess_mediano']:.0f}",
+    ]
+    rotulos = (("medias", "Médias ⟨s_i⟩"), ("correlacoes", "Correlações C_ij"), ("tres_pontos", "Três pontos T_ijk"))
+    for chave, rotulo in rotulos:
+        if chave in relatorio:
+            c = relatorio[chave]
+            extra = f" ({relatorio['n_triplas']} triplas)" if chave == "tres_pontos" else ""
+            linhas.append(f"  {rotulo}{extra}: RMSE {c['rmse']:.5f} | Pearson {c['pearson']:.3f} | erro máx {c['max_erro']:.5f}")
+    if relatorio["rhat_max"] > LIMIAR_RHAT:
+        linhas.append("  ⚠ Cadeias não misturadas: aumente o burn-in/amostras antes de interpretar o ajuste.")
+    return "\n".join(linhas)
@@ -0,0 +1,292 @@
+import math
+import time
+
+import numpy as np
+import scipy.sparse as sp
+
+from .modeling import ArrayGraph
+
+def as_array_graph(G):
+    """Aceita networkx ou ArrayGraph e devolve sempre a representação em arrays."""
+    return G if isinstance(G, ArrayGraph) else ArrayGraph.from_networkx(G)
+
+def adjacency_matrix(ag):
+    """Matriz de adjacência esparsa simétrica (CSR, float64) do ArrayGraph."""
+    indptr, indices = ag.csr()
+    n = ag.number_of_nodes()
+    data = np.ones(len(indices), dtype=np.float64)
+    return sp.csr_matrix((data, indices, indptr), shape=(n, n))
+
+def _gather_neighbors(indptr, indices, nodes):
+    """
+    Vizinhos de um conjunto de nós em uma única operação vetorizada.
+    Retorna (origem repetida, vizinho) para cada entrada de adjacência.
+    """
+    starts = indptr[nodes]
+    counts = indptr[nodes + 1] - starts
+    total = int(counts.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    src = np.repeat(nodes, counts)
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return src, indices[np.repeat(starts, counts) + offsets].astype(np.int64)
+
+def degree_distribution(ag):
+    """Distribuição de grau {grau: quantidade de nós} e estatísticas resumidas."""
+    degree = ag.degree()
+    counts = np.bincount(degree) if len(degree) else np.zeros(0, dtype=np.int64)
+    dist = {int(k): int(c) for k, c in enumerate(counts) if c}
+    return {
+        "distribuicao": dist,
+        "grau_max": int(degree.max()) if len(degree) else 0,
+        "grau_mediano": float(np.median(degree)) if len(degree) else 0.0,
+        "grau_medio": float(degree.mean()) if len(degree) else 0.0,
+    }
+
+def triangle_counts(ag, max_wedges=1 << 22):
+    """
+    Triângulos por nó pela orientação por grau: cada aresta aponta para a ponta de
+    maior (grau, índice), o que limita o grau de saída a O(√m). Os pares de vizinhos
+    de saída de cada nó (cunhas, O(m·√m) no total) são testados contra o conjunto
+    ordenado de arestas orientadas; cada triângulo é achado uma única vez, a partir do
+    seu nó de menor posto. Processado em blocos de nós com até 'max_wedges' cunhas,
+    sem o preenchimento do produto A·A em grafos com hubs.
+    """
+    n = ag.number_of_nodes()
+    tri = np.zeros(n, dtype=np.float64)
+    if ag.number_of_edges() == 0:
+        return tri
+    degree = ag.degree()
+    rank = np.empty(n, dtype=np.int64)
+    rank[np.lexsort((np.arange(n), degree))] = np.arange(n)
+
+    u, v = ag.edges[:, 0].astype(np.int64), ag.edges[:, 1].astype(np.int64)
+    forward = rank[u] < rank[v]
+    src, dst = np.where(forward, u, v), np.where(forward, v, u)
+    order = np.lexsort((dst, src))
+    src, dst = src[order], dst[order]
+    keys = src * n + dst  # ordenadas, pois (src, dst) está em ordem lexicográfica
+
+    out_degree = np.bincount(src, minlength=n)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(out_degree, out=indptr[1:])
+    wedges = out_degree * (out_degree - 1) // 2
+    cum_wedges = np.cumsum(wedges)
+
+    start = 0
+    while start < n:
+        base = cum_wedges[start - 1] if start > 0 else 0
+        stop = max(start + 1, int(np.searchsorted(cum_wedges, base + max_wedges, side="right")))
+        # Para cada entrada de saída na posição k da lista do seu nó: pares com as posições > k
+        lo, hi = indptr[start], indptr[stop]
+        pos = np.arange(lo, hi)
+        remaining = indptr[src[pos] + 1] - pos - 1
+        total = int(remaining.sum())
+        if total:
+            first = np.repeat(pos, remaining)
+            second = first + 1 + np.arange(total) - np.repeat(np.cumsum(remaining) - remaining, remaining)
+            a, b, c = src[first], dst[first], dst[second]
+            swap = rank[b] > rank[c]
+            b, c = np.where(swap, c, b), np.where(swap, b, c)
+            query = b * n + c
+            idx = np.minimum(np.searchsorted(keys, query), len(keys) - 1)
+            hit = keys[idx] == query
+            for nodes in (a[hit], b[hit], c[hit]):
+                tri += np.bincount(nodes, minlength=n)
+        start = stop
+    return tri
+
+def clustering(ag):
+    """
+    Coeficiente de agrupamento local (vetor), médio e transitividade global.
+    Equivalentes a nx.clustering / nx.average_clustering / nx.transitivity.
+    """
+    degree = ag.degree().astype(np.float64)
+    tri = triangle_counts(ag)
+    pairs = degree * (degree - 1) / 2
+    local = np.divide(tri, pairs, out=np.zeros_like(tri), where=pairs > 0)
+    return {
+        "local": local,
+        "medio": float(local.mean()) if len(local) else 0.0,
+        "transitividade": float(tri.sum() / pairs.sum()) if pairs.sum() > 0 else 0.0,
+    }
+
+def degree_assortativity(ag):
+    """Assortatividade de grau (correlação de Pearson dos graus nas pontas das arestas)."""
+    if ag.number_of_edges() == 0:
+        return float("nan")
+    degree = ag.degree().astype(np.float64)
+    u, v = ag.edges[:, 0], ag.edges[:, 1]
+    x = np.concatenate((degree[u], degree[v]))
+    y = np.concatenate((degree[v], degree[u]))
+    if x.std() == 0:
+        return float("nan")
+    return float(np.corrcoef(x, y)[0, 1])
+
+def core_numbers(ag):
+    """
+    Número de core de cada nó (equivalente a nx.core_number), por descascamento
+    vetorizado: remove em lote todos os nós com grau residual ≤ k e só então sobe k.
+    """
+    n = ag.number_of_nodes()
+    indptr, indices = ag.csr()
+    degree = ag.degree().astype(np.int64)
+    core = np.zeros(n, dtype=np.int64)
+    alive = np.ones(n, dtype=bool)
+    k = 0
+    while alive.any():
+        k = max(k, int(degree[alive].min()))
+        while True:
+            drop = np.flatnonzero(alive & (degree <= k))
+            if len(drop) == 0:
+                break
+            core[drop] = k
+            alive[drop] = False
+            _, nbrs = _gather_neighbors(indptr, indices, drop)
+            nbrs = nbrs[alive[nbrs]]
+            degree -= np.bincount(nbrs, minlength=n)
+    return core
+
+def pagerank(ag, alpha=0.85, tol=1e-8, max_iter=100):
+    """PageRank por iteração de potência sobre a adjacência esparsa (nós isolados redistribuem uniformemente)."""
+    n = ag.number_of_nodes()
+    if n == 0:
+        return np.zeros(0)
+    A = adjacency_matrix(ag)
+    degree = np.asarray(A.sum(axis=1)).ravel()
+    inv_degree = np.divide(1.0, degree, out=np.zeros(n), where=degree > 0)
+    dangling = degree == 0
+    x = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        x_new = alpha * (A.T @ (x * inv_degree)) + (alpha * x[dangling].sum() + 1 - alpha) / n
+        if np.abs(x_new - x).sum() < n * tol:
+            return x_new
+        x = x_new
+    return x
+
+def _single_source_dependencies(indptr, indices, source, n):
+    """
+    Fase de uma fonte do algoritmo de Brandes com BFS síncrona por nível:
+    cada nível expande a fronteira inteira de uma vez e as dependências são
+    acumuladas de trás para frente com bincount ponderado.
+    """
+    dist = np.full(n, -1, dtype=np.int64)
+    sigma = np.zeros(n, dtype=np.float64)
+    dist[source] = 0
+    sigma[source] = 1.0
+    frontier = np.array([source], dtype=np.int64)
+    level_edges = []
+    level = 0
+    while len(frontier):
+        src, dst = _gather_neighbors(indptr, indices, frontier)
+        new = dst[dist[dst] == -1]
+        dist[new] = level + 1
+        on_path = dist[dst] == level + 1
+        src, dst = src[on_path], dst[on_path]
+        sigma += np.bincount(dst, weights=sigma[src], minlength=n)
+        level_edges.append((src, dst))
+        frontier = np.unique(new)
+        level += 1
+
+    delta = np.zeros(n, dtype=np.float64)
+    for src, dst in reversed(level_edges):
+        delta += np.bincount(src, weights=sigma[src] / sigma[dst] * (1.0 + delta[dst]), minlength=n)
+    delta[source] = 0.0
+    return delta
+
+def betweenness_sample_size(n, epsilon=0.05, delta=0.1):
+    """
+    Número de pivôs para que, com probabilidade 1-delta, todas as centralidades
+    normalizadas tenham erro absoluto ≤ epsilon (Hoeffding + união sobre os n nós).
+    """
+    if n <= 2:
+        return n
+    return min(n, int(math.ceil(math.log(2 * n / delta) / (2 * epsilon ** 2))))
+
+def approximate_betweenness(ag, epsilon=0.05, delta=0.1, time_budget_s=None, n_samples=None, seed=42):
+    """
+    Betweenness normalizada (mesma escala de nx.betweenness_centrality) estimada a
+    partir de pivôs amostrados uniformemente (Brandes & Pich).
+
+    O número de pivôs vem de (epsilon, delta) ou de 'n_samples'; com 'time_budget_s'
+    a amostragem para ao estourar o tempo e o erro efetivo é recalculado com os
+    pivôs realmente processados. Se o número de pivôs alcança n, o resultado é exato.
+    Retorna (centralidades, {"pivos", "epsilon", "exato", "tempo_s"}).
+    """
+    n = ag.number_of_nodes()
+    scores = np.zeros(n, dtype=np.float64)
+    if n <= 2:
+        return scores, {"pivos": n, "epsilon": 0.0, "exato": True, "tempo_s": 0.0}
+
+    k = n_samples if n_samples is not None else betweenness_sample_size(n, epsilon, delta)
+    k = min(n, k)
+    rng = np.random.default_rng(seed)
+    pivots = np.arange(n) if k == n else rng.choice(n, size=k, replace=False)
+
+    indptr, indices = ag.csr()
+    t0 = time.perf_counter()
+    done = 0
+    for s in pivots:
+        scores += _single_source_dependencies(indptr, indices, int(s), n)
+        done += 1
+        if time_budget_s is not None and time.perf_counter() - t0 > time_budget_s:
+            break
+
+    # Extrapolação n/k e normalização por (n-1)(n-2) (pares ordenados, grafo não-direcionado)
+    scores *= (n / done) / ((n - 1) * (n - 2))
+    exact = done == n
+    eps = 0.0 if exact else math.sqrt(math.log(2 * n / delta) / (2 * done))
+    return scores, {"pivos": done, "epsilon": eps, "exato": exact, "tempo_s": time.perf_counter() - t0}
+
+def top_nodes(ag, scores, top_n=5):
+    """Os 'top_n' rótulos com maior score, em ordem decrescente, com o respectivo valor."""
+    top_n = min(top_n, len(scores))
+    if top_n == 0:
+        return []
+    idx = np.argpartition(-scores, top_n - 1)[:top_n]
+    idx = idx[np.argsort(-scores[idx], kind="stable")]
+    return [(ag.labels[i], float(scores[i])) for i in idx]
+
+def compute_network_metrics(G, top_n=5, betweenness_epsilon=0.05, betweenness_delta=0.1,
+                            time_budget_s=60.0, seed=42):
+    """
+    Métricas estruturais e de influência usadas nos relatórios: distribuição de grau,
+    agrupamento, assortatividade, k-core, PageRank e betweenness aproximada dentro do
+    orçamento de erro/tempo informado.
+    """
+    ag = as_array_graph(G)
+    degree = degree_distribution(ag)
+    clust = clustering(ag)
+    core = core_numbers(ag)
+    pr = pagerank(ag)
+    btw, btw_info = approximate_betweenness(ag, betweenness_epsilon, betweenness_delta,
+                                            time_budget_s=time_budget_s, seed=seed)
+    return {
+        "grau": degree,
+        "agrupamento_medio": clust["medio"],
+        "transitividade": clust["transitividade"],
+        "assortatividade": degree_assortativity(ag),
+        "core_max": int(core.max()) if len(core) else 0,
+        "top_pagerank": top_nodes(ag, pr, top_n),
+        "top_betweenness": top_nodes(ag, btw, top_n),
+        "top_core": top_nodes(ag, core.astype(np.float64), top_n),
+        "betweenness_info": btw_info,
+    }
+
+def format_metrics_section(metrics):
+    """Bloco de texto padronizado com as métricas para os relatórios .txt."""
+    info = metrics["betweenness_info"]
+    precision = "exata" if info["exato"] else f"aprox. ±{info['epsilon']:.3f}"
+    lines = [
+        f"Grau máximo / mediano: {metrics['grau']['grau_max']} / {metrics['grau']['grau_mediano']:.1f}",
+        f"Coeficiente de agrupamento médio: {metrics['agrupamento_medio']:.4f}",
+        f"Transitividade: {metrics['transitividade']:.4f}",
+        f"Assortatividade de grau: {metrics['assortatividade']:.4f}",
+        f"K-core máximo: {metrics['core_max']}",
+        "",
+        "Top nós por PageRank:",
+    ]
+    lines += [f"{i}. {node} ({score:.5f})" for i, (node, score) in enumerate(metrics["top_pagerank"], 1)]
+    lines += ["", f"Top nós por betweenness ({precision}, {info['pivos']} pivôs, {info['tempo_s']:.1f}s):"]
+    lines += [f"{i}. {node} ({score:.5f})" for i, (node, score) in enumerate(metrics["top_betweenness"], 1)]
+    return "\n".join(lines) + "\n"
@@ -1,4 +1,6 @@
 import heapq
+import numpy as np
+import pandas as pd
 import networkx as nx
 
 def build_graph(edges):
@@ -10,6 +12,142 @@ def build_graph(edges):
     G.add_edges_from(edges)
     return G
 
+class ArrayGraph:
+    """
+    Grafo não-direcionado compacto baseado em arrays inteiros.
+
+    - labels: rótulos dos nós (handles), na ordem de primeira aparição;
+    - edges: arestas únicas (u < v) em int32 [E, 2], sem self-loops;
+    - indptr/indices: adjacência CSR simétrica, montada sob demanda.
+
+    Ocupa uma fração da memória de um nx.Graph (dict-of-dicts) e torna k-core,
+    grau e subgrafos operações vetorizadas. A conversão para networkx/igraph só
+    acontece quando algum consumidor realmente precisa dela.
+
+    node_attrs: {nome: array por nó} (ex.: "Community ID"), preservado em
+    subgrafos e conversões.
+    """
+    def __init__(self, labels, edges, node_attrs=None, canonical=False):
+        self.node_attrs = dict(node_attrs or {})
+        self._csr = None
+        if canonical:
+            # Arestas já únicas e ordenadas (u < v), ex.: carregadas de um snapshot
+            self.labels = labels
+            self.edges = edges
+            return
+        self.labels = np.asarray(labels, dtype=object)
+        n = len(self.labels)
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+
+        # Canoniza (u < v), remove self-loops e arestas duplicadas
+        u = np.minimum(edges[:, 0], edges[:, 1])
+        v = np.maximum(edges[:, 0], edges[:, 1])
+        keys = np.unique(u[u != v] * n + v[u != v])
+        index_dtype = np.int32 if n < np.iinfo(np.int32).max else np.int64
+        self.edges = np.column_stack((keys // n, keys % n)).astype(index_dtype) if n else np.zeros((0, 2), index_dtype)
+
+    @classmethod
+    def from_edges(cls, edges):
+        """Monta o grafo a partir de uma lista de arestas (rótulo_a, rótulo_b)."""
+        flat = np.empty(2 * len(edges), dtype=object)
+        flat[:] = [x for edge in edges for x in edge]
+        codes, labels = pd.factorize(flat)
+        return cls(labels, codes.reshape(-1, 2))
+
+    @classmethod
+    def from_networkx(cls, G):
+        labels = list(G.nodes())
+        index = {node: i for i, node in enumerate(labels)}
+        edges = np.fromiter(
+            (index[x] for edge in G.edges() for x in edge), dtype=np.int64, count=2 * G.number_of_edges()
+        )
+        # Atributos de nó presentes no grafo (ausências viram None)
+        names = {key for _, data in G.nodes(data=True) for key in data}
+        node_attrs = {}
+        for name in names:
+            attr = np.empty(len(labels), dtype=object)
+            attr[:] = [G.nodes[node].get(name) for node in labels]
+            node_attrs[name] = attr
+        return cls(labels, edges, node_attrs)
+
+    def number_of_nodes(self):
+        return len(self.labels)
+
+    def number_of_edges(self):
+        return len(self.edges)
+
+    def csr(self):
+        """Adjacência CSR simétrica (indptr int64, indices int32)."""
+        if self._csr is None:
+            n = self.number_of_nodes()
+            src = np.concatenate((self.edges[:, 0], self.edges[:, 1]))
+            dst = np.concatenate((self.edges[:, 1], self.edges[:, 0]))
+            order = np.argsort(src, kind="stable")
+            indptr = np.zeros(n + 1, dtype=np.int64)
+            np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+            self._csr = (indptr, dst[order].astype(self.edges.dtype))
+        return self._csr
+
+    def degree(self):
+        n = self.number_of_nodes()
+        return np.bincount(self.edges[:, 0], minlength=n) + np.bincount(self.edges[:, 1], minlength=n)
+
+    def subgraph(self, nodes):
+        """Subgrafo induzido por índices (ou máscara booleana) de nós, com reindexação."""
+        nodes = np.asarray(nodes)
+        mask = nodes if nodes.dtype == bool else np.isin(np.arange(self.number_of_nodes()), nodes)
+        new_index = np.cumsum(mask) - 1
+        keep = mask[self.edges[:, 0]] & mask[self.edges[:, 1]]
+        # A reindexação monotônica preserva a ordem canônica das arestas
+        return ArrayGraph(
+            self.labels[mask], new_index[self.edges[keep]].astype(self.edges.dtype),
+            {name: attr[mask] for name, attr in self.node_attrs.items()}, canonical=True,
+        )
+
+    def core_mask(self, k):
+        """Máscara dos nós do k-core, por descascamento iterativo vetorizado."""
+        n = self.number_of_nodes()
+        alive = np.ones(n, dtype=bool)
+        eu, ev = self.edges[:, 0], self.edges[:, 1]
+        while True:
+            keep = alive[eu] & alive[ev]
+            eu, ev = eu[keep], ev[keep]
+            degree = np.bincount(eu, minlength=n) + np.bincount(ev, minlength=n)
+            drop = alive & (degree < k)
+            if not drop.any():
+                return alive
+            alive &= ~drop
+
+    def k_core(self, k=2):
+        return self.subgraph(self.core_mask(k))
+
+    def index_of(self, labels):
+        """Índices dos rótulos informados (-1 para rótulos ausentes)."""
+        return pd.Index(self.labels).get_indexer(list(labels))
+
+    def to_networkx(self):
+        G = nx.Graph()
+        G.add_nodes_from(self.labels.tolist())
+        for name, attr in self.node_attrs.items():
+            nx.set_node_attributes(
+                G, {node: value for node, value in zip(self.labels.tolist(), attr.tolist()) if value is not None}, name
+            )
+        labels = self.labels
+        G.add_edges_from(zip(labels[self.edges[:, 0]].tolist(), labels[self.edges[:, 1]].tolist()))
+        return G
+
+    def to_igraph(self):
+        import igraph as ig
+        g = ig.Graph(n=self.number_of_nodes(), edges=self.edges)
+        g.vs["name"] = self.labels.tolist()
+        return g
+
+def build_array_graph(edges):
+    """
+    Versão compacta de build_graph: arestas brutas → ArrayGraph (sem self-loops).
+    """
+    return ArrayGraph.from_edges(edges)
+
 def get_network_metrics(G):
     """
     Retorna estatísticas globais e úteis sobre o grafo.
@@ -1,5 +1,4 @@
 import asyncio
-import networkx as nx
 import os
 import aiohttp
 import sys
@@ -7,6 +6,14 @@ import re
 from datetime import datetime, timezone
 from array import array
 
+import numpy as np
+import pandas as pd
+
+from .analysis import MIN_OCCURRENCES, TIME_TYPECODE
+from .streaming import StreamingWordAggregator
+from .sampling import required_sample_size, plan_post_cap, stratified_user_sample
+from .snapshot import load_graph
+
 BSKY_SERVICE = "public.api.bsky.app"
 
 def parse_datetime(dt_str):
@@ -28,15 +35,38 @@ def parse_datetime(dt_str):
 # Data de lançamento do Bluesky (Referência fixa para reprodutibilidade)
 # Lançamento do beta iOS: 17 de fevereiro de 2023
 BLUESKY_START_DATE = datetime(2023, 2, 17, tzinfo=timezone.utc)
+BLUESKY_START_EPOCH_S = int(BLUESKY_START_DATE.timestamp())
+
+# Sufixo de fuso horário ISO 8601 (Z ou ±HH:MM)
+_TZ_SUFFIX = r'(?:Z|[+-]\d\d:?\d\d)$'
+_INT32 = np.iinfo(np.int32)
+
+def parse_created_at_batch(created_at_list):
+    """
+    Versão vetorizada de parse_datetime para uma página inteira de 'createdAt'.
+    Retorna (segundos int32 desde BLUESKY_START_DATE, máscara de carimbos válidos),
+    sem criar um objeto datetime por post.
+    """
+    ser = pd.Series(created_at_list, dtype="string").str.upper()
+    # Carimbos sem fuso são tratados como UTC (evita que o parser misture offsets entre linhas)
+    naive = ~ser.str.contains(_TZ_SUFFIX, regex=True, na=True)
+    ser = ser.where(~naive, ser + "Z")
+
+    ts = pd.to_datetime(ser, utc=True, format="ISO8601", errors="coerce")
+    valid = ts.notna().to_numpy()
+    secs = ts.dt.tz_convert(None).to_numpy().astype("datetime64[s]").astype(np.int64)
+    secs = np.clip(secs - BLUESKY_START_EPOCH_S, _INT32.min, _INT32.max).astype(np.int32)
+    return secs, valid
 
 async def fetch_user_posts(session, did, semaphore, max_posts_per_user=500):
     """
     Coleta o feed de um usuário e extrai palavras e timestamps.
-    Utiliza BLUESKY_START_DATE como referência fixa (T=0).
+    Utiliza BLUESKY_START_DATE como referência fixa (T=0), com os tempos em
+    segundos inteiros convertidos página a página por parse_created_at_batch.
     """
     cursor = None
     posts_processed = 0
-    word_map = {} # {palavra: [lista_de_idades]}
+    word_map = {} # {palavra: [segundos_desde_lançamento]}
     pattern = re.compile(r'\b\w{2,}\b', re.UNICODE)
 
     while posts_processed < max_posts_per_user:
@@ -64,6 +94,7 @@ async def fetch_user_posts(session, did, semaphore, max_posts_per_user=500):
             if not feed:
                 break
             
+            page = []
             for item in feed:
                 post = item.get("post", {})
                 record = post.get("record", {})
@@ -71,21 +102,25 @@ async def fetch_user_posts(session, did, semaphore, max_posts_per_user=500):
                 created_at = record.get("createdAt")
                 
                 if text and created_at:
-                    timestamp = parse_datetime(created_at)
-                    # age_days agora é "dias desde o lançamento do Bluesky" (T=0 em 17/02/2023)
-                    age_days = (timestamp - BLUESKY_START_DATE).total_seconds() / 86400
+                    page.append((text, created_at))
+            
+            # Conversão vetorizada da página: "segundos desde o lançamento do Bluesky" (T=0 em 17/02/2023)
+            if page:
+                page_secs, page_valid = parse_created_at_batch([c for _, c in page])
+                for (text, _), age_s, ok in zip(page, page_secs.tolist(), page_valid.tolist()):
+                    if not ok:
+                        continue
                     
                     # Extração de palavras e armazenamento dos tempos de ocorrência
                     words = set(pattern.findall(text.lower()))
                     for word in words:
                         if word not in word_map:
                             word_map[word] = []
-                        word_map[word].append(age_days)
+                        word_map[word].append(age_s)
                     
                     posts_processed += 1
-                
-                if posts_processed >= max_posts_per_user:
-                    break
+                    if posts_processed >= max_posts_per_user:
+                        break
             
             cursor = data.get("cursor")
             if not cursor or posts_processed >= max_posts_per_user:
@@ -102,22 +137,53 @@ async def fetch_user_posts(session, did, semaphore, max_posts_per_user=500):
     return did, word_map
 
 
-async def collect_community_posts_df(gexf_path, semaphore_limit, max_posts_per_user=3000):
+async def collect_community_posts_df(gexf_path, semaphore_limit, max_posts_per_user=3000,
+                                     streaming=False, min_occurrences=MIN_OCCURRENCES,
+                                     memory_cap_mb=256, spill_dir=None,
+                                     user_margin=None, std_rel_error=0.1, stratify_by="degree",
+                                     min_word_rate=1e-3, confidence=0.95, seed=42):
     """
-    Lê o GEXF, dispara a coleta concorrente e agrega as palavras por usuário e globalmente.
-    Otimizado para memória usando sys.intern e array.array.
+    Carrega a rede (snapshot binário ou GEXF), dispara a coleta concorrente e agrega as palavras por usuário e globalmente.
+    Otimizado para memória usando sys.intern e array.array de int32 (segundos).
+
+    Com streaming=True, o mapa global usa um sketch Count-Min para materializar arrays
+    apenas de palavras que podem atingir 'min_occurrences', mantendo as ocorrências raras
+    em um buffer limitado a 'memory_cap_mb' com despejo em disco ('spill_dir').
+    As estatísticas das palavras frequentes permanecem idênticas.
+
+    Com user_margin (ex.: 0.05), ativa o modo amostragem: coleta apenas uma amostra
+    estratificada de usuários ('degree' ou 'Community ID') dimensionada para essa margem
+    absoluta em proporções de usuários (Cochran), com limite de posts/usuário escolhido
+    por plan_post_cap para que palavras com taxa 'min_word_rate' atinjam o erro relativo
+    'std_rel_error' no desvio padrão dos intervalos.
     """
-    if not os.path.exists(gexf_path):
+    # Snapshot binário (mmap) quando disponível; o GEXF só é lido na primeira vez
+    G = load_graph(gexf_path)
+    if G is None:
         print(f"[Erro] Arquivo não encontrado: {gexf_path}")
         return {}, {}, []
 
-    G = nx.read_gexf(gexf_path)
-    all_users = [sys.intern(u) for u in G.nodes()]
+    all_users = [sys.intern(u) for u in G.labels.tolist()]
+    
+    if user_margin is not None:
+        population = len(all_users)
+        n_sample = required_sample_size(population, margin=user_margin, confidence=confidence)
+        sampled, strata_info = stratified_user_sample(G, n_sample, stratify_by=stratify_by, seed=seed)
+        all_users = [sys.intern(u) for u in sampled]
+        max_posts_per_user = plan_post_cap(std_rel_error, len(all_users), min_word_rate,
+                                           confidence, max_posts=max_posts_per_user)
+        print(f"\n[Amostragem] {len(all_users)}/{population} usuários ({len(all_users) / population:.1%}) "
+              f"em {len(strata_info)} estratos | Margem ±{user_margin:.1%} em proporções ({confidence:.0%} de confiança)")
+        print(f"[Amostragem] Limite de posts/usuário ajustado para {max_posts_per_user} "
+              f"(erro relativo ±{std_rel_error:.0%} no desvio padrão de palavras com taxa ≥ {min_word_rate:g} por post)")
     
     print(f"\n[Coleta] Iniciando coleta de {len(all_users)} usuários (Máx {max_posts_per_user} posts/user)...")
     
-    global_word_times = {} # {word_str: array.array('d')}
+    global_word_times = {} # {word_str: array.array('i')} em segundos desde o lançamento
     user_word_sets = {}    # {did_interned: {word_str_interned}}
+    aggregator = StreamingWordAggregator(min_occurrences, memory_cap_mb, spill_dir) if streaming else None
+    if aggregator is not None:
+        print(f"  [Streaming] Poda precoce ativa (mín. {min_occurrences} ocorrências | buffer {memory_cap_mb} MB).")
     
     connector = aiohttp.TCPConnector(ttl_dns_cache=300)
     async with aiohttp.ClientSession(connector=connector) as session:
@@ -147,15 +213,22 @@ async def collect_community_posts_df(gexf_path, semaphore_limit, max_posts_per_u
                 # 1. Registrar atividade de palavras do usuário (para Ising)
                 # Já internamos as palavras aqui para economizar memória global
                 interned_user_words = set()
+                interned_word_map = {}
                 for w, ages in word_map.items():
                     w_interned = sys.intern(w)
                     interned_user_words.add(w_interned)
                     
                     # 2. Agregar no mapa global (usando array.array que é mais pacto que list)
+                    if aggregator is not None:
+                        interned_word_map[w_interned] = ages
+                        continue
                     if w_interned not in global_word_times:
-                        global_word_times[w_interned] = array('d')
+                        global_word_times[w_interned] = array(TIME_TYPECODE)
                     global_word_times[w_interned].fromlist(ages)
                 
+                if aggregator is not None:
+                    aggregator.add(interned_word_map)
+                
                 user_word_sets[did] = interned_user_words
                 count += 1
                 if count % 10 == 0 or count == len(all_users):
@@ -168,6 +241,9 @@ async def collect_community_posts_df(gexf_path, semaphore_limit, max_posts_per_u
                 except StopIteration:
                     continue
 
+    if aggregator is not None:
+        global_word_times = aggregator.finalize()
+
     # Garante que usuários que não postaram nada estejam no mapa
     for u in all_users:
         if u not in user_word_sets:
@@ -1,13 +1,14 @@
 import os
 from datetime import datetime
 from .modeling import get_network_metrics, get_influential_nodes
+from .metrics import compute_network_metrics, format_metrics_section
 
-def get_next_available_index(processed_dir, reports_dir):
+def get_next_available_index(processed_dir, reports_dir, start=1):
     """
-    Busca o primeiro número inteiro (começando de 1) que não esteja em uso
+    Busca o primeiro número inteiro (começando de 'start') que não esteja em uso
     nem como .gexf na pasta processed, nem como .txt na pasta de relatórios.
     """
-    idx = 1
+    idx = start
     while True:
         # Note: We now check for 'comunidade_{idx}_sessao_*.gexf' pattern safely or just the index
         # To simplify, we'll keep checking the index in the reports folder which is already session-isolated
@@ -17,10 +18,13 @@ def get_next_available_index(processed_dir, reports_dir):
             return idx
         idx += 1
 
-def generate_global_report(G, num_communities, modularity_score, output_dir="data/reports", selected_indices=None, core_user="N/A"):
+def generate_global_report(G, num_communities, modularity_score, output_dir="data/reports", selected_indices=None, core_user="N/A",
+                           metrics_time_budget_s=60.0):
     """
     Gera o relatório geral da rede extraindo informações globais e 
     registra (append) no log local relatorio_geral_rede.txt.
+    Inclui as métricas de influência de src.metrics (betweenness limitada a
+    'metrics_time_budget_s' segundos).
     """
     os.makedirs(output_dir, exist_ok=True)
     
@@ -43,6 +47,9 @@ def generate_global_report(G, num_communities, modularity_score, output_dir="dat
     if selected_indices:
         indices_str = ", ".join(map(str, sorted(selected_indices)))
         report_content += f"Subcomunidades exportadas (índices): {indices_str}\n"
+
+    metrics = compute_network_metrics(G, time_budget_s=metrics_time_budget_s)
+    report_content += f"{'-'*50}\n" + format_metrics_section(metrics)
     
     file_path = os.path.join(output_dir, "relatorio_geral_rede.txt")
     with open(file_path, "a", encoding="utf-8") as file:
@@ -50,7 +57,7 @@ def generate_global_report(G, num_communities, modularity_score, output_dir="dat
         
     print(f"[Relatório] Gerado {file_path}")
 
-def generate_subcommunity_report(subgraph, display_id, original_cid, output_dir="data/reports"):
+def generate_subcommunity_report(subgraph, display_id, original_cid, output_dir="data/reports", metrics_time_budget_s=30.0):
     """
     Gera as métricas de topologia específicas do subgrafo de uma comunidade.
     Utiliza o 'display_id' para o nome do arquivo (numeração incremental) e 
@@ -73,6 +80,9 @@ def generate_subcommunity_report(subgraph, display_id, original_cid, output_dir=
     
     for i, node in enumerate(top_5, 1):
         report_content += f"{i}. {node}\n"
+
+    metrics = compute_network_metrics(subgraph, time_budget_s=metrics_time_budget_s)
+    report_content += "\n" + format_metrics_section(metrics)
         
     file_path = os.path.join(output_dir, f"relatorio_comunidade_{display_id}.txt")
     with open(file_path, "w", encoding="utf-8") as file:
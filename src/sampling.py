@@ -0,0 +1,91 @@
+import math
+from statistics import NormalDist
+
+import numpy as np
+
+from .modeling import ArrayGraph
+
+def _z_score(confidence):
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+def required_sample_size(population, margin=0.05, confidence=0.95, p=0.5):
+    """
+    Tamanho de amostra de usuários (Cochran) com correção de população finita.
+    'margin' é a margem de erro absoluta desejada para proporções (ex.: fração de
+    usuários que usam uma keyword), no nível de confiança indicado.
+    """
+    if population <= 0:
+        return 0
+    z = _z_score(confidence)
+    n0 = (z ** 2) * p * (1 - p) / (margin ** 2)
+    n = n0 / (1 + (n0 - 1) / population)
+    return min(population, int(math.ceil(n)))
+
+def plan_post_cap(std_rel_error, n_users, min_word_rate=1e-3, confidence=0.95,
+                  max_posts=3000, page_size=100):
+    """
+    Escolhe o limite de posts por usuário para que uma palavra presente em uma
+    fração 'min_word_rate' dos posts tenha intervalos suficientes para estimar seu
+    desvio padrão com erro relativo 'std_rel_error' (grandeza distinta da margem
+    absoluta de proporções usada em required_sample_size).
+
+    Erro padrão relativo do desvio padrão com k intervalos ≈ 1/sqrt(2(k-1)),
+    logo k ≥ 1 + z²/(2ε²) intervalos (k+1 ocorrências).
+    """
+    if n_users <= 0:
+        return max_posts
+    z = _z_score(confidence)
+    intervals_needed = 1 + (z ** 2) / (2 * std_rel_error ** 2)
+    occurrences_needed = intervals_needed + 1
+    posts_per_user = occurrences_needed / (n_users * min_word_rate)
+    # Arredonda para páginas completas da API (100 posts por requisição)
+    cap = int(math.ceil(posts_per_user / page_size) * page_size)
+    return max(page_size, min(max_posts, cap))
+
+def stratified_user_sample(G, n_sample, stratify_by="degree", n_strata=5, seed=42):
+    """
+    Amostra estratificada de nós do grafo com alocação proporcional.
+
+    stratify_by="Community ID": usa o atributo GEXF como estrato (cai para grau se
+    houver apenas uma comunidade). stratify_by="degree": estratos por quantis de grau.
+    Cada estrato não vazio recebe pelo menos um usuário.
+    Aceita networkx ou ArrayGraph (ex.: carregado de um snapshot binário).
+    Retorna (usuarios_amostrados, {estrato: (populacao, amostrados)}).
+    """
+    ag = G if isinstance(G, ArrayGraph) else ArrayGraph.from_networkx(G)
+    nodes = ag.labels.tolist()
+    if n_sample >= len(nodes):
+        return nodes, {"todos": (len(nodes), len(nodes))}
+
+    labels = None
+    if stratify_by == "Community ID" and "Community ID" in ag.node_attrs:
+        attrs = ag.node_attrs["Community ID"].tolist()
+        if len(set(attrs)) > 1:
+            labels = np.array([str(a) for a in attrs])
+    if labels is None:
+        degrees = ag.degree().astype(float)
+        edges = np.unique(np.quantile(degrees, np.linspace(0, 1, n_strata + 1)[1:-1]))
+        labels = np.array([f"grau_q{q}" for q in np.searchsorted(edges, degrees, side="right")])
+
+    strata, inverse, counts = np.unique(labels, return_inverse=True, return_counts=True)
+
+    # Alocação proporcional (maiores restos), com mínimo de 1 por estrato
+    quota = counts / counts.sum() * n_sample
+    alloc = np.maximum(1, np.floor(quota).astype(int))
+    alloc = np.minimum(alloc, counts)
+    for i in np.argsort(-(quota - np.floor(quota))):
+        if alloc.sum() >= n_sample:
+            break
+        if alloc[i] < counts[i]:
+            alloc[i] += 1
+
+    rng = np.random.default_rng(seed)
+    sampled = []
+    info = {}
+    for s_idx, stratum in enumerate(strata):
+        members = np.flatnonzero(inverse == s_idx)
+        chosen = rng.choice(members, size=alloc[s_idx], replace=False)
+        sampled.extend(nodes[i] for i in chosen)
+        info[str(stratum)] = (int(counts[s_idx]), int(alloc[s_idx]))
+
+    return sampled, info
@@ -0,0 +1,137 @@
+import os
+import json
+
+import numpy as np
+import networkx as nx
+
+from .modeling import ArrayGraph
+
+# Versão do formato em disco (incrementar se o layout dos arquivos mudar)
+SNAPSHOT_VERSION = 1
+SNAPSHOT_SUFFIX = ".snap"
+
+def snapshot_path(gexf_path):
+    """Diretório do snapshot binário correspondente a um GEXF (mesmo nome, sufixo .snap)."""
+    return os.path.splitext(gexf_path)[0] + SNAPSHOT_SUFFIX
+
+def _attribute_to_array(values):
+    """
+    Converte os valores de um atributo de nó em um array de dtype fixo (mapeável):
+    inteiros → int64, números → float64 (NaN para ausentes), demais → texto ('' para ausentes).
+    """
+    present = [v for v in values if v is not None]
+    if present and all(isinstance(v, (int, np.integer)) and not isinstance(v, bool) for v in present):
+        if len(present) == len(values):
+            return np.asarray(values, dtype=np.int64)
+        return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    if present and all(isinstance(v, (int, float, np.integer, np.floating)) and not isinstance(v, bool) for v in present):
+        return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    return np.array(["" if v is None else str(v) for v in values], dtype=str)
+
+def save_snapshot(G, path):
+    """
+    Grava o grafo (networkx ou ArrayGraph) como diretório de arrays .npy:
+    edges.npy (int32 [E, 2], u < v), labels.npy (texto de largura fixa),
+    attr_<i>.npy por atributo de nó e meta.json com o índice dos arquivos.
+    """
+    ag = G if isinstance(G, ArrayGraph) else ArrayGraph.from_networkx(G)
+    os.makedirs(path, exist_ok=True)
+
+    np.save(os.path.join(path, "edges.npy"), np.ascontiguousarray(ag.edges))
+    np.save(os.path.join(path, "labels.npy"), np.asarray(ag.labels, dtype=str))
+    attributes = {}
+    for i, (name, values) in enumerate(sorted(ag.node_attrs.items())):
+        filename = f"attr_{i}.npy"
+        np.save(os.path.join(path, filename), _attribute_to_array(list(values)))
+        attributes[name] = filename
+
+    meta = {
+        "version": SNAPSHOT_VERSION,
+        "num_nodes": ag.number_of_nodes(),
+        "num_edges": ag.number_of_edges(),
+        "attributes": attributes,
+    }
+    # meta.json por último: sua presença marca o snapshot como completo
+    with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return path
+
+def load_snapshot(path, mmap=True):
+    """
+    Carrega um snapshot como ArrayGraph. Com mmap=True os arrays são mapeados
+    em memória (somente leitura) e só as páginas tocadas são lidas do disco.
+    """
+    with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"Versão de snapshot incompatível em {path}: {meta.get('version')}")
+
+    mode = "r" if mmap else None
+    edges = np.load(os.path.join(path, "edges.npy"), mmap_mode=mode)
+    labels = np.load(os.path.join(path, "labels.npy"), mmap_mode=mode)
+    node_attrs = {
+        name: np.load(os.path.join(path, filename), mmap_mode=mode)
+        for name, filename in meta["attributes"].items()
+    }
+    return ArrayGraph(labels, edges, node_attrs, canonical=True)
+
+def has_snapshot(gexf_path):
+    """True se existe snapshot completo e não mais antigo que o GEXF."""
+    meta = os.path.join(snapshot_path(gexf_path), "meta.json")
+    if not os.path.exists(meta):
+        return False
+    return not os.path.exists(gexf_path) or os.path.getmtime(meta) >= os.path.getmtime(gexf_path)
+
+def write_graph(G, gexf_path, gexf=True):
+    """
+    Grava o snapshot binário (uso interno) e, opcionalmente, o GEXF (exportação para o Gephi).
+    """
+    if gexf:
+        nx.write_gexf(G if not isinstance(G, ArrayGraph) else G.to_networkx(), gexf_path)
+    return save_snapshot(G, snapshot_path(gexf_path))
+
+def load_graph(gexf_path, mmap=True):
+    """
+    Carrega o grafo de uma rede exportada como ArrayGraph: usa o snapshot binário
+    quando disponível; caso contrário lê o GEXF uma vez e grava o snapshot para as
+    próximas leituras. Retorna None se nenhum dos dois existir.
+    """
+    if has_snapshot(gexf_path):
+        return load_snapshot(snapshot_path(gexf_path), mmap=mmap)
+    if not os.path.exists(gexf_path):
+        return None
+
+    print(f"  [Snapshot] Convertendo {os.path.basename(gexf_path)} para formato binário...")
+    ag = ArrayGraph.from_networkx(nx.read_gexf(gexf_path))
+    try:
+        save_snapshot(ag, snapshot_path(gexf_path))
+    except OSError as e:
+        print(f"  [Aviso] Não foi possível gravar o snapshot: {e}")
+    return ag
+
+def edges_between(ag, node_names):
+    """
+    Arestas do grafo restritas a 'node_names', reindexadas pela posição na lista
+    (int64 [E, 2], i < j). Retorna (arestas, quantidade de nomes encontrados).
+    """
+    idx = ag.index_of(node_names)
+    found = idx >= 0
+    position = np.full(ag.number_of_nodes(), -1, dtype=np.int64)
+    position[idx[found]] = np.flatnonzero(found)
+
+    e = position[np.asarray(ag.edges)]
+    e = e[(e[:, 0] >= 0) & (e[:, 1] >= 0)]
+    e = np.unique(np.sort(e, axis=1), axis=0)
+    return e, int(found.sum())
+
+def adjacency_mask(ag, node_names):
+    """
+    Máscara booleana [N, N] de adjacência restrita a 'node_names' (na ordem dada),
+    sem passar por networkx. Retorna (máscara, quantidade de nomes encontrados).
+    """
+    N = len(node_names)
+    e, n_found = edges_between(ag, node_names)
+    mask = np.zeros((N, N), dtype=bool)
+    mask[e[:, 0], e[:, 1]] = True
+    mask[e[:, 1], e[:, 0]] = True
+    return mask, n_found
@@ -0,0 +1,156 @@
+import os
+import shutil
+import tempfile
+from array import array
+
+import numpy as np
+
+from .analysis import TIME_TYPECODE
+
+# Constante multiplicativa do hash "multiply-shift" (ímpar, 64 bits)
+_HASH_SEED = 0x9E3779B97F4A7C15
+
+class CountMinSketch:
+    """
+    Sketch Count-Min com atualização conservadora.
+    Estima a frequência de cada palavra em memória fixa (depth x width contadores),
+    nunca subestimando a contagem real — apenas superestimando em caso de colisão.
+    """
+    def __init__(self, width=1 << 20, depth=4, seed=42):
+        if width & (width - 1):
+            raise ValueError("A largura do sketch deve ser potência de 2.")
+        self.width = width
+        self.depth = depth
+        self._shift = np.uint64(64 - (width.bit_length() - 1))
+        rng = np.random.default_rng(seed)
+        # Multiplicadores ímpares independentes para cada linha (hash multiply-shift)
+        self._mult = rng.integers(1, 2**63, size=depth, dtype=np.uint64) | np.uint64(1)
+        self.table = np.zeros((depth, width), dtype=np.uint32)
+
+    def _indices(self, words):
+        hashes = np.fromiter((hash(w) for w in words), dtype=np.int64, count=len(words)).view(np.uint64)
+        hashes = hashes * np.uint64(_HASH_SEED)
+        with np.errstate(over='ignore'):
+            return (self._mult[:, None] * hashes[None, :]) >> self._shift
+
+    def add(self, words, counts):
+        """
+        Incrementa as contagens de um lote de palavras DISTINTAS e retorna
+        as estimativas atualizadas (vetorizado sobre o lote inteiro).
+        """
+        if not words:
+            return np.zeros(0, dtype=np.uint32)
+        idx = self._indices(words)
+        rows = np.arange(self.depth)[:, None]
+        counts = np.asarray(counts, dtype=np.uint32)
+
+        # Atualização conservadora: cada célula sobe apenas até (estimativa + incremento)
+        estimate = self.table[rows, idx].min(axis=0) + counts
+        np.maximum.at(self.table, (np.broadcast_to(rows, idx.shape), idx), np.broadcast_to(estimate, idx.shape))
+        return self.table[rows, idx].min(axis=0)
+
+    def estimate(self, words):
+        if not words:
+            return np.zeros(0, dtype=np.uint32)
+        idx = self._indices(words)
+        return self.table[np.arange(self.depth)[:, None], idx].min(axis=0)
+
+
+class StreamingWordAggregator:
+    """
+    Agregação em streaming de {palavra: tempos de ocorrência} com poda precoce.
+
+    Apenas palavras cuja frequência estimada (Count-Min) já alcançou 'min_occurrences'
+    ganham um array próprio. As ocorrências das demais ficam em um buffer plano
+    (palavra, tempo) que é despejado em disco quando excede 'memory_cap_mb'.
+    Na finalização, ocorrências antigas de palavras promovidas são recuperadas do
+    buffer/disco, de modo que as estatísticas das palavras frequentes são idênticas
+    às da agregação completa.
+    """
+    # Custo aproximado de uma entrada pendente: referência na lista + int32 no array
+    _BYTES_PER_PENDING = 12
+
+    def __init__(self, min_occurrences=3, memory_cap_mb=256, spill_dir=None,
+                 sketch_width=1 << 20, sketch_depth=4):
+        self.min_occurrences = min_occurrences
+        self.memory_cap_bytes = int(memory_cap_mb * 1024 * 1024)
+        self.sketch = CountMinSketch(width=sketch_width, depth=sketch_depth)
+        self.global_word_times = {}  # {palavra_promovida: array(TIME_TYPECODE)}
+
+        self._pending_words = []
+        self._pending_times = array(TIME_TYPECODE)
+        self._spill_dir = spill_dir
+        self._own_spill_dir = False
+        self._spill_files = []
+
+    def add(self, word_map):
+        """Recebe o mapa {palavra_internada: [tempos]} de um usuário."""
+        words = list(word_map)
+        estimates = self.sketch.add(words, [len(word_map[w]) for w in words])
+
+        for word, est in zip(words, estimates.tolist()):
+            times = word_map[word]
+            arr = self.global_word_times.get(word)
+            if arr is None and est >= self.min_occurrences:
+                arr = self.global_word_times[word] = array(TIME_TYPECODE)
+            if arr is not None:
+                arr.fromlist(times)
+            else:
+                self._pending_words.extend([word] * len(times))
+                self._pending_times.fromlist(times)
+
+        if len(self._pending_times) * self._BYTES_PER_PENDING > self.memory_cap_bytes:
+            self._spill()
+
+    def _spill(self):
+        if self._spill_dir is None:
+            self._spill_dir = tempfile.mkdtemp(prefix="bsky_spill_")
+            self._own_spill_dir = True
+        os.makedirs(self._spill_dir, exist_ok=True)
+
+        base = os.path.join(self._spill_dir, f"spill_{len(self._spill_files)}")
+        with open(base + ".bin", "wb") as f:
+            self._pending_times.tofile(f)
+        with open(base + ".txt", "w", encoding="utf-8") as f:
+            f.write("\n".join(self._pending_words))
+        self._spill_files.append(base)
+
+        print(f"  > [Streaming] Buffer de palavras raras despejado em disco ({len(self._pending_times)} ocorrências).{' ' * 10}")
+        self._pending_words = []
+        self._pending_times = array(TIME_TYPECODE)
+
+    def _absorb(self, words, times):
+        promoted = self.global_word_times
+        for word, t in zip(words, times):
+            arr = promoted.get(word)
+            if arr is not None:
+                arr.append(t)
+
+    def finalize(self):
+        """
+        Recupera as ocorrências pendentes (memória e disco) das palavras promovidas,
+        descarta falsos positivos do sketch e retorna {palavra: array(TIME_TYPECODE)}.
+        """
+        self._absorb(self._pending_words, self._pending_times)
+        self._pending_words = []
+        self._pending_times = array(TIME_TYPECODE)
+
+        for base in self._spill_files:
+            times = array(TIME_TYPECODE)
+            with open(base + ".bin", "rb") as f:
+                times.frombytes(f.read())
+            with open(base + ".txt", "r", encoding="utf-8") as f:
+                words = f.read().split("\n")
+            self._absorb(words, times)
+            os.remove(base + ".bin")
+            os.remove(base + ".txt")
+        self._spill_files = []
+        if self._own_spill_dir:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+
+        # Colisões do sketch podem ter promovido palavras raras: remove-as
+        rare = [w for w, arr in self.global_word_times.items() if len(arr) < self.min_occurrences]
+        for w in rare:
+            del self.global_word_times[w]
+
+        return self.global_word_times
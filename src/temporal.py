@@ -0,0 +1,193 @@
+import os
+import json
+from datetime import datetime
+
+import numpy as np
+
+from .modeling import ArrayGraph
+from .community import partition_similarity
+
+# Arestas codificadas como u * 2^32 + v (ids globais, u < v)
+_EDGE_SHIFT = np.int64(1 << 32)
+
+def _encode_edges(u, v):
+    u, v = np.minimum(u, v).astype(np.int64), np.maximum(u, v).astype(np.int64)
+    return np.unique(u * _EDGE_SHIFT + v)
+
+def _decode_edges(keys):
+    return np.column_stack((keys // _EDGE_SHIFT, keys % _EDGE_SHIFT))
+
+class TemporalGraphStore:
+    """
+    Histórico de execuções de uma mesma rede com snapshots codificados por delta.
+
+    - Os rótulos dos nós ganham ids globais estáveis em uma tabela append-only
+      (labels.txt), compartilhada por todas as execuções;
+    - Cada execução grava apenas nós/arestas adicionados e removidos em relação à
+      anterior (e as mudanças de comunidade); a cada 'keyframe_interval' execuções
+      um snapshot completo limita o custo de reconstrução;
+    - index.json mantém a ordem das execuções e o arquivo de cada uma.
+
+    O armazenamento cresce com o churn da rede, não com o seu tamanho.
+    """
+    def __init__(self, root_dir, keyframe_interval=10):
+        self.root_dir = root_dir
+        self.keyframe_interval = keyframe_interval
+        os.makedirs(root_dir, exist_ok=True)
+
+        self._index_path = os.path.join(root_dir, "index.json")
+        self._labels_path = os.path.join(root_dir, "labels.txt")
+        self.index = []
+        if os.path.exists(self._index_path):
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                self.index = json.load(f)
+        self.labels = []
+        if os.path.exists(self._labels_path):
+            with open(self._labels_path, "r", encoding="utf-8") as f:
+                self.labels = f.read().split("\n")[:-1]
+        self._label_ids = {label: i for i, label in enumerate(self.labels)}
+
+    def runs(self):
+        return [entry["run_id"] for entry in self.index]
+
+    def _global_ids(self, labels):
+        """Ids globais dos rótulos, acrescentando os inéditos à tabela em disco."""
+        new = [label for label in dict.fromkeys(labels) if label not in self._label_ids]
+        if new:
+            for label in new:
+                self._label_ids[label] = len(self.labels)
+                self.labels.append(label)
+            with open(self._labels_path, "a", encoding="utf-8") as f:
+                f.write("".join(f"{label}\n" for label in new))
+        return np.fromiter((self._label_ids[label] for label in labels), dtype=np.int64, count=len(labels))
+
+    def _position(self, run_id):
+        for pos, entry in enumerate(self.index):
+            if entry["run_id"] == run_id:
+                return pos
+        raise KeyError(f"Execução não encontrada no histórico: {run_id}")
+
+    def _state(self, pos):
+        """
+        Reconstrói (nós, chaves de aresta, membership denso) da execução na posição
+        'pos' a partir do keyframe mais recente, aplicando os deltas seguintes.
+        """
+        start = pos
+        while self.index[start]["kind"] != "keyframe":
+            start -= 1
+
+        nodes = edges = membership = None
+        for entry in self.index[start:pos + 1]:
+            with np.load(os.path.join(self.root_dir, entry["file"])) as data:
+                if entry["kind"] == "keyframe":
+                    nodes, edges = data["nodes"], data["edges"]
+                    membership = np.full(entry["num_labels"], -1, dtype=np.int32)
+                else:
+                    nodes = np.union1d(np.setdiff1d(nodes, data["nodes_del"], assume_unique=True), data["nodes_add"])
+                    edges = np.union1d(np.setdiff1d(edges, data["edges_del"], assume_unique=True), data["edges_add"])
+                    grown = np.full(entry["num_labels"], -1, dtype=np.int32)
+                    grown[:len(membership)] = membership
+                    membership = grown
+                membership[data["memb_ids"]] = data["memb_cids"]
+        return nodes, edges, membership
+
+    def record(self, G, run_id=None, partition=None):
+        """
+        Registra o grafo (networkx ou ArrayGraph) como nova execução, opcionalmente
+        com a partição {nó: comunidade}. Retorna o diff em relação à execução anterior
+        (None na primeira).
+        """
+        ag = G if isinstance(G, ArrayGraph) else ArrayGraph.from_networkx(G)
+        run_id = run_id or datetime.now().strftime("%Y%m%d_%H%M%S")
+        if run_id in self.runs():
+            raise ValueError(f"Execução já registrada: {run_id}")
+
+        ids = self._global_ids(ag.labels.tolist())
+        nodes = np.unique(ids)
+        edges = _encode_edges(ids[ag.edges[:, 0]], ids[ag.edges[:, 1]])
+        membership = np.full(len(self.labels), -1, dtype=np.int32)
+        if partition:
+            membership[self._global_ids(list(partition))] = np.fromiter(partition.values(), dtype=np.int32)
+
+        pos = len(self.index)
+        previous = self._state(pos - 1) if pos else None
+        since_keyframe = next((i for i, e in enumerate(reversed(self.index)) if e["kind"] == "keyframe"), None)
+        keyframe = previous is None or since_keyframe + 1 >= self.keyframe_interval
+
+        filename = f"run_{pos:05d}.npz"
+        entry = {"run_id": run_id, "file": filename, "num_labels": len(self.labels),
+                 "num_nodes": len(nodes), "num_edges": len(edges)}
+        if keyframe:
+            changed = np.flatnonzero(membership >= 0)
+            arrays = {"nodes": nodes, "edges": edges}
+        else:
+            prev_memb = np.full(len(self.labels), -1, dtype=np.int32)
+            prev_memb[:len(previous[2])] = previous[2]
+            changed = np.flatnonzero(membership != prev_memb)
+            arrays = {
+                "nodes_add": np.setdiff1d(nodes, previous[0], assume_unique=True),
+                "nodes_del": np.setdiff1d(previous[0], nodes, assume_unique=True),
+                "edges_add": np.setdiff1d(edges, previous[1], assume_unique=True),
+                "edges_del": np.setdiff1d(previous[1], edges, assume_unique=True),
+            }
+        np.savez_compressed(os.path.join(self.root_dir, filename), memb_ids=changed,
+                            memb_cids=membership[changed], **arrays)
+
+        entry["kind"] = "keyframe" if keyframe else "delta"
+        self.index.append(entry)
+        with open(self._index_path, "w", encoding="utf-8") as f:
+            json.dump(self.index, f, ensure_ascii=False, indent=2)
+
+        return self.diff(self.index[pos - 1]["run_id"], run_id) if pos else None
+
+    def load(self, run_id):
+        """Reconstrói a rede de uma execução como ArrayGraph (com 'Community ID', se registrada)."""
+        nodes, edges, membership = self._state(self._position(run_id))
+        local = np.full(len(self.labels), -1, dtype=np.int64)
+        local[nodes] = np.arange(len(nodes))
+        labels = np.array([self.labels[i] for i in nodes], dtype=object)
+        node_attrs = {}
+        if (membership[nodes] >= 0).any():
+            node_attrs["Community ID"] = membership[nodes].astype(np.int64)
+        return ArrayGraph(labels, local[_decode_edges(edges)], node_attrs)
+
+    def diff(self, run_a, run_b):
+        """
+        O que mudou entre as execuções A e B: nós e arestas adicionados/removidos
+        (rótulos) e, se ambas têm partição, a NMI das comunidades nos nós comuns.
+        """
+        nodes_a, edges_a, memb_a = self._state(self._position(run_a))
+        nodes_b, edges_b, memb_b = self._state(self._position(run_b))
+
+        def to_labels(ids):
+            return [self.labels[i] for i in ids]
+
+        def edge_labels(keys):
+            return [(self.labels[u], self.labels[v]) for u, v in _decode_edges(keys).tolist()]
+
+        result = {
+            "nos_adicionados": to_labels(np.setdiff1d(nodes_b, nodes_a, assume_unique=True)),
+            "nos_removidos": to_labels(np.setdiff1d(nodes_a, nodes_b, assume_unique=True)),
+            "arestas_adicionadas": edge_labels(np.setdiff1d(edges_b, edges_a, assume_unique=True)),
+            "arestas_removidas": edge_labels(np.setdiff1d(edges_a, edges_b, assume_unique=True)),
+            "nmi_comunidades": None,
+        }
+        common = np.intersect1d(nodes_a, nodes_b, assume_unique=True)
+        common = common[(memb_a[common] >= 0) & (memb_b[common] >= 0)] if len(common) else common
+        if len(common):
+            result["nmi_comunidades"] = partition_similarity(memb_a[common], memb_b[common])
+        return result
+
+    def storage_bytes(self):
+        return sum(
+            os.path.getsize(os.path.join(self.root_dir, f)) for f in os.listdir(self.root_dir)
+        )
+
+def format_churn(diff, num_nodes, num_edges):
+    """Resumo de uma linha do churn entre duas execuções."""
+    text = (f"+{len(diff['nos_adicionados'])}/-{len(diff['nos_removidos'])} nós, "
+            f"+{len(diff['arestas_adicionadas'])}/-{len(diff['arestas_removidas'])} arestas "
+            f"(rede atual: {num_nodes} nós / {num_edges} arestas)")
+    if diff["nmi_comunidades"] is not None:
+        text += f" | NMI das comunidades: {diff['nmi_comunidades']:.3f}"
+    return text
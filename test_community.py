@@ -0,0 +1,47 @@
+import networkx as nx
+import numpy as np
+
+from src.community import (PartitionCache, detect_communities_consensus, graph_hash, graph_to_edge_arrays,
+                           partition_similarity, resolution_profile)
+
+
+def test_similaridade_de_particoes():
+    a = np.array([0, 0, 1, 1, 2, 2])
+    assert partition_similarity(a, np.array([5, 5, 3, 3, 9, 9])) == 1.0
+    assert partition_similarity(a, np.zeros(6, dtype=int)) == 0.0
+    assert np.isclose(partition_similarity(a, np.array([0, 0, 1, 1, 1, 1])),
+                      partition_similarity(np.array([0, 0, 1, 1, 1, 1]), a))
+
+
+def test_perfil_rotula_cada_faixa_com_a_sua_particao(tmp_path):
+    G = nx.barabasi_albert_graph(150, 3, seed=1)
+    node_list, edges = graph_to_edge_arrays(G)
+    faixas = resolution_profile(G, 0.5, 2.0, min_step=0.2, cache_dir=str(tmp_path))
+    cache = PartitionCache(graph_hash(node_list, edges), str(tmp_path))
+
+    assert [f["inicio"] for f in faixas] == sorted(f["inicio"] for f in faixas)
+    for f in faixas:
+        assert f["inicio"] <= f["resolucao"] <= f["fim"]
+        # Partição e modularidade exportadas são as calculadas na própria resolução da faixa
+        membership, initial_mod = cache.get(f["resolucao"])
+        assert np.array_equal(f["membership"], membership)
+        comunidades = [{node_list[i] for i in np.flatnonzero(membership == c)} for c in np.unique(membership)]
+        assert np.isclose(f["initial_mod"], nx.community.modularity(G, comunidades))
+        assert f["num_communities"] == len(np.unique(membership))
+
+
+def test_consenso_simetrico_e_igual_em_serie_e_no_pool():
+    G = nx.karate_club_graph()
+    serie = detect_communities_consensus(G, resolutions=[1.0, 2.0], n_seeds=6, n_jobs=1)
+    pool = detect_communities_consensus(G, resolutions=[1.0, 2.0], n_seeds=6, n_jobs=2)
+    assert set(serie) == set(pool) == {1.0, 2.0}
+    for res, dados in serie.items():
+        C = dados["coassignment"]
+        assert C.shape == (34, 34)
+        assert abs(C - C.T).max() == 0
+        assert C.data.min() >= 0 and C.data.max() <= 1
+        assert 1 <= dados["consensus_iterations"] <= 10
+        assert all(0.0 <= s <= 1.0 for s in dados["stability"].values())
+        # Mesmas seeds: o pool reproduz exatamente as execuções em série
+        assert dados["partition"] == pool[res]["partition"]
+        assert abs(C - pool[res]["coassignment"]).max() == 0
@@ -0,0 +1,79 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("coniii")
+
+from src import ising_batch
+from src.ising_batch import _init_worker, executar_lote
+
+
+def _threads_do_processo():
+    from threadpoolctl import threadpool_info
+    return os.environ["OPENBLAS_NUM_THREADS"], [p["num_threads"] for p in threadpool_info() if p["user_api"] == "blas"]
+
+
+def test_limites_de_threads_do_job():
+    pytest.importorskip("threadpoolctl")
+    # Mesmo initializer do pool de executar_lote, num processo à parte
+    with ProcessPoolExecutor(max_workers=1, initializer=_init_worker, initargs=(1,)) as pool:
+        variavel, threads_blas = pool.submit(_threads_do_processo).result()
+    assert variavel == "1"
+    assert all(n == 1 for n in threads_blas)
+
+
+def _matriz(tmp_path, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(np.where(rng.random((6, 60)) < 0.4, 1, -1), index=[f"did:plc:{i}" for i in range(6)],
+                      columns=[f"kw{j}" for j in range(60)])
+    path = str(tmp_path / "matriz_ising_teste.csv")
+    df.to_csv(path)
+    return path
+
+
+def test_jobs_simultaneos_compartilham_o_cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    matriz = _matriz(tmp_path)
+    cache_dir = tmp_path / "cache"
+    jobs = [{"matriz": matriz, "comunidade": "teste.gexf", "metodos": metodos}
+            for metodos in (["nMF"], ["nMF", "TAP"], ["Pseudo-L2"])]
+    indice = executar_lote(jobs, saida_dir=str(tmp_path / "saida"), cores_por_job=1, n_paralelos=3,
+                           cache_dir=str(cache_dir), checkpoint_raiz=None)
+
+    assert indice["erro"].isna().all()
+    assert sorted(indice["metodo"]) == sorted(["Exato", "nMF"] * 2 + ["TAP", "Exato", "Pseudo-L2"])
+    # Uma entrada por (método, hiperparâmetros): nenhuma gravação concorrente se perde
+    assert len([f for f in os.listdir(cache_dir) if f.endswith(".npz")]) == 4
+    assert os.path.exists(str(tmp_path / "matriz_ising_teste_estatisticas.npz"))
+
+
+def _inferir_falso(S, session_id, checkpoint_raiz=None, **opcoes):
+    """Simula um MCH em andamento: grava um checkpoint, espera e confere o diretório."""
+    import time
+    os.makedirs(checkpoint_raiz, exist_ok=True)
+    marca = os.path.join(checkpoint_raiz, f"{session_id}.npz")
+    open(marca, "w").close()
+    time.sleep(0.5)
+    if os.listdir(checkpoint_raiz) != [os.path.basename(marca)]:
+        raise RuntimeError(f"checkpoints de outro job em {checkpoint_raiz}")
+    os.remove(marca)
+    pd.DataFrame([{"metodo": "MCH", "rmse_medias": 0.0}]).to_csv(f"comparacao_metodos_{session_id}.csv", index=False)
+    return {"MCH": {"multipliers": np.zeros(S.shape[1])}}
+
+
+def test_jobs_simultaneos_tem_checkpoints_separados(tmp_path, monkeypatch):
+    # O pool faz fork: os processos dos jobs herdam o inferir_todos simulado
+    monkeypatch.setattr(ising_batch, "inferir_todos", _inferir_falso)
+    monkeypatch.chdir(tmp_path)
+    matriz = _matriz(tmp_path)
+    checkpoints = tmp_path / "ckpt"
+    jobs = [{"matriz": matriz, "comunidade": "teste.gexf", "metodos": ["MCH"]} for _ in range(3)]
+    indice = executar_lote(jobs, saida_dir=str(tmp_path / "saida"), cores_por_job=1, n_paralelos=3,
+                           cache_dir=None, checkpoint_raiz=str(checkpoints))
+
+    assert indice["erro"].isna().all() and len(indice) == 3
+    # Diretórios por job, removidos quando o MCH termina sem deixar checkpoints
+    assert not os.listdir(checkpoints)
@@ -0,0 +1,89 @@
+import numpy as np
+
+from src.ising_cache import CacheInferencia, projetar_multiplicadores
+
+
+def _parametros(N, seed=0):
+    rng = np.random.default_rng(seed)
+    h = rng.normal(0, 0.5, N)
+    J = np.triu(rng.normal(0, 0.3, (N, N)), 1)
+    return h, J + J.T
+
+
+def test_projecao_sob_reordenacao_densa():
+    N = 5
+    h, J = _parametros(N, seed=6)
+    iu = np.triu_indices(N, 1)
+    nomes = [f"k{i}" for i in range(N)]
+    mult = np.concatenate((h, J[iu]))
+
+    perm = np.array([3, 0, 4, 1, 2])
+    projetado = projetar_multiplicadores(mult, nomes, [nomes[i] for i in perm])
+    assert np.allclose(projetado[:N], h[perm])
+    assert np.allclose(projetado[N:], J[np.ix_(perm, perm)][iu])
+
+    # Spin novo fica com h e J zerados; os demais preservam os valores da origem
+    projetado = projetar_multiplicadores(mult, nomes, ["k2", "novo", "k0"])
+    assert np.allclose(projetado[:3], [h[2], 0.0, h[0]])
+    assert np.allclose(projetado[3:], [0.0, J[2, 0], 0.0])
+
+
+def test_projecao_sob_reordenacao_esparsa():
+    N = 5
+    h, J = _parametros(N, seed=7)
+    nomes = [f"k{i}" for i in range(N)]
+    arestas_origem = np.array([[0, 1], [1, 3], [2, 4], [0, 4]])
+    mult = np.concatenate((h, J[arestas_origem[:, 0], arestas_origem[:, 1]]))
+
+    perm = np.array([4, 2, 0, 3, 1])
+    inversa = np.argsort(perm)
+    # Mesmas arestas reescritas nos índices novos, mais um par ausente na origem
+    arestas = np.vstack((np.sort(inversa[arestas_origem], axis=1), [[1, 3]]))
+    projetado = projetar_multiplicadores(mult, nomes, [nomes[i] for i in perm], arestas_origem, arestas)
+    assert np.allclose(projetado[:N], h[perm])
+    assert np.allclose(projetado[N:-1], mult[N:])
+    assert projetado[-1] == 0.0
+
+    # Do esparso para o denso
+    denso = projetar_multiplicadores(mult, nomes, [nomes[i] for i in perm], arestas_origem)
+    J_esparso = np.zeros((N, N))
+    J_esparso[arestas_origem[:, 0], arestas_origem[:, 1]] = mult[N:]
+    J_esparso += J_esparso.T
+    assert np.allclose(denso[N:], J_esparso[np.ix_(perm, perm)][np.triu_indices(N, 1)])
+
+
+def test_get_put_e_vizinho_mais_proximo(tmp_path):
+    rng = np.random.default_rng(8)
+    S = np.where(rng.random((200, 4)) < 0.5, 1, -1)
+    nomes = ["a", "b", "c", "d"]
+    cache = CacheInferencia(str(tmp_path))
+    chave = cache.chave(S, "MCH", {"lam": 0.01}, nomes)
+    assert chave != cache.chave(S, "MCH", {"lam": 0.1}, nomes)
+    assert cache.get(chave) is None
+
+    mult = rng.normal(size=4 + 6)
+    cache.put(chave, "MCH", mult, "MCH (λ=0.01)", S.mean(axis=0), nomes)
+    gravado, metodo = cache.get(chave)
+    assert np.array_equal(gravado, mult) and metodo == "MCH (λ=0.01)"
+
+    # Mesmos spins em outra ordem: a solução gravada volta projetada
+    vizinho, sobreposicao = cache.nearest("MCH", S.mean(axis=0)[::-1], nomes[::-1])
+    assert sobreposicao == 1.0
+    assert np.allclose(vizinho, projetar_multiplicadores(mult, nomes, nomes[::-1]))
+    assert cache.nearest("Exato", S.mean(axis=0), nomes) is None
+    assert cache.nearest("MCH", np.zeros(3), ["x", "y", "a"]) is None
+
+
+def test_instancias_concorrentes_nao_perdem_entradas(tmp_path):
+    # Duas instâncias abertas antes de qualquer gravação (como dois jobs em lote)
+    a, b = CacheInferencia(str(tmp_path)), CacheInferencia(str(tmp_path))
+    S = np.ones((10, 3))
+    chaves = []
+    for i, cache in enumerate((a, b, a)):
+        chave = cache.chave(S, "MCH", {"lam": i}, ["x", "y", "z"])
+        cache.put(chave, "MCH", np.full(6, float(i)), f"MCH {i}", np.zeros(3), ["x", "y", "z"])
+        chaves.append(chave)
+    nova = CacheInferencia(str(tmp_path))
+    for i, chave in enumerate(chaves):
+        assert nova.get(chave)[1] == f"MCH {i}"
+    assert not [f for f in tmp_path.iterdir() if f.suffix != ".npz"]
@@ -0,0 +1,67 @@
+import json
+
+import numpy as np
+import pytest
+
+from src.ising_eventos import Emissor, SinkHistorico, SinkJSONL
+from src.ising_exato import ajustar_exato
+from src.ising_pseudo import pseudo_verossimilhanca
+from src.ising_stats import calcular_estatisticas
+
+
+def _spins(R=400, N=5, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.where(rng.random((R, N)) < 0.4, 1, -1).astype(np.int64)
+
+
+def test_emissor_repassa_a_todos_os_sinks(tmp_path):
+    historico, so_fim = SinkHistorico(), SinkHistorico(tipos=["metodo_fim"])
+    jsonl = SinkJSONL(str(tmp_path / "eventos.jsonl"))
+    emissor = Emissor([historico, so_fim, jsonl])
+    emissor.emitir({"tipo": "iteracao", "metodo": "MCH", "config": 0, "iteracao": 1})
+    emissor.emitir({"tipo": "metodo_fim", "metodo": "MCH", "tempo_s": 1.5, "timestamp": 42.0})
+    emissor.fechar()
+
+    assert [e["tipo"] for e in historico.eventos] == ["iteracao", "metodo_fim"]
+    assert [e["tipo"] for e in so_fim.eventos] == ["metodo_fim"]
+    assert "timestamp" in historico.eventos[0] and historico.eventos[1]["timestamp"] == 42.0
+    linhas = [json.loads(l) for l in (tmp_path / "eventos.jsonl").read_text(encoding="utf-8").splitlines()]
+    assert linhas == historico.eventos
+
+
+def test_progresso_da_pseudo_verossimilhanca():
+    chamadas = []
+    pseudo_verossimilhanca(_spins(N=7), n_jobs=1, progresso=lambda concluidos, total: chamadas.append((concluidos, total)))
+    assert chamadas and chamadas[-1] == (7, 7)
+    assert [c for c, _ in chamadas] == sorted(c for c, _ in chamadas)
+
+
+def test_callback_por_iteracao_do_exato():
+    iteracoes = []
+    _, _, res = ajustar_exato(calcular_estatisticas(_spins())["observaveis"], 5,
+                              callback=lambda it, theta: iteracoes.append((it, theta.shape)))
+    assert [it for it, _ in iteracoes] == list(range(1, res.nit + 1))
+    assert all(forma == (15,) for _, forma in iteracoes)
+
+
+def test_metodo_fim_emitido_ao_fim_de_cada_metodo(tmp_path, monkeypatch):
+    pytest.importorskip("coniii")
+    from src.ising_coniii import inferir_todos
+
+    monkeypatch.chdir(tmp_path)
+    S = _spins()
+    for rodada in range(2):
+        historico = SinkHistorico()
+        inferir_todos(S, f"t{rodada}", metodos=("Pseudo-L2", "nMF"), sinks=[historico],
+                      cache_dir=str(tmp_path / "cache"), checkpoint_raiz=None)
+        tipos = [(e["tipo"], e.get("metodo")) for e in historico.eventos]
+        fins = [m for t, m in tipos if t == "metodo_fim"]
+        # N=5 inclui o Exato; cada método fecha antes de o próximo começar a emitir
+        assert fins == ["Exato", "Pseudo-L2", "nMF"]
+        fim_exato = tipos.index(("metodo_fim", "Exato"))
+        assert all(m == "Exato" for t, m in tipos[:fim_exato])
+        if rodada == 0:
+            assert ("iteracao", "Exato") in tipos
+            assert ("progresso", "Pseudo-L2") in tipos
+        stamps = [e["timestamp"] for e in historico.eventos if e["tipo"] == "metodo_fim"]
+        assert stamps == sorted(stamps)
@@ -0,0 +1,73 @@
+import itertools
+
+import numpy as np
+
+from src.ising_exato import LAM_EXATO, ajustar_exato, energias_gray, estados_gray, momentos_exatos
+from src.ising_stats import calcular_estatisticas
+
+
+def _parametros(N, seed=0):
+    rng = np.random.default_rng(seed)
+    h = rng.normal(0, 0.5, N)
+    J = np.triu(rng.normal(0, 0.3, (N, N)), 1)
+    return h, J + J.T
+
+
+def _forca_bruta(h, J):
+    estados = np.array(list(itertools.product((-1, 1), repeat=len(h))), dtype=np.float64)
+    E = -(estados @ h) - 0.5 * np.einsum("ki,ij,kj->k", estados, J, estados)
+    return estados, E
+
+
+def test_energias_gray_contra_forca_bruta():
+    N = 6
+    h, J = _parametros(N)
+    estados = estados_gray(N).astype(np.float64)
+    E = -(estados @ h) - 0.5 * np.einsum("ki,ij,kj->k", estados, J, estados)
+    assert np.allclose(energias_gray(h, J), E)
+    # Estados consecutivos diferem em exatamente um spin e cobrem os 2^N estados
+    assert np.all((np.diff(estados, axis=0) != 0).sum(axis=1) == 1)
+    assert len(np.unique(estados, axis=0)) == 1 << N
+
+
+def test_momentos_exatos_contra_forca_bruta():
+    N = 6
+    h, J = _parametros(N, seed=1)
+    estados, E = _forca_bruta(h, J)
+    p = np.exp(-E) / np.exp(-E).sum()
+
+    log_z, medias, pares = momentos_exatos(h, J, estados_gray(N), bloco=7)
+    assert np.isclose(log_z, np.log(np.exp(-E).sum()))
+    assert np.allclose(medias, p @ estados)
+    assert np.allclose(pares, (estados * p[:, None]).T @ estados)
+
+
+def test_ajuste_recupera_os_parametros_e_log_z():
+    N = 5
+    h, J = _parametros(N, seed=2)
+    estados, E = _forca_bruta(h, J)
+    p = np.exp(-E) / np.exp(-E).sum()
+    observaveis = np.concatenate((p @ estados, ((estados * p[:, None]).T @ estados)[np.triu_indices(N, 1)]))
+
+    theta, log_z, res = ajustar_exato(observaveis, N, lam=0.0)
+    assert res.success
+    assert np.allclose(theta, np.concatenate((h, J[np.triu_indices(N, 1)])), atol=1e-4)
+    assert np.isclose(log_z, np.log(np.exp(-E).sum()), atol=1e-6)
+
+
+def test_spin_constante_fica_finito_com_vies_desprezivel():
+    rng = np.random.default_rng(3)
+    S = np.where(rng.random((5000, 5)) < 0.4, 1, -1)
+    S[:, 2] = -1
+    observaveis = calcular_estatisticas(S)["observaveis"]
+
+    # A penalidade padrão é própria do solver exato e muito menor que o 'lam' da pseudo-verossimilhança
+    assert LAM_EXATO < 0.01
+    theta, _, res = ajustar_exato(observaveis, 5)
+    assert np.all(np.isfinite(theta)) and np.abs(theta).max() < 10
+    # Os spins livres continuam reproduzindo as médias empíricas
+    J = np.zeros((5, 5))
+    J[np.triu_indices(5, 1)] = theta[5:]
+    _, medias, _ = momentos_exatos(theta[:5], J + J.T, estados_gray(5))
+    livres = [0, 1, 3, 4]
+    assert np.allclose(medias[livres], S.mean(axis=0)[livres], atol=1e-3)
@@ -0,0 +1,40 @@
+import numpy as np
+
+from src import ising_meanfield
+from src.ising_meanfield import covariancia_inversa, inferir_aproximacao
+
+
+def _spins(R=4000, N=6, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.where(rng.random((R, N)) < 0.4, 1, -1).astype(np.int64)
+
+
+def test_nmf_e_o_negativo_da_inversa_da_covariancia():
+    S = _spins()
+    h, J, intensidade = inferir_aproximacao(S, "nMF", shrinkage=0.0)
+    esperado = -np.linalg.inv(np.cov(S.astype(np.float64), rowvar=False))
+    np.fill_diagonal(esperado, 0.0)
+    assert intensidade == 0.0
+    assert np.allclose(J, esperado)
+    assert np.allclose(J, J.T)
+    m = S.mean(axis=0)
+    assert np.allclose(h, np.arctanh(m) - J @ m)
+
+
+def test_aproximacoes_em_spins_independentes():
+    # Sem correlações, J ≈ 0 e h ≈ atanh(m) em todas as aproximações
+    S = _spins(R=200000, seed=1)
+    for aproximacao in ("nMF", "TAP", "SM"):
+        h, J, _ = inferir_aproximacao(S, aproximacao, shrinkage=0.0)
+        assert np.abs(J).max() < 0.02
+        assert np.allclose(h, np.arctanh(S.mean(axis=0)), atol=0.02)
+
+
+def test_cache_da_inversa_guarda_so_a_ultima_matriz():
+    ising_meanfield._cache_inversa.clear()
+    A, B = _spins(seed=2), _spins(seed=3)
+    primeira = covariancia_inversa(A, 0.0)
+    assert covariancia_inversa(A, 0.0) is primeira
+    covariancia_inversa(B, 0.0)
+    covariancia_inversa(B, 0.1)
+    assert len(ising_meanfield._cache_inversa) == 1
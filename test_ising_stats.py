@@ -0,0 +1,53 @@
+import os
+
+import numpy as np
+
+from src import ising_stats
+from src.ising_stats import MAX_CACHE_ESTATISTICAS, caminho_estatisticas, calcular_estatisticas, obter_estatisticas
+
+
+def _spins(R=500, N=7, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.where(rng.random((R, N)) < 0.3, 1, -1).astype(np.int64)
+
+
+def test_estatisticas_contra_numpy():
+    S = _spins()
+    stats = calcular_estatisticas(S, bloco_linhas=64)
+    X = S.astype(np.float64)
+    assert np.allclose(stats["medias"], X.mean(axis=0))
+    assert np.allclose(stats["correlacoes"], X.T @ X / len(X))
+    assert np.allclose(stats["covariancia"], np.cov(X, rowvar=False))
+    assert np.allclose(stats["observaveis"], np.concatenate((X.mean(axis=0), (X.T @ X / len(X))[np.triu_indices(7, 1)])))
+
+
+def test_cache_em_memoria_limitado():
+    ising_stats._cache.clear()
+    matrizes = [_spins(seed=s) for s in range(MAX_CACHE_ESTATISTICAS + 3)]
+    for S in matrizes:
+        obter_estatisticas(S)
+    assert len(ising_stats._cache) == MAX_CACHE_ESTATISTICAS
+    # A entrada mais recente continua em memória (mesmo objeto)
+    assert obter_estatisticas(matrizes[-1]) is obter_estatisticas(matrizes[-1])
+
+
+def test_cache_em_disco(tmp_path):
+    S = _spins(seed=9)
+    path = caminho_estatisticas(str(tmp_path / "matriz_estados.csv"))
+    assert path.endswith("matriz_estados_estatisticas.npz")
+
+    ising_stats._cache.clear()
+    original = obter_estatisticas(S, cache_path=path)
+    assert os.path.exists(path)
+    assert [f.name for f in tmp_path.iterdir()] == [os.path.basename(path)]
+
+    # Recarregado do disco, sem recalcular
+    ising_stats._cache.clear()
+    recarregado = obter_estatisticas(S, cache_path=path)
+    for k in ("medias", "correlacoes", "covariancia", "observaveis"):
+        assert np.array_equal(recarregado[k], original[k])
+
+    # Arquivo de outra matriz é ignorado
+    ising_stats._cache.clear()
+    outra = _spins(seed=10)
+    assert np.allclose(obter_estatisticas(outra, cache_path=path)["medias"], outra.mean(axis=0))
@@ -0,0 +1,59 @@
+import numpy as np
+
+from src.ising_validacao import LIMIAR_RHAT, escolher_triplas, ess, rhat, validar_multiplicadores
+
+
+def _cadeias_ar1(rho, C, T, seed=5):
+    rng = np.random.default_rng(seed)
+    x = np.empty((C, T))
+    x[:, 0] = rng.normal(size=C)
+    ruido = rng.normal(size=(C, T)) * np.sqrt(1 - rho ** 2)
+    for t in range(1, T):
+        x[:, t] = rho * x[:, t - 1] + ruido[:, t]
+    return x[..., None]
+
+
+def test_rhat_e_ess_contra_o_valor_analitico_do_ar1():
+    for rho in (0.0, 0.5, 0.9):
+        C, T = 4, 20000
+        tracos = _cadeias_ar1(rho, C, T)
+        # Tempo de autocorrelação integrado do AR(1): (1 + ρ) / (1 - ρ)
+        ess_analitico = C * T * (1 - rho) / (1 + rho)
+        assert abs(rhat(tracos)[0] - 1.0) < 0.01
+        assert abs(ess(tracos)[0] / ess_analitico - 1.0) < 0.15
+
+
+def test_rhat_detecta_cadeias_nao_misturadas():
+    tracos = _cadeias_ar1(0.5, 4, 2000)
+    tracos[0] += 3.0
+    assert rhat(tracos)[0] > LIMIAR_RHAT
+    # Tendência dentro de uma única cadeia também aparece no split R-hat
+    deriva = _cadeias_ar1(0.5, 1, 2000) + np.linspace(0, 5, 2000)[None, :, None]
+    assert rhat(deriva)[0] > LIMIAR_RHAT
+    # Colunas constantes recebem R-hat 1 e ESS igual ao total de amostras
+    constantes = np.ones((4, 100, 1))
+    assert rhat(constantes)[0] == 1.0
+    assert ess(constantes)[0] == 400
+
+
+def test_triplas():
+    assert len(escolher_triplas(6)) == 20
+    triplas = escolher_triplas(100, max_triplas=50)
+    assert len(triplas) == 50
+    assert np.all((triplas[:, 0] < triplas[:, 1]) & (triplas[:, 1] < triplas[:, 2]))
+    assert np.array_equal(triplas, escolher_triplas(100, max_triplas=50))
+
+
+def test_validacao_de_spins_independentes():
+    N = 4
+    h = np.array([0.5, -0.3, 0.0, 0.8])
+    multiplicadores = np.concatenate((h, np.zeros(N * (N - 1) // 2)))
+    rng = np.random.default_rng(0)
+    S = np.where(rng.random((20000, N)) < (1 + np.tanh(h)) / 2, 1, -1)
+    relatorio = validar_multiplicadores(multiplicadores, N, spin_matrix=S, n_cadeias=4, amostras_por_cadeia=2000,
+                                        seed=1)
+    assert relatorio["rhat_max"] < LIMIAR_RHAT
+    assert relatorio["ess_min"] > 100
+    assert relatorio["medias"]["rmse"] < 0.05
+    assert relatorio["correlacoes"]["rmse"] < 0.05
+    assert relatorio["n_triplas"] == 4
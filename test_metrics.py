@@ -0,0 +1,43 @@
+import networkx as nx
+import numpy as np
+
+from src.metrics import as_array_graph, clustering, core_numbers, degree_assortativity, pagerank, triangle_counts
+
+GRAFOS = [
+    nx.karate_club_graph(),
+    nx.barabasi_albert_graph(300, 4, seed=3),
+    nx.gnp_random_graph(200, 0.05, seed=4),
+    nx.star_graph(20),
+    nx.complete_graph(8),
+    nx.empty_graph(5),
+]
+
+
+def _por_no(ag, valores):
+    return [valores[v] for v in ag.labels.tolist()]
+
+
+def test_triangulos_e_agrupamento_contra_networkx():
+    for G in GRAFOS:
+        ag = as_array_graph(G)
+        # Blocos pequenos de cunhas exercitam a enumeração em vários lotes
+        assert np.array_equal(triangle_counts(ag, max_wedges=64), _por_no(ag, nx.triangles(G)))
+        assert np.array_equal(triangle_counts(ag), _por_no(ag, nx.triangles(G)))
+
+        c = clustering(ag)
+        assert np.allclose(c["local"], _por_no(ag, nx.clustering(G)))
+        assert np.isclose(c["medio"], nx.average_clustering(G))
+        assert np.isclose(c["transitividade"], nx.transitivity(G))
+
+
+def test_core_numbers_contra_networkx():
+    for G in GRAFOS:
+        ag = as_array_graph(G)
+        assert np.array_equal(core_numbers(ag), _por_no(ag, nx.core_number(G)))
+
+
+def test_pagerank_e_assortatividade_contra_networkx():
+    for G in GRAFOS[:3]:
+        ag = as_array_graph(G)
+        assert np.allclose(pagerank(ag), _por_no(ag, nx.pagerank(G, weight=None, tol=1e-10)), atol=1e-6)
+        assert np.isclose(degree_assortativity(ag), nx.degree_assortativity_coefficient(G))
@@ -0,0 +1,32 @@
+import networkx as nx
+import numpy as np
+
+from src.modeling import ArrayGraph, build_array_graph
+
+
+def test_arestas_canonicas_sem_self_loops_nem_duplicatas():
+    ag = build_array_graph([("a", "b"), ("b", "a"), ("c", "c"), ("c", "a"), ("a", "b")])
+    assert ag.labels.tolist() == ["a", "b", "c"]
+    assert ag.edges.tolist() == [[0, 1], [0, 2]]
+    assert ag.degree().tolist() == [2, 1, 1]
+    assert not hasattr(ag, "remove_self_loops")
+
+
+def test_csr_simetrico():
+    G = nx.gnp_random_graph(60, 0.1, seed=2)
+    ag = ArrayGraph.from_networkx(G)
+    indptr, indices = ag.csr()
+    for i, v in enumerate(ag.labels):
+        vizinhos = set(ag.labels[indices[indptr[i]:indptr[i + 1]]].tolist())
+        assert vizinhos == set(G.neighbors(v))
+
+
+def test_k_core_igual_networkx():
+    for G in (nx.barabasi_albert_graph(300, 2, seed=3), nx.karate_club_graph(), nx.path_graph(10)):
+        ag = ArrayGraph.from_networkx(G)
+        for k in (1, 2, 3, 4):
+            core = ag.k_core(k)
+            esperado = nx.k_core(G, k)
+            assert set(core.labels.tolist()) == set(esperado.nodes())
+            assert core.number_of_edges() == esperado.number_of_edges()
+            assert set(map(frozenset, core.to_networkx().edges())) == set(map(frozenset, esperado.edges()))
@@ -0,0 +1,34 @@
+from array import array
+
+import numpy as np
+
+from src.analysis import SECONDS_PER_DAY, TIME_TYPECODE, analyze_word_intervals_dict
+from src.posts import BLUESKY_START_DATE, parse_created_at_batch, parse_datetime
+
+
+def test_conversao_vetorizada_igual_a_parse_datetime():
+    # (carimbo da API, equivalente com fuso explícito: carimbos sem fuso são UTC)
+    casos = [
+        ("2024-05-01T12:34:56.789Z", "2024-05-01T12:34:56.789Z"),
+        ("2024-05-01T12:34:56.123456789+02:00", "2024-05-01T12:34:56.123456789+02:00"),
+        ("2023-02-17T00:00:00Z", "2023-02-17T00:00:00Z"),
+        ("2024-11-30T23:59:59.5-03:00", "2024-11-30T23:59:59.5-03:00"),
+        ("2025-01-02T03:04:05", "2025-01-02T03:04:05Z"),
+    ]
+    segundos, validos = parse_created_at_batch([c for c, _ in casos])
+    assert segundos.dtype == np.int32 and validos.all()
+    for s, (_, com_fuso) in zip(segundos.tolist(), casos):
+        assert s == int(np.floor((parse_datetime(com_fuso) - BLUESKY_START_DATE).total_seconds()))
+
+
+def test_carimbos_invalidos_sao_descartados():
+    _, validos = parse_created_at_batch(["2024-05-01T12:00:00Z", "não é data", "", "2024-13-45T00:00:00Z"])
+    assert validos.tolist() == [True, False, False, False]
+
+
+def test_intervalos_em_dias():
+    tempos = {"a": array(TIME_TYPECODE, [0, SECONDS_PER_DAY, 3 * SECONDS_PER_DAY]),
+              "rara": array(TIME_TYPECODE, [0, 10])}
+    stats = analyze_word_intervals_dict(tempos)
+    assert stats["word"].tolist() == ["a"]
+    assert np.isclose(stats["desvio_padrao"].iloc[0], np.std([1.0, 2.0]))
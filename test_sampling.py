@@ -0,0 +1,49 @@
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+from src.analysis import add_confidence_bounds
+from src.sampling import _z_score, plan_post_cap, required_sample_size, stratified_user_sample
+
+
+def test_tamanho_amostra_cochran():
+    # Valores clássicos: 385 para população infinita, 278 para N=1000 (±5%, 95%)
+    assert required_sample_size(10**9) == 385
+    assert required_sample_size(1000) == 278
+    assert required_sample_size(50, margin=0.01) == 50
+    assert required_sample_size(0) == 0
+
+
+def test_limite_de_posts_atinge_erro_relativo_do_desvio_padrao():
+    n_usuarios, taxa = 200, 1e-3
+    anterior = None
+    for erro in (0.3, 0.2, 0.1, 0.05):
+        cap = plan_post_cap(erro, n_usuarios, min_word_rate=taxa, max_posts=10**6)
+        assert cap % 100 == 0
+        # Ocorrências esperadas da palavra-limite bastam para o erro relativo alvo do DP
+        k = n_usuarios * taxa * cap - 1
+        assert _z_score(0.95) / np.sqrt(2 * (k - 1)) <= erro
+        assert anterior is None or cap >= anterior
+        anterior = cap
+    assert plan_post_cap(0.01, n_usuarios, max_posts=3000) == 3000
+
+
+def test_amostra_estratificada_proporcional():
+    G = nx.barabasi_albert_graph(500, 2, seed=1)
+    amostra, estratos = stratified_user_sample(G, 100, n_strata=4)
+    assert len(amostra) == len(set(amostra)) == 100
+    assert set(amostra) <= set(G.nodes())
+    total = sum(pop for pop, _ in estratos.values())
+    for pop, n in estratos.values():
+        assert n >= 1
+        assert abs(n - 100 * pop / total) <= 1
+
+
+def test_limites_de_confianca_do_desvio_padrao():
+    stats = pd.DataFrame({"occurrences": [3, 11, 101], "desvio_padrao": [10.0, 10.0, 10.0]})
+    out = add_confidence_bounds(stats, std_rel_error=0.2, user_margin=0.05)
+    erro = out["erro_relativo"].to_numpy()
+    assert np.allclose(erro[1:], _z_score(0.95) / np.sqrt(2 * (np.array([10, 100]) - 1)))
+    assert np.all(np.diff(erro) < 0)
+    assert np.all(out["dp_inferior"] <= out["desvio_padrao"])
+    assert np.all(out["dp_superior"] >= out["desvio_padrao"])
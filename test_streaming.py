@@ -0,0 +1,43 @@
+import numpy as np
+
+from src.streaming import CountMinSketch, StreamingWordAggregator
+
+
+def _fluxo(seed=2, n_usuarios=300, vocabulario=400):
+    """Mapas {palavra: [tempos]} por usuário, com frequências do tipo Zipf."""
+    rng = np.random.default_rng(seed)
+    probs = 1.0 / np.arange(1, vocabulario + 1)
+    probs /= probs.sum()
+    for _ in range(n_usuarios):
+        word_map = {}
+        for w in rng.choice(vocabulario, size=rng.integers(1, 8), p=probs):
+            word_map.setdefault(f"w{w}", []).append(int(rng.integers(0, 10**6)))
+        yield word_map
+
+
+def test_sketch_nunca_subestima():
+    sketch = CountMinSketch(width=64, depth=3)
+    exato = {}
+    for word_map in _fluxo():
+        words = list(word_map)
+        sketch.add(words, [len(word_map[w]) for w in words])
+        for w in words:
+            exato[w] = exato.get(w, 0) + len(word_map[w])
+    palavras = list(exato)
+    assert np.all(sketch.estimate(palavras) >= np.array([exato[w] for w in palavras]))
+
+
+def test_agregador_igual_agregacao_exata(tmp_path):
+    # Sketch minúsculo (muitas colisões) e limite de memória baixo (força despejos em disco)
+    agregador = StreamingWordAggregator(min_occurrences=3, memory_cap_mb=0.0005, spill_dir=str(tmp_path),
+                                        sketch_width=16, sketch_depth=2)
+    exato = {}
+    for word_map in _fluxo():
+        agregador.add(word_map)
+        for w, tempos in word_map.items():
+            exato.setdefault(w, []).extend(tempos)
+
+    resultado = agregador.finalize()
+    esperado = {w: sorted(t) for w, t in exato.items() if len(t) >= 3}
+    assert {w: sorted(arr) for w, arr in resultado.items()} == esperado
+    assert not list(tmp_path.iterdir())